@@ -0,0 +1,192 @@
+# src/benchmarks/cases.py
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, NamedTuple
+
+# What the benchmarks time. Every case runs in a fresh process (see
+# benchmarks.runner), so its peak RSS is its own: setup(path) loads
+# whatever the case needs (not timed) and returns the callable to time.
+# The callable may return a dict of extra metrics (e.g. startup times).
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Case(NamedTuple):
+    setup: Callable[[str], Callable[[], dict | None]]
+    needs_display: bool = False
+    needs_pandas: bool = False
+    description: str = ""
+    per_dataset: bool = True  # False: runs once, without a data file
+
+
+def peak_rss_bytes() -> int | None:
+    """
+    Peak resident set size of this process (or of its biggest finished
+    child process, for cases that launch the app) so far, None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ---------------------------
+# Cases
+# ---------------------------
+def _load(backend: str):
+    def setup(path):
+        from services.csv_service import load_csv_file
+
+        return lambda: load_csv_file(path, backend=backend)
+    return setup
+
+
+def _load_compact(path):
+    # the GUI's path for big files: CompactTable batches, backend by size
+    from models.compact_table import CompactTable
+    from services.csv_service import iter_csv_batches
+
+    def run():
+        table = CompactTable()
+        for batch in iter_csv_batches(path, batch_size=5000, backend="auto", as_tables=True):
+            table.append_table(batch.rows)
+    return run
+
+
+def _all_rows(path):
+    from services.csv_service import load_csv_file
+
+    headers, rows = load_csv_file(path)
+    return [headers] + rows if headers else rows
+
+
+def _normalize(path):
+    # CsvTablePanel.load_data's row padding, without the widget
+    from services.table_edit_service import pad_rows
+
+    rows = _all_rows(path)
+    return lambda: pad_rows(rows)
+
+
+def _panel_load(path):
+    import customtkinter as ctk
+
+    from ui.excel_panel import CsvTablePanel
+
+    rows = _all_rows(path)
+    root = ctk.CTk()
+    root.withdraw()
+    panel = CsvTablePanel(root)
+    panel.grid(row=0, column=0, sticky="nsew")
+
+    def run():
+        panel.load_data(rows)
+        root.update_idletasks()
+    return run
+
+
+def _bulk_replace(path):
+    # a find/replace over every column, as the bulk edit dialog applies it
+    # to a model: compute, journal the deltas, write the columns
+    from models.compact_table import CompactTable
+    from models.undo_journal import CellDelta
+    from services.bulk_service import BulkUpdate, compute_updates
+
+    table = CompactTable.from_rows(_all_rows(path))
+    update = BulkUpdate("replace", tuple(range(table.num_cols)), find="e", replace="E")
+
+    def run():
+        changes = compute_updates(table, update)
+        for ch in changes:
+            CellDelta.from_codes(ch.column, ch.rows, ch.old_uniques, ch.codes, ch.uniques, ch.codes)
+            table.set_column(ch.column, ch.rows, ch.uniques, ch.codes)
+    return run
+
+
+def _save(path):
+    from models.snapshot import RowListSnapshot
+    from services.csv_service import write_csv_atomic
+
+    snapshot = RowListSnapshot(_all_rows(path))
+    fd, out = tempfile.mkstemp(suffix=".csv", dir=os.path.dirname(path))
+    os.close(fd)
+
+    def run():
+        try:
+            write_csv_atomic(out, snapshot.iter_rows(), total_rows=snapshot.num_rows)
+        finally:
+            os.remove(out)
+    return run
+
+
+def _startup_import(_path):
+    # a fresh interpreter importing the GUI module: what a cold start
+    # pays before the window can be created
+    command = [sys.executable, "-c", "import ui.main_window"]
+
+    def run():
+        subprocess.run(command, cwd=SRC_DIR, check=True)
+    return run
+
+
+_STARTUP_RE = re.compile(r"imports ([\d.]+) s, first frame ([\d.]+) s, ready ([\d.]+) s")
+
+
+def _startup(_path):
+    # the whole app until it is usable (main.py --startup-time quits there)
+    command = [sys.executable, "main.py", "--startup-time"]
+
+    def run():
+        out = subprocess.run(command, cwd=SRC_DIR, check=True, capture_output=True, text=True).stdout
+        match = _STARTUP_RE.search(out)
+        if match is None:
+            raise RuntimeError(f"no startup times in output: {out!r}")
+        imports, first_frame, ready = map(float, match.groups())
+        return {"imports": imports, "first_frame": first_frame, "ready": ready}
+    return run
+
+
+CASES: Dict[str, Case] = {
+    "load-stdlib": Case(_load("stdlib"), description="load_csv_file, csv.reader"),
+    "load-pandas": Case(_load("pandas"), needs_pandas=True, description="load_csv_file, pandas backend"),
+    "load-compact": Case(_load_compact, description="batched load into a CompactTable (auto backend)"),
+    "normalize": Case(_normalize, description="row padding of CsvTablePanel.load_data"),
+    "panel-load": Case(_panel_load, needs_display=True, description="CsvTablePanel.load_data with Tk"),
+    "bulk-replace": Case(_bulk_replace, description="bulk find/replace over all columns"),
+    "save": Case(_save, description="write_csv_atomic of the whole table"),
+    "startup-import": Case(_startup_import, per_dataset=False, description="python -c 'import ui.main_window'"),
+    "startup": Case(_startup, needs_display=True, per_dataset=False, description="main.py --startup-time"),
+}
+
+
+def run_case(name: str, path: str) -> dict:
+    """
+    Run one case in this process. Returns seconds (timed part only),
+    setup_rss / peak_rss in bytes (None if unknown) and the case's own
+    metrics, or error.
+    """
+    try:
+        run = CASES[name].setup(path)
+        setup_rss = peak_rss_bytes()
+        start = time.perf_counter()
+        metrics = run()
+        seconds = time.perf_counter() - start
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    if not isinstance(metrics, dict):
+        metrics = {}  # e.g. the loaded table of a load case
+    return {"seconds": seconds, "setup_rss": setup_rss, "peak_rss": peak_rss_bytes(), "metrics": metrics}
@@ -0,0 +1,117 @@
+# src/benchmarks/datagen.py
+import os
+import random
+from typing import Callable, Dict, Iterator
+
+# Synthetic CSV files for the benchmarks. Every generator is seeded, so the
+# same (kind, rows) always gives the same bytes and results stay comparable
+# between commits.
+
+SEED = 1234
+
+# Lines handed to one write() call
+WRITE_LINES = 10_000
+
+# input1.csv-like: a few columns of markers repeating every 3 rows
+_PATTERN = [
+    ["*", "", "", "*", "", "", "*", "", "", "*", "", "", "*", "*", "", "", "*", "", "", "", "", "*", "", "", "", "", ""],
+    ["", "**", "", "", "**", "", "", "**", "", "", "**", "", "", "", "**", "", "", "**", "", "**", "", "", "**", "", "**", "", ""],
+    ["", "", "***", "", "", "***", "", "", "***", "", "", "***", "", "", "", "***", "", "", "***", "", "***", "", "", "***", "", "***", "***"],
+]
+
+WIDE_COLUMNS = 200
+RAGGED_MAX_FIELDS = 40
+
+_WORDS = [
+    "alpha", "beta", "gamma", "delta", "open", "closed", "done", "todo",
+    "north", "south", "east", "west", "red", "green", "blue", "n/a",
+]
+
+
+def _repetitive_lines(rows: int) -> Iterator[str]:
+    lines = [",".join(r) + "\r\n" for r in _PATTERN]
+    yield "xxx,,,*,,,*,,,*,,,*,*,,,*,,,,,*,,,,,\r\n"
+    for i in range(rows - 1):
+        yield lines[i % 3]
+
+
+def _wide_lines(rows: int) -> Iterator[str]:
+    rng = random.Random(SEED)
+    yield ",".join(f"col{c}" for c in range(WIDE_COLUMNS)) + "\r\n"
+    # a pool of distinct row bodies; the leading id keeps every row unique
+    pool = [
+        ",".join(rng.choice(_WORDS) if c % 3 else str(rng.randrange(1000)) for c in range(1, WIDE_COLUMNS))
+        for _ in range(997)
+    ]
+    for i in range(rows - 1):
+        yield f"{i},{pool[i % len(pool)]}\r\n"
+
+
+def _ragged_lines(rows: int) -> Iterator[str]:
+    rng = random.Random(SEED)
+    pool = [
+        ",".join(rng.choice(_WORDS) for _ in range(rng.randint(1, RAGGED_MAX_FIELDS)))
+        for _ in range(1009)
+    ]
+    for i in range(rows):
+        # blank lines now and then, like hand-edited files
+        yield "\r\n" if i % 101 == 100 else pool[i % len(pool)] + "\r\n"
+
+
+def _quoted_lines(rows: int) -> Iterator[str]:
+    rng = random.Random(SEED)
+    yield "id,name,note,amount,status\r\n"
+    notes = [
+        '"line one\nline two"',
+        '"has, commas, inside"',
+        '"say ""hello"""',
+        '"multi\r\nline\r\nnote"',
+        "plain",
+        "",
+    ]
+    for i in range(rows - 1):
+        yield (
+            f"{i},{rng.choice(_WORDS)} {i % 977},{notes[i % len(notes)]},"
+            f"{rng.randrange(100000) / 100},{rng.choice(_WORDS)}\r\n"
+        )
+
+
+GENERATORS: Dict[str, Callable[[int], Iterator[str]]] = {
+    "repetitive": _repetitive_lines,
+    "wide": _wide_lines,
+    "ragged": _ragged_lines,
+    "quoted": _quoted_lines,
+}
+
+
+def dataset_path(data_dir: str, kind: str, rows: int) -> str:
+    return os.path.join(data_dir, f"{kind}-{rows}.csv")
+
+
+def write_dataset(path: str, kind: str, rows: int) -> int:
+    """Write `rows` records of the given kind to `path`; returns the file size."""
+    try:
+        lines = GENERATORS[kind](rows)
+    except KeyError:
+        raise ValueError(f"Unknown dataset kind: {kind!r}") from None
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        buf = []
+        for line in lines:
+            buf.append(line)
+            if len(buf) >= WRITE_LINES:
+                f.write("".join(buf))
+                buf.clear()
+        f.write("".join(buf))
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def ensure_dataset(data_dir: str, kind: str, rows: int) -> str:
+    """Path of the dataset, generated on first use and reused afterwards."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = dataset_path(data_dir, kind, rows)
+    if not os.path.exists(path):
+        write_dataset(path, kind, rows)
+    return path
@@ -0,0 +1,314 @@
+# src/benchmarks/runner.py
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from benchmarks.cases import CASES
+from benchmarks.datagen import GENERATORS, ensure_dataset
+
+DEFAULT_SIZES = "10k,100k"
+MAX_ROWS = 10_000_000
+DEFAULT_REPEAT = 3
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "csv-viewer-bench")
+
+# compare: slower than the baseline by more than this share (and by more
+# than the noise floor) counts as a regression
+DEFAULT_THRESHOLD = 0.10
+NOISE_FLOOR_SECONDS = 0.02
+
+RESULTS_VERSION = 1
+
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '1m' / '1M' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if scale > 1 else text
+    try:
+        rows = int(float(number) * scale)
+    except ValueError:
+        raise ValueError(f"Bad size: {text!r} (expected e.g. 10k, 1m)") from None
+    if not 1 <= rows <= MAX_ROWS:
+        raise ValueError(f"Size out of range: {text!r} (1 to {MAX_ROWS:,} rows)")
+    return rows
+
+
+def _split_names(text: str, known, what: str) -> List[str]:
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise ValueError(f"Unknown {what}: {', '.join(unknown)} (known: {', '.join(known)})")
+    return names
+
+
+# ---------------------------
+# Display for the Tk cases
+# ---------------------------
+@contextlib.contextmanager
+def virtual_display():
+    """
+    Yield True when Tk can open a window: on Windows / macOS or with
+    $DISPLAY set as it is, otherwise under a private Xvfb server (if
+    installed) for as long as the context lasts. Yields False if there is
+    no way to get a display.
+    """
+    if os.name == "nt" or sys.platform == "darwin" or os.environ.get("DISPLAY"):
+        yield True
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield False
+        return
+
+    number = next(n for n in range(99, 199) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    proc = subprocess.Popen(
+        [xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            if proc.poll() is not None or time.monotonic() > deadline:
+                yield False
+                return
+            time.sleep(0.05)
+        os.environ["DISPLAY"] = f":{number}"
+        try:
+            yield True
+        finally:
+            del os.environ["DISPLAY"]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+# ---------------------------
+# Running
+# ---------------------------
+def _run_isolated(case: str, path: str) -> dict:
+    """Run a case in a fresh process, so its peak RSS is its own."""
+    from benchmarks.cases import run_case
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, case, path).result()
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _mb(value) -> str:
+    return f"{value / 1e6:8.1f} MB" if value is not None else "       ? MB"
+
+
+def run_benchmarks(
+    kinds: List[str],
+    sizes: List[int],
+    cases: List[str],
+    repeat: int = DEFAULT_REPEAT,
+    data_dir: str = DEFAULT_DATA_DIR,
+    report=print,
+) -> dict:
+    """
+    Run every case on every dataset (repeat times, each in a fresh
+    process) and return the results document:
+
+    - meta: commit, python, platform, cpus, time
+    - results: one entry per (case, dataset, rows) with the best seconds
+      of the runs, all run times, the file size, the highest peak RSS and
+      the case's own metrics of the best run; or skipped / error. Cases
+      that don't read a data file run once (dataset "-", rows 0).
+    """
+    from services.csv_backends import pandas_available
+
+    def measure(entry: dict, case: str, path: str, has_display: bool):
+        if CASES[case].needs_display and not has_display:
+            entry["skipped"] = "no display"
+        elif CASES[case].needs_pandas and not pandas_available():
+            entry["skipped"] = "pandas not installed"
+        if "skipped" in entry:
+            report(f"SKIP  {case:<14} {entry['skipped']}")
+            return
+
+        runs = [_run_isolated(case, path) for _ in range(repeat)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            entry["error"] = errors[0]
+            report(f"FAIL  {case:<14} {entry['error']}")
+            return
+        best = min(runs, key=lambda r: r["seconds"])
+        peaks = [r["peak_rss"] for r in runs if r["peak_rss"] is not None]
+        setups = [r["setup_rss"] for r in runs if r["setup_rss"] is not None]
+        entry["seconds"] = best["seconds"]
+        entry["runs"] = [r["seconds"] for r in runs]
+        entry["peak_rss"] = max(peaks) if peaks else None
+        entry["setup_rss"] = max(setups) if setups else None
+        if best["metrics"]:
+            entry["metrics"] = best["metrics"]
+        extra = "".join(f"  {k} {v:.3f}s" for k, v in best["metrics"].items())
+        report(f"OK    {case:<14} {entry['seconds']:8.3f}s  peak {_mb(entry['peak_rss'])}{extra}")
+
+    results = []
+    needs_display = any(CASES[c].needs_display for c in cases)
+    display = virtual_display() if needs_display else contextlib.nullcontext(False)
+    with display as has_display:
+        once = [c for c in cases if not CASES[c].per_dataset]
+        if once:
+            report("-- no data file")
+        for case in once:
+            entry = {"case": case, "dataset": "-", "rows": 0, "bytes": 0}
+            results.append(entry)
+            measure(entry, case, "", has_display)
+
+        for kind in kinds:
+            for rows in sizes:
+                report(f"-- {kind}, {rows:,} rows")
+                path = ensure_dataset(data_dir, kind, rows)
+                size = os.path.getsize(path)
+                for case in cases:
+                    if not CASES[case].per_dataset:
+                        continue
+                    entry = {"case": case, "dataset": kind, "rows": rows, "bytes": size}
+                    results.append(entry)
+                    measure(entry, case, path, has_display)
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# ---------------------------
+# Comparing
+# ---------------------------
+def compare_results(old: dict, new: dict, threshold: float = DEFAULT_THRESHOLD, report=print) -> int:
+    """
+    Print new vs old for every (case, dataset, rows) measured in both;
+    returns the number of regressions (slower by more than `threshold`
+    and the noise floor, or a higher peak RSS by more than `threshold`).
+    """
+    def key(entry):
+        return entry["case"], entry["dataset"], entry["rows"]
+
+    baseline = {key(e): e for e in old.get("results", []) if "seconds" in e}
+    report(f"baseline {old.get('meta', {}).get('commit')} -> {new.get('meta', {}).get('commit')}")
+    regressions = 0
+    for entry in new.get("results", []):
+        before = baseline.get(key(entry))
+        if before is None or "seconds" not in entry:
+            continue
+        ratio = entry["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        slower = ratio > 1 + threshold and entry["seconds"] - before["seconds"] > NOISE_FLOOR_SECONDS
+        bigger = (
+            entry.get("peak_rss") is not None and before.get("peak_rss")
+            and entry["peak_rss"] > before["peak_rss"] * (1 + threshold)
+        )
+        flag = "REGRESSION" if slower or bigger else ""
+        regressions += bool(flag)
+        line = (
+            f"{entry['case']:<14} {entry['dataset']:<10} {entry['rows']:>10,}  "
+            f"{before['seconds']:8.3f}s -> {entry['seconds']:8.3f}s ({ratio:5.2f}x)  "
+            f"peak {_mb(before.get('peak_rss'))} -> {_mb(entry.get('peak_rss'))}  {flag}"
+        )
+        report(line.rstrip())
+    return regressions
+
+
+def _load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------
+# Command line
+# ---------------------------
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py bench",
+        description="Time loading, normalizing, bulk editing and saving on synthetic CSV files.",
+    )
+    parser.add_argument(
+        "--kinds", default=",".join(GENERATORS),
+        help=f"datasets to generate (default: all of {', '.join(GENERATORS)})",
+    )
+    parser.add_argument(
+        "--sizes", default=DEFAULT_SIZES,
+        help=f"rows per dataset, e.g. 10k,100k,1m,10m (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--cases", default=",".join(CASES),
+        help=f"what to time (default: all of {', '.join(CASES)})",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per case, best one counts")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated files are kept")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="results file (JSON)")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"),
+        help="only compare two results files, without running anything",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD * 100,
+        help="percent slower (or more memory) that counts as a regression (default: %(default)s)",
+    )
+    return parser, parser.parse_args(argv)
+
+
+def run_bench_cli(argv) -> int:
+    """
+    `python main.py bench [...]`: run the benchmarks and write the results
+    file, or compare two results files. Returns 1 if a comparison found
+    regressions (or a case failed), else 0.
+    """
+    parser, args = _parse_args(argv)
+    threshold = args.threshold / 100
+    if args.compare:
+        old, new = (_load_results(p) for p in args.compare)
+        return 1 if compare_results(old, new, threshold) else 0
+
+    try:
+        kinds = _split_names(args.kinds, list(GENERATORS), "dataset kind")
+        cases = _split_names(args.cases, list(CASES), "case")
+        sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    document = run_benchmarks(kinds, sizes, cases, repeat=args.repeat, data_dir=args.data_dir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"results written to {args.output}")
+
+    failed = sum(1 for e in document["results"] if "error" in e)
+    regressions = 0
+    if args.baseline:
+        regressions = compare_results(_load_results(args.baseline), document, threshold)
+    return 1 if failed or regressions else 0
@@ -1,6 +1,187 @@
-# main.py
-from ui.main_window import run_app
-
-if __name__ == "__main__":
-    run_app()
-    
+# main.py
+import time
+
+_STARTED = time.perf_counter()  # for the startup times (--startup-time)
+
+import argparse
+import sys
+
+
+def _parse_batch_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Apply the same updates to many CSV/Excel files, without the GUI.",
+    )
+    parser.add_argument("files", nargs="+", help="CSV, .xlsx or .xlsm files to update")
+    parser.add_argument(
+        "--set", dest="sets", action="append", default=[], metavar="CELL=VALUE",
+        help="set a cell, e.g. --set B3=done (repeatable)",
+    )
+    parser.add_argument(
+        "--replace", nargs=2, action="append", default=[], metavar=("OLD", "NEW"),
+        help="replace text in every cell (repeatable; runs before --set)",
+    )
+    parser.add_argument("--sheet", help="worksheet to update in Excel files (default: the first)")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="worker processes (default: one per CPU)",
+    )
+    return parser, parser.parse_args(argv)
+
+
+def run_batch_cli(argv) -> int:
+    """
+    Headless entry point: `python main.py batch FILES... [--set ...] [--replace ...]`.
+    Prints one line per file with its timing; returns 1 if any file failed.
+    """
+    # services only: no tkinter import, so this runs without a display
+    from services.batch_service import ReplaceText, SetCell, parse_cell_ref, run_batch
+
+    parser, args = _parse_batch_args(argv)
+    ops = [ReplaceText(old, new) for old, new in args.replace]
+    for item in args.sets:
+        ref, sep, value = item.partition("=")
+        try:
+            if not sep:
+                raise ValueError(f"Expected CELL=VALUE, got {item!r}")
+            row, col = parse_cell_ref(ref)
+        except ValueError as e:
+            parser.error(str(e))
+        ops.append(SetCell(row, col, value))
+    if not ops:
+        parser.error("nothing to do: give at least one --set or --replace")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    files = list(dict.fromkeys(args.files))
+
+    def report(result):
+        if result.ok:
+            print(f"OK    {result.seconds:8.3f}s  {result.cells_changed:>8,} cells  {result.path}", flush=True)
+        else:
+            print(f"FAIL  {result.seconds:8.3f}s  {result.path}: {result.error}", flush=True)
+
+    start = time.perf_counter()
+    results = run_batch(files, ops, sheet_name=args.sheet, workers=args.workers, on_result=report)
+    failed = sum(1 for r in results if not r.ok)
+    print(
+        f"{len(results)} file(s), {failed} failed, "
+        f"{sum(r.cells_changed for r in results):,} cells changed in {time.perf_counter() - start:.2f}s"
+    )
+    return 1 if failed else 0
+
+
+def run_diff_cli(argv) -> int:
+    """
+    Headless entry point: `python main.py diff OLD.csv NEW.csv [--key A,C]`.
+    Prints the changed rows (1-based, like the table) and a summary;
+    returns 1 if the files differ, 2 if a key column is missing.
+    """
+    from services.bulk_service import index_to_col_name, parse_columns
+    from services.diff_service import csv_rows, diff_tables
+
+    parser = argparse.ArgumentParser(prog="main.py diff", description="Show what changed between two CSV files.")
+    parser.add_argument("old", help="the earlier version")
+    parser.add_argument("new", help="the later version")
+    parser.add_argument("--key", default="", help="match rows by these columns, e.g. A or A,C (default: whole rows)")
+    parser.add_argument("--limit", type=int, default=50, help="changed rows listed per kind (default: 50)")
+    args = parser.parse_args(argv)
+    try:
+        key_columns = parse_columns(args.key)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    try:
+        diff = diff_tables(csv_rows(args.old), csv_rows(args.new), key_columns)
+    except ValueError as e:
+        print(f"FAIL  {e}")
+        return 2
+    for r in diff.inserted[: args.limit].tolist():
+        print(f"+ row {r + 1}")
+    for r in diff.deleted[: args.limit].tolist():
+        print(f"- row {r + 1}")
+    for old, new in diff.modified[: args.limit].tolist():
+        columns = diff.cells.get(new)
+        cells = ", ".join(index_to_col_name(c) for c in columns) if columns is not None else "?"
+        print(f"~ row {old + 1} -> {new + 1}: {cells}")
+    print(f"{diff.summary()} in {time.perf_counter() - start:.2f}s")
+    return 1 if diff.changed else 0
+
+
+def run_upsert_cli(argv) -> int:
+    """
+    Headless entry point: `python main.py upsert MASTER.csv INPUT.csv --key A`.
+    Matching master rows take the input's values, new keys are appended;
+    the master is rewritten atomically (or written to -o). Prints the
+    summary; --dry-run only prints it.
+    """
+    from services.bulk_service import parse_columns
+    from services.csv_service import codec_for_save, read_sample, sniff_dialect, write_csv_atomic
+    from services.upsert_service import (
+        DUPLICATE_INPUT, DUPLICATE_MASTER, ON_MATCH, UpsertRules, apply_plan, plan_upsert, read_csv_table,
+    )
+
+    def option(values):
+        return [v.replace(" ", "-") for v in values]
+
+    parser = argparse.ArgumentParser(prog="main.py upsert", description="Update a master CSV from an input CSV by key.")
+    parser.add_argument("master", help="the CSV file to update")
+    parser.add_argument("input", help="the CSV file with the new values")
+    parser.add_argument("--key", required=True, help="master key column(s), e.g. A or A,C")
+    parser.add_argument("--input-key", help="the input's key column(s) (default: same header name / position)")
+    parser.add_argument("--no-header", action="store_true", help="no header rows: columns match by position")
+    parser.add_argument("--on-match", choices=option(ON_MATCH), default="overwrite")
+    parser.add_argument("--duplicates", choices=option(DUPLICATE_INPUT), default="last-wins", help="duplicate input keys")
+    parser.add_argument("--master-duplicates", choices=option(DUPLICATE_MASTER), default="update-all")
+    parser.add_argument("--clear-with-empty", action="store_true", help="empty input cells clear master cells")
+    parser.add_argument("--no-insert", action="store_true", help="don't append rows with new keys")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+    parser.add_argument("-o", "--output", help="write the result here instead of over the master")
+    args = parser.parse_args(argv)
+    try:
+        rules = UpsertRules(
+            key_columns=tuple(parse_columns(args.key)),
+            input_key_columns=tuple(parse_columns(args.input_key)) if args.input_key else None,
+            header=not args.no_header,
+            on_match=args.on_match.replace("-", " "),
+            clear_with_empty=args.clear_with_empty,
+            insert_new=not args.no_insert,
+            duplicate_input=args.duplicates.replace("-", " "),
+            duplicate_master=args.master_duplicates.replace("-", " "),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    dialect = sniff_dialect(read_sample(args.master))
+    master = read_csv_table(args.master, dialect=dialect)
+    try:
+        plan = plan_upsert(master, read_csv_table(args.input), rules)
+    except ValueError as e:
+        print(f"FAIL  {e}")
+        return 1
+    print(plan.summary())
+    if not args.dry_run and (not plan.empty or args.output):
+        apply_plan(master, plan)
+        output = args.output or args.master
+        write_csv_atomic(output, master.iter_rows(), delimiter=dialect.delimiter, codec=codec_for_save(output))
+    print(f"{'Dry run' if args.dry_run else 'Done'} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(run_batch_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "diff":
+        sys.exit(run_diff_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "upsert":
+        sys.exit(run_upsert_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # synthetic-data benchmarks, headless (Tk cases only with a display)
+        from benchmarks.runner import run_bench_cli
+        sys.exit(run_bench_cli(sys.argv[2:]))
+
+    # --startup-time: print import / first-frame / ready times and exit
+    from ui.main_window import run_app
+    run_app(started=_STARTED, report_startup="--startup-time" in sys.argv[1:])
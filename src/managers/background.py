@@ -0,0 +1,132 @@
+# src/managers/background.py
+import contextlib
+import queue
+import threading
+import time
+
+
+class BackgroundJob:
+    """
+    Run `work(job)` on a worker thread and hand its results back to Tk.
+
+    - the worker calls job.emit(item) for every partial result (e.g. a row batch)
+    - the Tk side polls with widget.after() and calls on_item(item) per result
+    - on_done(result) / on_error(exc) / on_cancel() run on the Tk thread
+    - cancel() only sets a flag; the worker checks job.cancelled between steps
+
+    Tk widgets must never be touched from `work`; everything UI-related
+    happens in the callbacks.
+
+    `trace` (a services.perf_service operation) is activated in the worker
+    and around every callback, so phases timed anywhere below are
+    attributed to it.
+    """
+
+    def __init__(
+        self,
+        widget,
+        work,
+        on_item=None,
+        on_done=None,
+        on_error=None,
+        on_cancel=None,
+        poll_ms: int = 30,
+        budget_ms: int = 40,
+        max_pending: int = 8,
+        trace=None,
+    ):
+        self.widget = widget
+        self.work = work
+        self.on_item = on_item
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self.budget_ms = budget_ms
+        self.trace = trace
+
+        # bounded queue -> the worker waits instead of piling up batches
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._result = None
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+        self._after_id = None
+        self.done = False
+
+    # ---------------------------
+    # Worker side
+    # ---------------------------
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def emit(self, item) -> bool:
+        """
+        Push one partial result to the UI. Blocks while the queue is full.
+        Returns False if the job was cancelled in the meantime.
+        """
+        while not self._cancel.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            with self._activated():
+                self._result = self.work(self)
+        except BaseException as e:  # reported on the Tk thread
+            self._error = e
+        finally:
+            self._finished.set()
+
+    # ---------------------------
+    # Tk side
+    # ---------------------------
+    def start(self) -> "BackgroundJob":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._after_id = self.widget.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _poll(self):
+        self._after_id = None
+        deadline = time.perf_counter() + self.budget_ms / 1000.0
+
+        # drain as many items as fit into this tick's time budget
+        while time.perf_counter() < deadline:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.on_item is not None and not self._cancel.is_set():
+                with self._activated():
+                    self.on_item(item)
+
+        if self._finished.is_set() and self._queue.empty():
+            self._finish()
+            return
+
+        self._after_id = self.widget.after(self.poll_ms, self._poll)
+
+    def _activated(self):
+        return self.trace.activate() if self.trace is not None else contextlib.nullcontext()
+
+    def _finish(self):
+        self.done = True
+        with self._activated():
+            if self._cancel.is_set():
+                if self.on_cancel is not None:
+                    self.on_cancel()
+            elif self._error is not None:
+                if self.on_error is not None:
+                    self.on_error(self._error)
+            elif self.on_done is not None:
+                self.on_done(self._result)
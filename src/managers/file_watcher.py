@@ -0,0 +1,61 @@
+# src/managers/file_watcher.py
+import os
+
+# How often the watched file is stat()ed
+WATCH_INTERVAL_MS = 500
+
+
+class FileWatcher:
+    """
+    Poll one file's size and mtime with widget.after() and call
+    on_change(path) on the Tk thread when they differ from what was seen
+    last.
+
+    - watch(path) (re)starts watching and takes the file as it is now as
+      the baseline; stop() ends it
+    - on_change returns False if it can't deal with the change right now
+      (e.g. a load is running): it is called again on the next poll
+
+    A stat() every half second costs next to nothing, so there is no
+    inotify / FSEvents dependency; what changed is for on_change to find
+    out (see services.csv_service.check_file_tail).
+    """
+
+    def __init__(self, widget, on_change, interval_ms: int = WATCH_INTERVAL_MS):
+        self.widget = widget
+        self.on_change = on_change
+        self.interval_ms = interval_ms
+        self.path: str | None = None
+        self._seen = None
+        self._after_id = None
+
+    def watch(self, path: str):
+        self.stop()
+        self.path = path
+        self._seen = self._stat()
+        self._after_id = self.widget.after(self.interval_ms, self._poll)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.path = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _poll(self):
+        self._after_id = None
+        path = self.path
+        seen = self._stat()
+        if seen != self._seen:
+            previous, self._seen = self._seen, seen
+            if self.on_change(path) is False:
+                self._seen = previous  # not handled: report it again
+        # on_change may have restarted or stopped watching
+        if self.path == path and self._after_id is None:
+            self._after_id = self.widget.after(self.interval_ms, self._poll)
@@ -1,4 +1,12 @@
 # task_scheduler/ui/hotkeys.py
+import tkinter as tk
+
+
+def _in_text_field(event) -> bool:
+    # the search entry or tksheet's cell editor: bind_all handlers run
+    # after the widget's own bindings, so those have handled the key already
+    return event is not None and isinstance(event.widget, (tk.Entry, tk.Text))
+
 
 def register_hotkeys(app: "CsvViewerApp"):
     """
@@ -10,6 +18,12 @@ def register_hotkeys(app: "CsvViewerApp"):
     - Esc    : Exit application
     - F1     : Help / About
     - F5     : Refresh CSV
+    - Ctrl+F : Search
+    - F3 / Shift+F3 : Next / previous match
+    - F8 / Shift+F8 : Next / previous change (after a compare)
+    - Ctrl+Z : Undo
+    - Ctrl+Y / Ctrl+Shift+Z : Redo
+      (table undo / redo; left to the widget while typing in a text field)
     """
 
     # --- Handlers ---
@@ -50,6 +64,45 @@ def register_hotkeys(app: "CsvViewerApp"):
     
     
 
+    def _on_ctrl_f(event=None):
+        if hasattr(app, "csv_panel"):
+            app.csv_panel.focus_search()
+        return "break"
+
+    def _on_f3(event=None):
+        if hasattr(app, "csv_panel"):
+            app.csv_panel.find_next()
+        return "break"
+
+    def _on_shift_f3(event=None):
+        if hasattr(app, "csv_panel"):
+            app.csv_panel.find_next(backwards=True)
+        return "break"
+
+    def _on_f8(event=None):
+        if hasattr(app, "csv_panel"):
+            app.csv_panel.next_change()
+        return "break"
+
+    def _on_shift_f8(event=None):
+        if hasattr(app, "csv_panel"):
+            app.csv_panel.next_change(backwards=True)
+        return "break"
+
+    def _on_ctrl_z(event=None):
+        if _in_text_field(event):
+            return None
+        if hasattr(app, "undo"):
+            app.undo()
+        return "break"
+
+    def _on_ctrl_y(event=None):
+        if _in_text_field(event):
+            return None
+        if hasattr(app, "redo"):
+            app.redo()
+        return "break"
+
     # --- Bindings ---
     #
     # --- Bindings (global) ---
@@ -62,6 +115,19 @@ def register_hotkeys(app: "CsvViewerApp"):
     app.bind_all("<Control-s>", _on_ctrl_s)
     app.bind_all("<Control-S>", _on_ctrl_s)
 
+    app.bind_all("<Control-f>", _on_ctrl_f)
+    app.bind_all("<Control-F>", _on_ctrl_f)
+
+    app.bind_all("<Control-z>", _on_ctrl_z)
+    app.bind_all("<Control-Z>", _on_ctrl_y)  # Ctrl+Shift+Z
+    app.bind_all("<Control-y>", _on_ctrl_y)
+    app.bind_all("<Control-Y>", _on_ctrl_y)
+
+    app.bind_all("<F3>", _on_f3)
+    app.bind_all("<Shift-F3>", _on_shift_f3)
+    app.bind_all("<F8>", _on_f8)
+    app.bind_all("<Shift-F8>", _on_shift_f8)
+
     app.bind_all("<Escape>", _on_escape)
     app.bind_all("<F1>", _on_f1)
-    app.bind_all("<F1>", _on_f5)
\ No newline at end of file
+    app.bind_all("<F5>", _on_f5)
\ No newline at end of file
@@ -1,6 +1,9 @@
 # settings_manager.py
+import copy
 import json
 import os
+import tempfile
+import threading
 
 # Adjust this if your settings.json is somewhere else
 
@@ -19,10 +22,26 @@ SETTINGS_FILE = os.path.join(CONFIG_DIR, "settings.json")
 
 MAX_RECENT = 5
 
+# memory for the undo history before older steps move to a temp file
+DEFAULT_UNDO_MEMORY_MB = 64
+
+# Changes are written this long after the last one (many changes in a row
+# -> one write)
+FLUSH_DELAY_S = 1.0
+
+# Per-project view state kept for this many projects (least recently used
+# dropped first)
+MAX_PROJECT_STATES = 50
+
 
 def _default_settings() -> dict:
     return {
-        "recent_projects": []  # list of paths (strings)
+        "recent_projects": [],  # list of paths (strings)
+        "undo_memory_mb": DEFAULT_UNDO_MEMORY_MB,
+        "perf_trace": False,  # time file actions (View > Performance Trace)
+        "watch_file": False,  # follow the open CSV on disk (CSV > Watch File)
+        "table_cache_mb": 1024,  # preloaded project tabs kept in memory
+        "projects": {},  # project path -> state (see SettingsStore.project_state)
     }
 
 
@@ -38,8 +57,9 @@ def load_settings() -> dict:
             data = json.load(f)
         if not isinstance(data, dict):
             return _default_settings()
-        # Ensure key exists
-        data.setdefault("recent_projects", [])
+        # Ensure keys exist
+        for key, value in _default_settings().items():
+            data.setdefault(key, value)
         return data
     except Exception:
         # Corrupted / unreadable file -> fall back
@@ -48,25 +68,115 @@ def load_settings() -> dict:
 
 def save_settings(settings: dict) -> None:
     """
-    Save the settings dict to settings.json.
+    Save the settings dict to settings.json, atomically: a temp file in
+    the same folder replaces it, so a crash never leaves half a file.
     """
     os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(settings, f, indent=4)
+    fd, tmp = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=os.path.dirname(SETTINGS_FILE))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, SETTINGS_FILE)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
 
 
-def add_recent_project(path: str) -> dict:
-    """
-    Insert a project path at the top of recent_projects (no duplicates, max 5).
-    Returns the updated settings dict.
+def _project_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class SettingsStore:
     """
-    settings = load_settings()
-    recent = settings.get("recent_projects", [])
+    settings.json, read once and kept in memory.
 
-    # Remove if already exists, then insert at front
-    recent = [p for p in recent if p != path]
-    recent.insert(0, path)
-    settings["recent_projects"] = recent[:MAX_RECENT]
+    - store[key] / store.get(key) read from memory
+    - set(key, value), add_recent_project(), set_project_state() change
+      memory and schedule a write FLUSH_DELAY_S later; more changes in
+      the meantime are written together
+    - flush() writes pending changes now (call it before exiting)
+
+    Per-project state (project_state / set_project_state) remembers a
+    project's view between sessions: column widths, scroll position,
+    parser backend and the sniffed CSV dialect.
+    """
 
-    save_settings(settings)
-    return settings
+    def __init__(self, delay: float = FLUSH_DELAY_S):
+        self.delay = delay
+        self._data = load_settings()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # one write at a time, in order
+        self._timer: threading.Timer | None = None
+        self._dirty = False
+
+    def __getitem__(self, key: str):
+        return self._data[key]
+
+    def get(self, key: str, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = value
+        self._changed()
+
+    def add_recent_project(self, path: str):
+        """Put a project path at the top of recent_projects (no duplicates, max 5)."""
+        with self._lock:
+            recent = [p for p in self._data["recent_projects"] if p != path]
+            recent.insert(0, path)
+            self._data["recent_projects"] = recent[:MAX_RECENT]
+        self._changed()
+
+    # ---------------------------
+    # Per-project state
+    # ---------------------------
+    def project_state(self, project_path: str) -> dict:
+        """A copy of the remembered state of a project ({} if none)."""
+        with self._lock:
+            return copy.deepcopy(self._data["projects"].get(_project_key(project_path), {}))
+
+    def set_project_state(self, project_path: str, **values):
+        """Merge values into a project's state (None removes a key)."""
+        key = _project_key(project_path)
+        with self._lock:
+            projects = self._data["projects"]
+            state = projects.pop(key, {})  # re-inserted last = most recently used
+            state.update(values)
+            projects[key] = {k: v for k, v in state.items() if v is not None}
+            while len(projects) > MAX_PROJECT_STATES:
+                projects.pop(next(iter(projects)))
+        self._changed()
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def _changed(self):
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes to settings.json now (no-op if there are none)."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                data = copy.deepcopy(self._data)
+                self._dirty = False
+            try:
+                save_settings(data)
+            except OSError as e:
+                print(f"Failed to save settings: {e}")
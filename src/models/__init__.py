@@ -0,0 +1 @@
+# src/models/__init__.py
@@ -0,0 +1,303 @@
+# src/models/compact_table.py
+import sys
+import threading
+from array import array
+from typing import Iterable, Iterator, List
+
+try:  # optional: vectorized bulk writes (set_column)
+    import numpy as _np
+except ImportError:  # pragma: no cover - numpy ships with pandas
+    _np = None
+
+
+# Code widths, in order. A column starts with 1-byte codes and is widened
+# once its dictionary outgrows the current type.
+_CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32))
+
+# Per distinct value: a list slot plus a dict entry (memory_bytes estimate)
+_DICT_ENTRY_BYTES = 8 + 40
+
+
+class _Column:
+    """
+    One dictionary-encoded column.
+
+    - values: distinct cell values (interned); code 0 is always ""
+    - lookup: value -> code
+    - codes: one small integer per row, only as long as the last row that
+      actually reaches this column (rows that are too short are not stored)
+    """
+
+    __slots__ = ("values", "lookup", "codes", "_type_idx")
+
+    def __init__(self):
+        self.values: List[str] = [""]
+        self.lookup: dict[str, int] = {"": 0}
+        self._type_idx = 0
+        self.codes = array(_CODE_TYPES[0][0])
+
+    def encode(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= _CODE_TYPES[self._type_idx][1]:
+                self._widen()
+            value = sys.intern(value)
+            self.values.append(value)
+            self.lookup[value] = code
+        return code
+
+    def _widen(self):
+        self._type_idx += 1
+        self.codes = array(_CODE_TYPES[self._type_idx][0], self.codes)
+
+    def set(self, r: int, value: str):
+        code = self.encode(value)
+        codes = self.codes
+        if r < len(codes):
+            codes[r] = code
+            return
+        if r > len(codes):
+            # rows in between don't reach this column -> placeholder code 0
+            codes.frombytes(bytes((r - len(codes)) * codes.itemsize))
+        codes.append(code)
+
+    def get(self, r: int) -> str:
+        codes = self.codes
+        return self.values[codes[r]] if r < len(codes) else ""
+
+    # pickled without the lookup (rebuilt on load): chunks parsed in worker
+    # processes travel back smaller
+    def __getstate__(self):
+        return self.values, self.codes, self._type_idx
+
+    def __setstate__(self, state):
+        self.values, self.codes, self._type_idx = state
+        self.lookup = dict(zip(self.values, range(len(self.values))))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.codes) * self.codes.itemsize
+
+
+class CompactTable:
+    """
+    In-memory table for big, repetitive CSV data (e.g. cells like "*", "**").
+
+    Instead of list[list[str]] every column is dictionary-encoded: each
+    distinct value is stored once (interned) and cells are 1-4 byte codes
+    in an array. Ragged rows are not padded: each row keeps its own length
+    and columns only store codes as far as the rows that reach them.
+
+    Implements the model interface used by CsvTablePanel.load_model
+    (num_rows, num_cols, get_rows, iter_rows, set_cell, close).
+    Appending (e.g. from a loader thread) and reading are guarded by a lock.
+    """
+
+    def __init__(self):
+        self.columns: List[_Column] = []
+        self.row_lengths = array("I")
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List[str]]) -> "CompactTable":
+        table = cls()
+        table.append_rows(rows)
+        return table
+
+    @classmethod
+    def from_column_codes(cls, columns, num_rows: int) -> "CompactTable":
+        """
+        Build a table from per-column (uniques, codes) pairs, codes[r]
+        indexing uniques for every row (e.g. pandas.factorize output).
+        All rows get the full width. Needs numpy.
+        """
+        table = cls()
+        for uniques, codes in columns:
+            col = _Column()
+            mapped = [col.encode(v) for v in uniques]  # may widen col.codes
+            lookup = _np.asarray(mapped, dtype=col.codes.typecode)
+            col.codes.frombytes(lookup[_np.asarray(codes)].tobytes())
+            table.columns.append(col)
+        table.row_lengths.frombytes(_np.full(num_rows, len(columns), dtype=_np.uint32).tobytes())
+        return table
+
+    # ---------------------------
+    # Shape
+    # ---------------------------
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_lengths)
+
+    @property
+    def num_cols(self) -> int:
+        return len(self.columns)
+
+    def nbytes(self) -> int:
+        """Approximate size of the code buffers (dictionaries not included)."""
+        return len(self.row_lengths) * self.row_lengths.itemsize + sum(
+            col.nbytes for col in self.columns
+        )
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated memory of the whole table: code buffers plus the
+        dictionaries (each distinct value as a str object, its list slot
+        and its lookup entry).
+        """
+        total = self.nbytes()
+        for col in self.columns:
+            total += sum(sys.getsizeof(v) for v in col.values) + len(col.values) * _DICT_ENTRY_BYTES
+        return total
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def append_rows(self, rows: Iterable[List[str]]):
+        with self._lock:
+            columns = self.columns
+            for row in rows:
+                r = len(self.row_lengths)
+                n = len(row)
+                while len(columns) < n:
+                    columns.append(_Column())
+                for c in range(n):
+                    columns[c].set(r, row[c])
+                # publish the row only once all its cells are stored
+                self.row_lengths.append(n)
+
+    def append_table(self, other: "CompactTable"):
+        """
+        Append all rows of another CompactTable (e.g. a chunk encoded in a
+        worker process): each distinct value is re-encoded once, the codes
+        are remapped per column (vectorized with numpy).
+        """
+        with self._lock:
+            base = len(self.row_lengths)
+            columns = self.columns
+            while len(columns) < len(other.columns):
+                columns.append(_Column())
+            for col, theirs in zip(columns, other.columns):
+                if not len(theirs.codes):
+                    continue
+                mapped = [col.encode(v) for v in theirs.values]  # may widen col.codes
+                codes = col.codes
+                if len(codes) < base:
+                    codes.frombytes(bytes((base - len(codes)) * codes.itemsize))
+                if _np is None:
+                    codes.extend(mapped[k] for k in theirs.codes)
+                else:
+                    table = _np.asarray(mapped, dtype=codes.typecode)
+                    codes.frombytes(table[_np.frombuffer(theirs.codes, dtype=theirs.codes.typecode)].tobytes())
+            # publish the rows only once all their cells are stored
+            self.row_lengths.extend(other.row_lengths)
+
+    def truncate(self, num_rows: int):
+        """Drop the rows from num_rows on (undo of appended rows)."""
+        with self._lock:
+            del self.row_lengths[num_rows:]
+            for col in self.columns:
+                del col.codes[num_rows:]
+
+    def set_cell(self, r: int, c: int, value: str):
+        with self._lock:
+            while len(self.columns) <= c:
+                self.columns.append(_Column())
+            self.columns[c].set(r, value)
+            if c >= self.row_lengths[r]:
+                self.row_lengths[r] = c + 1
+
+    def set_column(self, c: int, rows, uniques, codes):
+        """
+        Bulk write of column c: row rows[i] becomes uniques[codes[i]]
+        (rows sorted, as in services.bulk_service.ColumnChanges).
+        Each distinct value is encoded once; with numpy the codes are
+        written in one vectorized assignment.
+        """
+        with self._lock:
+            while len(self.columns) <= c:
+                self.columns.append(_Column())
+            col = self.columns[c]
+            mapped = [col.encode(v) for v in uniques]  # may widen col.codes
+            if not len(rows):
+                return
+
+            if _np is None:
+                for r, k in zip(rows, codes):
+                    col.set(int(r), uniques[k])
+                    if c >= self.row_lengths[r]:
+                        self.row_lengths[r] = c + 1
+                return
+
+            last = int(rows[-1])
+            if last >= len(col.codes):
+                col.codes.frombytes(bytes((last + 1 - len(col.codes)) * col.codes.itemsize))
+            # numpy views share the arrays' memory; they must be gone before
+            # the arrays are resized again
+            view = _np.asarray(memoryview(col.codes))
+            view[rows] = _np.asarray(mapped, dtype=view.dtype)[codes]
+            lengths = _np.asarray(memoryview(self.row_lengths))
+            lengths[rows] = _np.maximum(lengths[rows], c + 1)
+            del view, lengths
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def get_cell(self, r: int, c: int) -> str:
+        if c >= self.row_lengths[r]:
+            return ""
+        return self.columns[c].get(r)
+
+    def get_row(self, r: int) -> List[str]:
+        """Row r as a fresh list, with its original (unpadded) length."""
+        columns = self.columns
+        return [columns[c].get(r) for c in range(self.row_lengths[r])]
+
+    def get_rows(self, start: int, stop: int) -> List[List[str]]:
+        with self._lock:
+            stop = min(stop, self.num_rows)
+            return [self.get_row(r) for r in range(max(start, 0), stop)]
+
+    def iter_rows(self, chunk_rows: int = 5000) -> Iterator[List[str]]:
+        """Stream all rows; the lock is only held while a chunk is decoded."""
+        start = 0
+        while start < self.num_rows:
+            rows = self.get_rows(start, start + chunk_rows)
+            yield from rows
+            start += len(rows)
+
+    def column_codes(self, c: int) -> tuple[List[str], array]:
+        """
+        (values, codes) of column c for vectorized consumers; e.g.
+        numpy.frombuffer(codes, dtype=codes.typecode) gives a zero-copy view.
+        Rows beyond len(codes) don't reach the column.
+        """
+        col = self.columns[c]
+        return col.values, col.codes
+
+    def snapshot(self) -> "CompactTable":
+        """
+        Independent copy for background saving. Only the code buffers are
+        copied (one memcpy per column); later edits don't affect it.
+        """
+        with self._lock:
+            snap = CompactTable()
+            snap.row_lengths = self.row_lengths[:]
+            for col in self.columns:
+                copy = _Column.__new__(_Column)
+                copy.values = list(col.values)
+                copy.lookup = dict(col.lookup)
+                copy.codes = col.codes[:]
+                copy._type_idx = col._type_idx
+                snap.columns.append(copy)
+            return snap
+
+    def __getstate__(self):
+        return self.columns, self.row_lengths
+
+    def __setstate__(self, state):
+        self.columns, self.row_lengths = state
+        self._lock = threading.RLock()
+
+    def close(self):
+        """Nothing to release; present for the model interface."""
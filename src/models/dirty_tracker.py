@@ -0,0 +1,152 @@
+# src/models/dirty_tracker.py
+import os
+from typing import Iterable, NamedTuple
+
+# Bulk edits touching more cells than this aren't tracked cell by cell;
+# a partial save wouldn't pay off anyway, so the table just needs a full
+# rewrite (tracked like a structural change).
+BULK_TRACK_LIMIT = 200_000
+
+
+class SourceFile(NamedTuple):
+    """
+    The CSV file a table was loaded from, as it was at load time.
+    Used to make sure byte ranges copied from it are still valid.
+    codec: its compression (None: plain text; a compressed file has no
+    byte ranges to copy). quotechar: the quote character it was parsed
+    with (rows re-encoded by a partial save are quoted with '"').
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    delimiter: str
+    encoding: str = "utf-8"
+    codec: str | None = None
+    quotechar: str = '"'
+
+    @classmethod
+    def stat(
+        cls,
+        path: str,
+        delimiter: str,
+        encoding: str = "utf-8",
+        codec: str | None = None,
+        quotechar: str = '"',
+    ) -> "SourceFile":
+        st = os.stat(path)
+        return cls(path, st.st_size, st.st_mtime_ns, delimiter, encoding, codec, quotechar)
+
+    def unchanged(self) -> bool:
+        """True if the file on disk still has the same size and mtime."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+
+class DirtyTracker:
+    """
+    Remembers what changed in a table since it was loaded (or last saved).
+
+    - dirty_cells / dirty_rows: edited cells of rows that exist in the file
+    - rows past `loaded_rows` are appended rows
+    - structural: rows/columns were inserted, deleted or moved in the
+      middle; a partial save is no longer possible
+    - version: bumped by every edit (and reset), so a background job that
+      worked on a snapshot can tell whether the table still matches it
+    """
+
+    def __init__(self):
+        self.source: SourceFile | None = None
+        self.generation = 0
+        self.version = 0
+        self.reset(0)
+
+    def reset(self, loaded_rows: int, source: SourceFile | None = None):
+        # bumped on every reset, so a save that finishes late can tell
+        # whether the table it saved is still the one being tracked
+        self.generation += 1
+        self.touch()
+        self.loaded_rows = loaded_rows
+        self.source = source
+        self.dirty_cells: set[tuple[int, int]] = set()
+        self.dirty_rows: set[int] = set()
+        self.structural = False
+
+    @property
+    def is_clean(self) -> bool:
+        return not self.dirty_rows and not self.structural
+
+    def touch(self):
+        """The table was edited (see version); the mark_* methods call this."""
+        self.version += 1
+
+    def mark_cells(self, cells: Iterable[tuple[int, int]]):
+        self.touch()
+        for r, c in cells:
+            if r < self.loaded_rows:
+                self.dirty_cells.add((r, c))
+                self.dirty_rows.add(r)
+
+    def mark_columns(self, changes: Iterable[tuple[int, Iterable[int]]], count: int):
+        """
+        Bulk edit: (column, rows) pairs touching `count` cells in total.
+        Beyond BULK_TRACK_LIMIT cells only a full rewrite is remembered.
+        """
+        self.touch()
+        if count > BULK_TRACK_LIMIT:
+            self.structural = True
+            return
+        for c, rows in changes:
+            self.mark_cells((r, c) for r in rows)
+
+    def rows_added(self, rows: Iterable[int]):
+        """
+        Rows were inserted at data indexes `rows`.
+        Only inserts after the loaded rows keep the file layout.
+        """
+        self.touch()
+        if any(r < self.loaded_rows for r in rows):
+            self.structural = True
+
+    def mark_structural(self):
+        self.touch()
+        self.structural = True
+
+    def file_grew(self, rows: int, source: SourceFile):
+        """
+        `rows` records appended to the file itself were added after the
+        loaded rows (tail refresh): they are part of the file, not edits.
+        """
+        self.touch()
+        self.loaded_rows += rows
+        self.source = source
+
+    # ---------------------------
+    # Background saves
+    # ---------------------------
+    def detach(self, snapshot_rows: int) -> "DirtyTracker":
+        """
+        A save of a `snapshot_rows` rows snapshot starts: hand the current
+        changes over to it and track edits made meanwhile from scratch.
+        """
+        pending = DirtyTracker()
+        pending.__dict__.update(self.__dict__)
+        self.reset(snapshot_rows)
+        return pending
+
+    def saved(self, source: SourceFile):
+        """The save finished; the snapshot is now the file on disk."""
+        self.source = source
+
+    def merge_back(self, pending: "DirtyTracker"):
+        """The save failed or was cancelled: restore the handed-over changes."""
+        loaded = pending.loaded_rows
+        self.dirty_cells = {
+            (r, c) for r, c in self.dirty_cells | pending.dirty_cells if r < loaded
+        }
+        self.dirty_rows = {r for r, _ in self.dirty_cells}
+        self.structural = self.structural or pending.structural
+        self.loaded_rows = loaded
+        self.source = pending.source
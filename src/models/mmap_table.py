@@ -0,0 +1,250 @@
+# src/models/mmap_table.py
+import csv
+import io
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterator, List
+
+from services.csv_service import (
+    INDEX_CHUNK_SIZE,
+    read_sample,
+    scan_record_offsets,
+    sniff_dialect,
+)
+
+# Rows parsed together and cached as one block
+BLOCK_ROWS = 1000
+MAX_CACHED_BLOCKS = 16
+
+
+class MmapCsvTable:
+    """
+    Disk-backed CSV table for files too big to keep in memory.
+
+    - the file is memory-mapped; nothing is parsed up front
+    - build_index() records the byte offset of every row (array of uint64)
+    - get_rows(start, stop) parses only the blocks covering that range
+      (a small LRU keeps the last few blocks around while scrolling)
+    - edited rows live in an overlay dict; the file itself is never touched
+    - delimiter / quotechar: sniffed unless given; the row index and the
+      parser both honour the quote character
+    """
+
+    def __init__(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        delimiter: str | None = None,
+        quotechar: str | None = None,
+    ):
+        self.path = path
+        self.encoding = encoding
+        if delimiter is None or quotechar is None:
+            dialect = sniff_dialect(read_sample(path, encoding))
+            delimiter = delimiter or dialect.delimiter
+            quotechar = quotechar or dialect.quotechar
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file
+        self._mm = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else b""
+        )
+
+        self.offsets = array("Q", [0]) if self.size else array("Q")
+        self.num_cols = 0
+        self._blocks: "OrderedDict[int, List[List[str]]]" = OrderedDict()
+        self._edits: dict[int, List[str]] = {}
+        self._offsets_shared = False  # a snapshot uses self.offsets too
+
+    @classmethod
+    def with_index(
+        cls,
+        path: str,
+        offsets: array,
+        size: int,
+        encoding: str = "utf-8",
+        delimiter: str | None = None,
+        quotechar: str | None = None,
+    ) -> "MmapCsvTable":
+        """
+        Open a file whose row index was built elsewhere (index_row_offsets
+        over its first `size` bytes with the same quotechar, e.g. in a
+        worker process).
+        """
+        table = cls(path, encoding, delimiter, quotechar)
+        table.offsets = offsets
+        table.size = min(size, table.size)
+        if len(offsets):
+            table._get_block(0)
+        return table
+
+    # ---------------------------
+    # Index
+    # ---------------------------
+    def build_index(
+        self,
+        progress: Callable[[int, int], None] | None = None,
+        cancelled: Callable[[], bool] | None = None,
+    ) -> bool:
+        """
+        Scan the file once and record where each row starts.
+        Returns False if `cancelled()` became true before the end.
+        """
+        in_quotes = False
+        pos = 0
+        while pos < self.size:
+            if cancelled is not None and cancelled():
+                return False
+            end = min(pos + INDEX_CHUNK_SIZE, self.size)
+            in_quotes = scan_record_offsets(self._mm[pos:end], pos, self.offsets, in_quotes, self.quotechar)
+            pos = end
+            if progress is not None:
+                progress(pos, self.size)
+
+        # a trailing newline doesn't start another row
+        if self.offsets and self.offsets[-1] >= self.size:
+            self.offsets.pop()
+
+        # column count from the first block; grows as more rows get parsed
+        if len(self.offsets):
+            self._get_block(0)
+        return True
+
+    def extend(self, offsets: array, end: int):
+        """
+        The file grew (see services.csv_service.check_file_tail): new rows
+        start at `offsets` and the last one ends at `end`. The file is
+        mapped again; only the new bytes were scanned.
+        """
+        if not len(offsets):
+            return
+        if self._offsets_shared:
+            # a snapshot being saved keeps the index it was taken with
+            self.offsets = array("Q", self.offsets)
+            self._offsets_shared = False
+        old_rows = self.num_rows
+        mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = mm
+        self.offsets.extend(offsets)
+        self.size = end
+        if old_rows:
+            # the last block may have been cached short
+            self._blocks.pop((old_rows - 1) // BLOCK_ROWS, None)
+        self._get_block((self.num_rows - 1) // BLOCK_ROWS)  # num_cols of the new rows
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.offsets)
+
+    def row_span(self, i: int) -> tuple[int, int]:
+        """Byte range [start, end) of row i in the file (incl. newline)."""
+        start = self.offsets[i]
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+        return start, end
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def _parse(self, start: int, stop: int) -> List[List[str]]:
+        begin = self.offsets[start]
+        end = self.offsets[stop] if stop < len(self.offsets) else self.size
+        text = self._mm[begin:end].decode(self.encoding, errors="replace")
+        rows = list(csv.reader(io.StringIO(text, newline=""), delimiter=self.delimiter, quotechar=self.quotechar))
+        # pad/trim defensively so row numbers always line up with the index
+        expected = stop - start
+        if len(rows) < expected:
+            rows.extend([] for _ in range(expected - len(rows)))
+        return rows[:expected]
+
+    def _get_block(self, block: int) -> List[List[str]]:
+        rows = self._blocks.get(block)
+        if rows is not None:
+            self._blocks.move_to_end(block)
+            return rows
+
+        start = block * BLOCK_ROWS
+        stop = min(start + BLOCK_ROWS, self.num_rows)
+        rows = self._parse(start, stop)
+        if rows:
+            self.num_cols = max(self.num_cols, max(len(r) for r in rows))
+
+        self._blocks[block] = rows
+        if len(self._blocks) > MAX_CACHED_BLOCKS:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def get_row(self, i: int) -> List[str]:
+        """Return row i (a fresh list, safe to modify)."""
+        edited = self._edits.get(i)
+        if edited is not None:
+            return list(edited)
+        return list(self._get_block(i // BLOCK_ROWS)[i % BLOCK_ROWS])
+
+    def get_rows(self, start: int, stop: int) -> List[List[str]]:
+        """Return rows [start, stop) as fresh lists."""
+        stop = min(stop, self.num_rows)
+        return [self.get_row(i) for i in range(max(start, 0), stop)]
+
+    def iter_rows(self) -> Iterator[List[str]]:
+        """
+        Stream all rows (with edits applied) without filling the block cache.
+        """
+        for block_start in range(0, self.num_rows, BLOCK_ROWS):
+            stop = min(block_start + BLOCK_ROWS, self.num_rows)
+            for i, row in enumerate(self._parse(block_start, stop), start=block_start):
+                edited = self._edits.get(i)
+                yield list(edited) if edited is not None else row
+
+    # ---------------------------
+    # Editing
+    # ---------------------------
+    def set_cell(self, r: int, c: int, value: str):
+        row = self._edits.get(r)
+        if row is None:
+            row = self.get_row(r)
+            self._edits[r] = row
+        if c >= len(row):
+            row.extend([""] * (c + 1 - len(row)))
+        row[c] = value
+        self.num_cols = max(self.num_cols, len(row))
+
+    def set_column(self, c: int, rows, uniques, codes):
+        """Bulk write of column c (see CompactTable.set_column); goes to the overlay."""
+        for r, k in zip(rows.tolist(), codes.tolist()):
+            self.set_cell(r, c, uniques[k])
+
+    @property
+    def edited_rows(self) -> set[int]:
+        return set(self._edits)
+
+    def snapshot(self) -> "MmapCsvTable":
+        """
+        Independent view for background saving: its own mapping of the same
+        file, the same (immutable) row index and a copy of the edits.
+        The caller must close() it.
+        """
+        snap = MmapCsvTable(self.path, self.encoding, self.delimiter, self.quotechar)
+        snap.offsets = self.offsets
+        snap.size = self.size  # the file may have grown since it was indexed
+        self._offsets_shared = True
+        snap.num_cols = self.num_cols
+        snap._edits = {r: list(row) for r, row in self._edits.items()}
+        return snap
+
+    # ---------------------------
+    # Cleanup
+    # ---------------------------
+    def close(self):
+        self._blocks.clear()
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
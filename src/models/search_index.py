@@ -0,0 +1,334 @@
+# src/models/search_index.py
+import bisect
+from array import array
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from services.bulk_service import read_columns
+
+
+# A value's rows are kept as a bitmap (1 bit per table row) once it occurs
+# in at least 1/DENSE_RATIO of the rows; rarer values keep a sorted row list
+# (4 bytes per occurrence), so unique-ish columns stay small.
+DENSE_RATIO = 32
+
+# Cells read per pass while building (bounds the memory of the build)
+INDEX_PASS_CELLS = 5_000_000
+
+# Values longer than this are not split into n-grams; substring queries
+# always check them directly.
+NGRAM_MAX_LEN = 200
+NGRAM = 3
+
+SEARCH_MODES = ("contains", "equals", "starts with")
+
+
+class _ColumnIndex:
+    """
+    value -> rows of one column.
+
+    - values / lookup: distinct values and their ids
+    - postings[vid]: sorted array('I') of rows, or a bytearray bitmap
+      (bit r = row r, little-endian bit order) for frequent values
+    - counts[vid]: number of rows with the value
+    """
+
+    __slots__ = ("values", "lookup", "postings", "counts")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.lookup: Dict[str, int] = {}
+        self.postings: list = []
+        self.counts: List[int] = []
+
+    def add_value(self, value: str) -> int:
+        vid = len(self.values)
+        self.values.append(value)
+        self.lookup[value] = vid
+        self.postings.append(array("I"))
+        self.counts.append(0)
+        return vid
+
+    def add_row(self, vid: int, r: int, num_rows: int):
+        p = self.postings[vid]
+        if isinstance(p, bytearray):
+            byte = r >> 3
+            if byte >= len(p):
+                p.extend(bytes(byte + 1 - len(p)))
+            p[byte] |= 1 << (r & 7)
+        else:
+            i = bisect.bisect_left(p, r)
+            if i < len(p) and p[i] == r:
+                return
+            p.insert(i, r)
+            if len(p) * DENSE_RATIO >= num_rows:
+                self.postings[vid] = _to_bitmap(p, num_rows)
+        self.counts[vid] += 1
+
+    def remove_row(self, vid: int, r: int):
+        p = self.postings[vid]
+        if isinstance(p, bytearray):
+            byte = r >> 3
+            if byte < len(p) and p[byte] & (1 << (r & 7)):
+                p[byte] &= ~(1 << (r & 7)) & 0xFF
+                self.counts[vid] -= 1
+        else:
+            i = bisect.bisect_left(p, r)
+            if i < len(p) and p[i] == r:
+                del p[i]
+                self.counts[vid] -= 1
+
+    def mark(self, vid: int, mask: np.ndarray):
+        """Set mask[r] for every row r that has value `vid`."""
+        p = self.postings[vid]
+        if isinstance(p, bytearray):
+            bits = np.unpackbits(np.frombuffer(p, dtype=np.uint8), bitorder="little")
+            n = min(len(bits), len(mask))
+            mask[:n] |= bits[:n].astype(bool)
+        elif len(p):
+            mask[np.frombuffer(p, dtype=np.uint32)] = True
+
+
+def _to_bitmap(rows, num_rows: int) -> bytearray:
+    mask = np.zeros(max(num_rows, 1), dtype=bool)
+    mask[np.asarray(rows, dtype=np.uint32)] = True
+    return bytearray(np.packbits(mask, bitorder="little").tobytes())
+
+
+def _ngrams(text: str):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class SearchResult:
+    """
+    Matches of one query: per column, the sorted rows with a matching cell.
+    Answers counts, filtered rows and find-next without rescanning.
+    """
+
+    def __init__(self, columns: Dict[int, np.ndarray], count: int):
+        self.columns = columns  # col -> sorted int64 rows
+        self.count = count      # matching cells
+
+    def rows(self) -> np.ndarray:
+        """Sorted rows with at least one matching cell (for filtering)."""
+        if not self.columns:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(list(self.columns.values())))
+
+    def next_cell(self, row: int, col: int, backwards: bool = False) -> tuple[int, int] | None:
+        """
+        The next matching cell after (row, col) in reading order (row by
+        row, left to right), wrapping around at the end of the table.
+        """
+        best = None
+        for c, rows in self.columns.items():
+            if backwards:
+                # previous: same row only for columns left of col
+                i = np.searchsorted(rows, row, side="left" if c >= col else "right") - 1
+                cand = (int(rows[i]), c) if i >= 0 else None
+                if cand is not None and (best is None or cand > best):
+                    best = cand
+            else:
+                i = np.searchsorted(rows, row, side="right" if c <= col else "left")
+                cand = (int(rows[i]), c) if i < len(rows) else None
+                if cand is not None and (best is None or cand < best):
+                    best = cand
+        if best is not None or not self.count:
+            return best
+        # wrap around
+        return self.next_cell(2**62, -1, True) if backwards else self.next_cell(-1, 2**31)
+
+
+class SearchQuery(NamedTuple):
+    text: str
+    mode: str = "contains"     # see SEARCH_MODES
+    match_case: bool = False
+
+
+class SearchIndex:
+    """
+    Inverted index over a table for instant search and filtering.
+
+    - per column: value -> rows (sorted row list or bitmap, see
+      _ColumnIndex)
+    - over all distinct values: trigram -> value ids, so a substring query
+      only checks the values sharing all of its trigrams (case-insensitive)
+    - cell edits update both incrementally (update_cell); inserting,
+      deleting or moving rows/columns needs a rebuild
+
+    Built off the Tk thread with build(table); afterwards only used from
+    the Tk thread.
+    """
+
+    def __init__(self):
+        self.num_rows = 0
+        self.columns: List[_ColumnIndex] = []
+        # global value id -> (column, vid); trigram -> global value ids
+        self._gv_col = array("I")
+        self._gv_vid = array("I")
+        self._grams: Dict[str, array] = {}
+        self._long_values = array("I")
+        self.version = 0  # bumped on every change (invalidates cached results)
+
+    # ---------------------------
+    # Building
+    # ---------------------------
+    @classmethod
+    def build(cls, table, cancelled: Callable[[], bool] | None = None) -> "SearchIndex | None":
+        """
+        Index a table (snapshot or model with num_rows / num_cols /
+        iter_rows). Returns None if cancelled.
+        """
+        index = cls()
+        n = index.num_rows = table.num_rows
+        num_cols = table.num_cols
+        per_pass = max(1, INDEX_PASS_CELLS // max(n, 1))
+        for first in range(0, num_cols, per_pass):
+            if cancelled is not None and cancelled():
+                return None
+            group = list(range(first, min(first + per_pass, num_cols)))
+            for c, (uniques, codes) in read_columns(table, group).items():
+                index.columns.append(index._index_column(c, uniques, codes))
+        return index
+
+    def _index_column(self, c: int, uniques, codes) -> _ColumnIndex:
+        n = self.num_rows
+        values = uniques.tolist()
+        col = _ColumnIndex()
+        col.values = values
+        col.lookup = dict(zip(values, range(len(values))))
+        counts = np.bincount(codes, minlength=len(values))
+        col.counts = counts.tolist()
+
+        # rows grouped by value (stable sort keeps each group sorted),
+        # sliced straight out of one uint32 buffer
+        order = np.argsort(codes, kind="stable").astype(np.uint32)
+        buf = memoryview(order.tobytes())
+        ends = np.cumsum(counts).tolist()
+        postings = col.postings
+        start = 0
+        for vid, end in enumerate(ends):
+            if (end - start) * DENSE_RATIO >= n:
+                postings.append(_to_bitmap(order[start:end], n))
+            else:
+                p = array("I")
+                p.frombytes(buf[start * 4:end * 4])
+                postings.append(p)
+            start = end
+
+        self._add_grams(c, range(len(values)), values)
+        return col
+
+    def _add_grams(self, c: int, vids, values: List[str]):
+        """Register values of column c under their trigrams (global ids)."""
+        grams = self._grams
+        gv_col, gv_vid, long_values = self._gv_col, self._gv_vid, self._long_values
+        for vid, value in zip(vids, values):
+            gvid = len(gv_col)
+            gv_col.append(c)
+            gv_vid.append(vid)
+            if len(value) > NGRAM_MAX_LEN:
+                long_values.append(gvid)
+                continue
+            lower = value.lower()
+            for g in {lower[i:i + NGRAM] for i in range(len(lower) - NGRAM + 1)}:
+                ids = grams.get(g)
+                if ids is None:
+                    grams[g] = ids = array("I")
+                ids.append(gvid)
+
+    # ---------------------------
+    # Incremental updates
+    # ---------------------------
+    def update_cell(self, r: int, c: int, old: str, new: str):
+        """Cell (r, c) changed from `old` to `new`."""
+        if old == new:
+            return
+        self.version += 1
+        while len(self.columns) <= c:
+            self.columns.append(_ColumnIndex())
+        col = self.columns[c]
+        vid = col.lookup.get(old)
+        if vid is not None:
+            col.remove_row(vid, r)
+        vid = col.lookup.get(new)
+        if vid is None:
+            vid = col.add_value(new)
+            self._add_grams(c, (vid,), (new,))
+        col.add_row(vid, r, self.num_rows)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def _candidate_values(self, query: SearchQuery):
+        """(column, vid) pairs whose value may match a substring query."""
+        text = query.text.lower()
+        if len(text) < NGRAM:
+            for c, col in enumerate(self.columns):
+                for vid in range(len(col.values)):
+                    yield c, vid
+            return
+
+        lists = []
+        for g in _ngrams(text):
+            ids = self._grams.get(g)
+            if ids is None:
+                lists = []
+                break
+            lists.append(ids)
+        if lists:
+            lists.sort(key=len)
+            found = set(lists[0])
+            for ids in lists[1:]:
+                found.intersection_update(ids)
+                if not found:
+                    break
+        else:
+            found = set()
+        found.update(self._long_values)
+        for gvid in sorted(found):
+            yield self._gv_col[gvid], self._gv_vid[gvid]
+
+    def search(self, query: SearchQuery, columns: List[int] | None = None) -> SearchResult:
+        """Find the cells matching `query` (optionally only in `columns`)."""
+        text = query.text
+        wanted = set(columns) if columns is not None else None
+        hits: Dict[int, List[int]] = {}
+
+        if query.mode == "equals" and query.match_case:
+            for c, col in enumerate(self.columns):
+                vid = col.lookup.get(text)
+                if vid is not None:
+                    hits.setdefault(c, []).append(vid)
+        else:
+            needle = text if query.match_case else text.lower()
+            if query.mode == "equals":
+                test = lambda v: v.lower() == needle
+            elif query.mode == "starts with":
+                test = (lambda v: v.startswith(needle)) if query.match_case else (lambda v: v.lower().startswith(needle))
+            else:
+                test = (lambda v: needle in v) if query.match_case else (lambda v: needle in v.lower())
+            for c, vid in self._candidate_values(query):
+                if test(self.columns[c].values[vid]):
+                    hits.setdefault(c, []).append(vid)
+
+        result_cols: Dict[int, np.ndarray] = {}
+        count = 0
+        for c, vids in hits.items():
+            if wanted is not None and c not in wanted:
+                continue
+            col = self.columns[c]
+            vids = [v for v in vids if col.counts[v]]
+            if not vids:
+                continue
+            count += sum(col.counts[v] for v in vids)
+            if len(vids) == 1 and not isinstance(col.postings[vids[0]], bytearray):
+                rows = np.frombuffer(col.postings[vids[0]], dtype=np.uint32).astype(np.int64)
+            else:
+                mask = np.zeros(self.num_rows, dtype=bool)
+                for v in vids:
+                    col.mark(v, mask)
+                rows = np.flatnonzero(mask)
+            result_cols[c] = rows
+        return SearchResult(result_cols, count)
@@ -0,0 +1,33 @@
+# src/models/snapshot.py
+from typing import Iterator, List
+
+
+class RowListSnapshot:
+    """
+    Read-only copy of list-of-rows table data (e.g. the sheet's data).
+
+    Only the per-row lists of cell references are copied; the cell strings
+    themselves are immutable and shared, so this is cheap compared to
+    serializing, and later edits in the sheet don't leak into it.
+    Offers the same reading interface as the table models.
+    """
+
+    def __init__(self, rows):
+        self.rows: List[List[str]] = [list(r) for r in rows]
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def num_cols(self) -> int:
+        return max((len(r) for r in self.rows), default=0)
+
+    def get_row(self, r: int) -> List[str]:
+        return self.rows[r]
+
+    def iter_rows(self) -> Iterator[List[str]]:
+        return iter(self.rows)
+
+    def close(self):
+        self.rows = []
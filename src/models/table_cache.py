@@ -0,0 +1,88 @@
+# src/models/table_cache.py
+from collections import OrderedDict
+from typing import Hashable, List, NamedTuple
+
+
+class CachedTable(NamedTuple):
+    """
+    A parsed table kept for a project file, with what its load found out:
+    source (models.dirty_tracker.SourceFile) and dialect for CSV files,
+    sheet for worksheets.
+    """
+    table: object  # CompactTable or MmapCsvTable
+    nbytes: int
+    source: object = None
+    dialect: object = None
+    sheet: str | None = None
+
+
+def table_memory(table) -> int:
+    """Estimated memory a table model keeps (a memory-mapped one: just its row index)."""
+    if hasattr(table, "memory_bytes"):
+        return table.memory_bytes()
+    offsets = getattr(table, "offsets", None)
+    return len(offsets) * offsets.itemsize if offsets is not None else 0
+
+
+class TableCache:
+    """
+    Parsed tables by key (a project file), kept within a memory budget.
+
+    - get(key) returns the entry and marks it most recently used
+    - put(key, entry) adds one; the least recently used entries are closed
+      and dropped until the budget holds again (returns their keys)
+    - pop(key) hands an entry over without closing it (e.g. to show it)
+
+    Tk thread only.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.used = 0
+        self._entries: "OrderedDict[Hashable, CachedTable]" = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> CachedTable | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: CachedTable) -> List[Hashable]:
+        old = self.pop(key)
+        if old is not None and old.table is not entry.table:
+            old.table.close()
+        if entry.nbytes > self.budget_bytes:
+            entry.table.close()  # would push everything else out
+            return [key]
+        self._entries[key] = entry
+        self.used += entry.nbytes
+        evicted = []
+        while self.used > self.budget_bytes:
+            old_key, old = self._entries.popitem(last=False)
+            self.used -= old.nbytes
+            old.table.close()
+            evicted.append(old_key)
+        return evicted
+
+    def pop(self, key) -> CachedTable | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry.nbytes
+        return entry
+
+    def discard(self, key):
+        entry = self.pop(key)
+        if entry is not None:
+            entry.table.close()
+
+    def clear(self):
+        for entry in self._entries.values():
+            entry.table.close()
+        self._entries.clear()
+        self.used = 0
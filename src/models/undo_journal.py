@@ -0,0 +1,273 @@
+# src/models/undo_journal.py
+import pickle
+import tempfile
+from collections import deque
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+
+DEFAULT_MEMORY_CAP = 64 * 1024 * 1024
+
+# rough per-object overhead of a Python str / list slot, for size estimates
+_STR_OVERHEAD = 56
+
+
+def _small_codes(codes, num_values: int) -> np.ndarray:
+    """Store dictionary codes in the narrowest unsigned type that fits."""
+    if num_values <= 1 << 8:
+        dtype = np.uint8
+    elif num_values <= 1 << 16:
+        dtype = np.uint16
+    else:
+        dtype = np.uint32
+    return np.asarray(codes).astype(dtype, copy=False)
+
+
+def _strings_nbytes(values) -> int:
+    return sum(len(v) for v in values) + _STR_OVERHEAD * len(values)
+
+
+# ---------------------------
+# Deltas
+# ---------------------------
+class CellDelta(NamedTuple):
+    """
+    Cells of one column that changed: row rows[i] went from
+    old_uniques[old_codes[i]] to new_uniques[new_codes[i]].
+    Dictionary-encoded, so a bulk replace over millions of cells costs a
+    few bytes per cell plus the distinct values.
+    """
+    column: int
+    rows: np.ndarray
+    old_uniques: np.ndarray
+    old_codes: np.ndarray
+    new_uniques: np.ndarray
+    new_codes: np.ndarray
+
+    @classmethod
+    def from_values(cls, column: int, rows, old_values, new_values) -> "CellDelta":
+        """Build a delta from plain per-row values (e.g. a few edited cells)."""
+        parts = []
+        for values in (old_values, new_values):
+            lookup: dict = {}
+            codes = [lookup.setdefault(v, len(lookup)) for v in values]
+            parts.append(np.array(list(lookup), dtype=object))
+            parts.append(_small_codes(codes, len(lookup)))
+        return cls(column, np.asarray(rows, dtype=np.uint32), *parts)
+
+    @classmethod
+    def from_codes(cls, column, rows, old_uniques, old_codes, new_uniques, new_codes) -> "CellDelta":
+        """
+        Build a delta from dictionary-encoded columns (as produced by a bulk
+        update), keeping only the distinct values actually used.
+        """
+        parts = []
+        for uniques, codes in ((old_uniques, old_codes), (new_uniques, new_codes)):
+            codes = np.asarray(codes, dtype=np.intp)
+            used = np.flatnonzero(np.bincount(codes, minlength=len(uniques)))
+            remap = np.zeros(len(uniques), dtype=np.intp)
+            remap[used] = np.arange(len(used))
+            parts.append(np.asarray(uniques, dtype=object)[used])
+            parts.append(_small_codes(remap[codes], len(used)))
+        return cls(column, np.asarray(rows).astype(np.uint32, copy=False), *parts)
+
+    def old_values(self) -> np.ndarray:
+        return self.old_uniques[self.old_codes]
+
+    def new_values(self) -> np.ndarray:
+        return self.new_uniques[self.new_codes]
+
+    @property
+    def count(self) -> int:
+        return int(self.rows.size)
+
+    def inverse(self) -> "CellDelta":
+        return CellDelta(
+            self.column, self.rows, self.new_uniques, self.new_codes, self.old_uniques, self.old_codes
+        )
+
+    def nbytes(self) -> int:
+        return (
+            self.rows.nbytes + self.old_codes.nbytes + self.new_codes.nbytes
+            + _strings_nbytes(self.old_uniques) + _strings_nbytes(self.new_uniques)
+        )
+
+
+class RowsDelta(NamedTuple):
+    """
+    Rows inserted ("insert") or deleted ("delete").
+    positions: sorted row numbers in the table where the rows are present
+    (after an insert / before a delete); contents: the rows themselves, or
+    () for empty rows.
+    """
+    kind: str
+    positions: Tuple[int, ...]
+    contents: Tuple[list, ...]
+
+    def inverse(self) -> "RowsDelta":
+        return RowsDelta("delete" if self.kind == "insert" else "insert", self.positions, self.contents)
+
+    def nbytes(self) -> int:
+        return 8 * len(self.positions) + sum(_strings_nbytes(r) + 64 for r in self.contents)
+
+
+class ColumnsDelta(NamedTuple):
+    """
+    Columns inserted or deleted; contents[k] is the column at positions[k]
+    (one value per row), or contents is () for empty columns.
+    """
+    kind: str
+    positions: Tuple[int, ...]
+    contents: Tuple[list, ...]
+
+    def inverse(self) -> "ColumnsDelta":
+        return ColumnsDelta("delete" if self.kind == "insert" else "insert", self.positions, self.contents)
+
+    def nbytes(self) -> int:
+        return 8 * len(self.positions) + sum(_strings_nbytes(c) for c in self.contents)
+
+
+class JournalEntry(NamedTuple):
+    """One user action: its deltas, applied in order (undo: reversed, inverted)."""
+    label: str
+    deltas: tuple
+
+    def nbytes(self) -> int:
+        return 64 + sum(d.nbytes() for d in self.deltas)
+
+    def inverse(self) -> "JournalEntry":
+        return JournalEntry(self.label, tuple(d.inverse() for d in reversed(self.deltas)))
+
+
+# ---------------------------
+# Storage
+# ---------------------------
+class _SpillStack:
+    """
+    A stack of entries whose newest entries stay in memory (up to
+    memory_cap bytes) while the oldest are pickled to a temporary file.
+    The file is a stack too: entries are appended at its end and read
+    back from the end, truncating as they go.
+    """
+
+    def __init__(self, memory_cap: int):
+        self.memory_cap = memory_cap
+        self._memory: deque = deque()        # (entry, nbytes), oldest first
+        self._memory_bytes = 0
+        self._spilled: List[Tuple[int, int]] = []  # (offset, length) in the file
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._spilled)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(length for _offset, length in self._spilled)
+
+    def push(self, entry: JournalEntry):
+        size = entry.nbytes()
+        self._memory.append((entry, size))
+        self._memory_bytes += size
+        # spill the oldest; the newest entry always stays in memory
+        while self._memory_bytes > self.memory_cap and len(self._memory) > 1:
+            old, old_size = self._memory.popleft()
+            self._memory_bytes -= old_size
+            self._spill(old)
+
+    def pop(self) -> JournalEntry | None:
+        if self._memory:
+            entry, size = self._memory.pop()
+            self._memory_bytes -= size
+            return entry
+        if self._spilled:
+            offset, length = self._spilled.pop()
+            self._file.seek(offset)
+            data = self._file.read(length)
+            self._file.truncate(offset)
+            return pickle.loads(data)
+        return None
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._spilled = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _spill(self, entry: JournalEntry):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="csv-undo-")
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.seek(0, 2)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._spilled.append((offset, len(data)))
+
+
+class UndoJournal:
+    """
+    Application-level undo/redo made of compact deltas.
+
+    - record(entry) adds an action and clears the redo history
+    - undo() / redo() return the entry to apply (undo: already inverted)
+    - entries beyond memory_cap bytes (per stack) go to a temporary file
+      on disk instead of being dropped
+    """
+
+    def __init__(self, memory_cap: int = DEFAULT_MEMORY_CAP):
+        self._undo = _SpillStack(memory_cap)
+        self._redo = _SpillStack(memory_cap)
+
+    @property
+    def memory_cap(self) -> int:
+        return self._undo.memory_cap
+
+    @memory_cap.setter
+    def memory_cap(self, value: int):
+        self._undo.memory_cap = self._redo.memory_cap = value
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return len(self._redo) > 0
+
+    def record(self, label: str, deltas) -> None:
+        deltas = tuple(d for d in deltas if not isinstance(d, CellDelta) or d.count)
+        if not deltas:
+            return
+        self._undo.push(JournalEntry(label, deltas))
+        self._redo.clear()
+
+    def undo(self) -> JournalEntry | None:
+        """Pop the last action; returns its inverse (what to apply), or None."""
+        entry = self._undo.pop()
+        if entry is None:
+            return None
+        self._redo.push(entry)
+        return entry.inverse()
+
+    def redo(self) -> JournalEntry | None:
+        """Pop the last undone action; returns it (what to apply), or None."""
+        entry = self._redo.pop()
+        if entry is None:
+            return None
+        self._undo.push(entry)
+        return entry
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def stats(self) -> str:
+        mem = (self._undo.memory_bytes + self._redo.memory_bytes) / 1e6
+        disk = (self._undo.disk_bytes + self._redo.disk_bytes) / 1e6
+        return f"{len(self._undo)} undo / {len(self._redo)} redo, {mem:.1f} MB in memory, {disk:.1f} MB on disk"
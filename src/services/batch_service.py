@@ -0,0 +1,219 @@
+# src/services/batch_service.py
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, List, NamedTuple, Sequence
+
+from services.csv_service import (
+    codec_for_save,
+    iter_csv_batches,
+    read_sample,
+    sniff_delimiter,
+    write_csv_atomic,
+)
+from services.excel_service import (
+    iter_sheet_batches,
+    list_sheets,
+    update_xlsx_cells,
+)
+
+# Nothing in here imports tkinter: batch runs work without a display.
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+_CELL_REF_RE = re.compile(r"^([A-Za-z]{1,3})([1-9][0-9]*)$")
+
+
+# ---------------------------
+# Operations
+# ---------------------------
+class SetCell(NamedTuple):
+    """Set one cell (0-based row/column, like the table)."""
+    row: int
+    col: int
+    value: str
+
+
+class ReplaceText(NamedTuple):
+    """Replace every occurrence of `old` with `new` in all cells."""
+    old: str
+    new: str
+
+
+def parse_cell_ref(ref: str) -> tuple[int, int]:
+    """"B3" -> (2, 1): an A1-style reference as 0-based (row, col)."""
+    m = _CELL_REF_RE.match(ref.strip())
+    if m is None:
+        raise ValueError(f"Invalid cell reference: {ref!r}")
+    col = 0
+    for ch in m.group(1).upper():
+        col = col * 26 + ord(ch) - 64
+    return int(m.group(2)) - 1, col - 1
+
+
+class FileResult(NamedTuple):
+    path: str
+    ok: bool
+    seconds: float
+    cells_changed: int
+    error: str = ""
+
+
+class _Unchanged(Exception):
+    """Raised to abort a rewrite that would produce the same file."""
+
+
+# ---------------------------
+# One file
+# ---------------------------
+def _split_ops(ops: Sequence) -> tuple[List[ReplaceText], dict[int, List[SetCell]]]:
+    replaces = [op for op in ops if isinstance(op, ReplaceText)]
+    sets: dict[int, List[SetCell]] = {}
+    for op in ops:
+        if isinstance(op, SetCell):
+            sets.setdefault(op.row, []).append(op)
+    return replaces, sets
+
+
+def _update_row(row: List[str], replaces: List[ReplaceText], sets: List[SetCell]) -> int:
+    """Apply replacements, then cell sets, to one row in place; returns cells changed."""
+    changed = 0
+    for op in replaces:
+        for c, value in enumerate(row):
+            if op.old in value:
+                row[c] = value.replace(op.old, op.new)
+                changed += 1
+    for op in sets:
+        if op.col >= len(row):
+            row.extend([""] * (op.col + 1 - len(row)))
+        if row[op.col] != op.value:
+            row[op.col] = op.value
+            changed += 1
+    return changed
+
+
+def update_csv(path: str, ops: Sequence) -> int:
+    """
+    Stream `path` through the operations and rewrite it atomically
+    (compressed again if it is compressed). Sets past the last row append
+    rows. The file is left alone (not even rewritten) when nothing
+    changes. Returns the number of cells changed.
+    """
+    replaces, sets = _split_ops(ops)
+    delimiter = sniff_delimiter(read_sample(path))
+    codec = codec_for_save(path)
+    changed = 0
+
+    def rows() -> Iterator[List[str]]:
+        nonlocal changed
+        r = 0
+        for batch in iter_csv_batches(path, delimiter=delimiter):
+            for row in batch.rows:
+                changed += _update_row(row, replaces, sets.get(r, ()))
+                yield row
+                r += 1
+        for extra in sorted(k for k in sets if k >= r):
+            while r < extra:
+                yield []
+                r += 1
+            row: List[str] = []
+            changed += _update_row(row, (), sets[extra])
+            yield row
+            r += 1
+        if not changed:
+            raise _Unchanged()
+
+    try:
+        write_csv_atomic(path, rows(), delimiter=delimiter, codec=codec)
+    except _Unchanged:
+        return 0  # atomic_write already dropped the temporary file
+    return changed
+
+
+def update_xlsx(path: str, ops: Sequence, sheet_name: str | None = None) -> int:
+    """
+    Apply the operations to one worksheet (default: the first) of a
+    workbook. Cell sets go straight to update_xlsx_cells; replacements
+    need the sheet to be read first (streamed, read-only).
+    """
+    if sheet_name is None:
+        sheets = list_sheets(path)
+        if not sheets:
+            raise ValueError("Workbook has no worksheets")
+        sheet = sheets[0]
+    else:
+        sheet = next((s for s in list_sheets(path) if s.name == sheet_name), None)
+        if sheet is None:
+            raise KeyError(f"Worksheet {sheet_name!r} not found")
+
+    replaces, sets = _split_ops(ops)
+    changes: dict[tuple[int, int], str] = {}
+    if replaces:
+        r = 0
+        for batch in iter_sheet_batches(path, sheet):
+            for row in batch.rows:
+                original = list(row)
+                if _update_row(row, replaces, ()):
+                    for c, value in enumerate(row):
+                        if value != original[c]:
+                            changes[(r, c)] = value
+                r += 1
+    for row_sets in sets.values():
+        for op in row_sets:
+            changes[(op.row, op.col)] = op.value
+
+    if not changes:
+        return 0
+    return update_xlsx_cells(path, sheet.name, changes)
+
+
+def update_file(path: str, ops: Sequence, sheet_name: str | None = None) -> FileResult:
+    """
+    Worker entry point (runs in a pool process): update one CSV or Excel
+    file and time it. Errors are reported in the result, never raised.
+    """
+    start = time.perf_counter()
+    try:
+        if path.lower().endswith(EXCEL_EXTENSIONS):
+            changed = update_xlsx(path, ops, sheet_name)
+        else:
+            changed = update_csv(path, ops)
+    except Exception as e:
+        return FileResult(path, False, time.perf_counter() - start, 0, f"{type(e).__name__}: {e}")
+    return FileResult(path, True, time.perf_counter() - start, changed)
+
+
+# ---------------------------
+# Many files
+# ---------------------------
+def run_batch(
+    paths: Sequence[str],
+    ops: Sequence,
+    sheet_name: str | None = None,
+    workers: int | None = None,
+    on_result: Callable[[FileResult], None] | None = None,
+) -> List[FileResult]:
+    """
+    Update every file in `paths`, spread over `workers` processes
+    (default: one per CPU). on_result is called as each file finishes;
+    results are returned in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    results: dict[str, FileResult] = {}
+
+    def done(result: FileResult):
+        results[result.path] = result
+        if on_result is not None:
+            on_result(result)
+
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            done(update_file(path, ops, sheet_name))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            futures = [pool.submit(update_file, path, ops, sheet_name) for path in paths]
+            for future in as_completed(futures):
+                done(future.result())
+
+    return [results[path] for path in paths]
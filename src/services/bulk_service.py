@@ -0,0 +1,268 @@
+# src/services/bulk_service.py
+import re
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+# numpy / pandas are imported inside the functions (heavy imports, only
+# needed once a bulk update actually runs)
+
+
+CONDITION_TESTS = (
+    "equals",
+    "not equals",
+    "contains",
+    "matches regex",
+    "is empty",
+    "not empty",
+    ">",
+    ">=",
+    "<",
+    "<=",
+)
+
+_COLUMN_PART_RE = re.compile(r"^([A-Za-z]+|[0-9]+)(?::([A-Za-z]+|[0-9]+))?$")
+
+
+class Condition(NamedTuple):
+    """Only update rows whose cell in `column` passes `test` (see CONDITION_TESTS)."""
+    column: int
+    test: str
+    value: str = ""
+
+
+class BulkUpdate(NamedTuple):
+    """
+    One bulk edit over whole columns.
+
+    - action: "replace" (find -> replace inside cells) or "set" (cells
+      become `replace`)
+    - columns: 0-based columns to update
+    - regex / match_case / whole_cell: how `find` is matched
+    - rows: restrict to these rows (e.g. the selection); None = all rows
+    - condition: optional row filter on any column
+    """
+    action: str
+    columns: Tuple[int, ...]
+    find: str = ""
+    replace: str = ""
+    regex: bool = False
+    match_case: bool = True
+    whole_cell: bool = False
+    rows: Tuple[int, ...] | None = None
+    condition: Condition | None = None
+
+
+class ColumnChanges(NamedTuple):
+    """
+    The new values of one column, dictionary-encoded like the table:
+    row rows[i] becomes uniques[codes[i]]. rows are sorted.
+    old_uniques[codes[i]] is the value being replaced (for undo).
+    """
+    column: int
+    rows: "numpy.ndarray"
+    uniques: "numpy.ndarray"
+    codes: "numpy.ndarray"
+    old_uniques: "numpy.ndarray"
+
+    @property
+    def count(self) -> int:
+        return int(self.rows.size)
+
+    def values(self) -> "numpy.ndarray":
+        return self.uniques[self.codes]
+
+
+def _column_index(token: str) -> int:
+    if token.isdigit():
+        return int(token) - 1
+    n = 0
+    for ch in token.upper():
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def index_to_col_name(index: int) -> str:
+    """Convert 0-based index to spreadsheet-like column name (A, B, ..., Z, AA, AB, ...)."""
+    name = ""
+    idx = index
+    while True:
+        idx, rem = divmod(idx, 26)
+        name = chr(ord("A") + rem) + name
+        if idx == 0:
+            break
+        idx -= 1
+    return name
+
+
+def parse_columns(text: str) -> List[int]:
+    """
+    "A, C:E, 7" -> [0, 2, 3, 4, 6]: column letters or 1-based numbers,
+    single or as ranges, separated by commas.
+    """
+    columns: List[int] = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip().replace(" ", "")
+        if not part:
+            continue
+        m = _COLUMN_PART_RE.match(part)
+        if m is None:
+            raise ValueError(f"Invalid column: {part!r}")
+        first = _column_index(m.group(1))
+        last = _column_index(m.group(2)) if m.group(2) else first
+        if first < 0 or last < 0:
+            raise ValueError(f"Invalid column: {part!r}")
+        if first > last:
+            first, last = last, first
+        columns.extend(c for c in range(first, last + 1) if c not in columns)
+    return columns
+
+
+# ---------------------------
+# Column buffers
+# ---------------------------
+def read_columns(table, columns: Sequence[int]) -> Dict[int, tuple]:
+    """
+    (uniques, codes) per column: the distinct values of the column and,
+    for every row, the index of its value. Dictionary-encoded tables
+    (CompactTable.column_codes) are used as they are; anything else is read
+    row by row once and factorized by pandas.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = table.num_rows
+    buffers = {}
+    if hasattr(table, "column_codes"):
+        for c in columns:
+            codes = np.zeros(n, dtype=np.intp)
+            if c < table.num_cols:
+                values, raw = table.column_codes(c)
+                codes[: len(raw)] = np.frombuffer(raw, dtype=raw.typecode)
+                buffers[c] = (np.array(values, dtype=object), codes)
+            else:
+                buffers[c] = (np.array([""], dtype=object), codes)
+        return buffers
+
+    cells: Dict[int, list] = {c: [] for c in columns}
+    for row in table.iter_rows():
+        width = len(row)
+        for c, out in cells.items():
+            out.append(row[c] if c < width else "")
+    for c, values in cells.items():
+        codes, uniques = pd.factorize(np.array(values, dtype=object))
+        if not len(uniques):
+            uniques = np.array([""], dtype=object)
+        buffers[c] = (np.asarray(uniques, dtype=object), codes.astype(np.intp, copy=False))
+    return buffers
+
+
+# ---------------------------
+# Operations (on distinct values only)
+# ---------------------------
+def _transform(uniques, update: BulkUpdate):
+    """New value for each distinct value of a column."""
+    import numpy as np
+    import pandas as pd
+
+    if update.action == "set":
+        return np.full(len(uniques), update.replace, dtype=object)
+    if update.action != "replace":
+        raise ValueError(f"Unknown bulk action: {update.action!r}")
+    if not update.find:
+        raise ValueError("Nothing to find")
+
+    s = pd.Series(uniques, dtype=object)
+    if update.match_case and not update.whole_cell:
+        new = s.str.replace(update.find, update.replace, regex=update.regex)
+    else:
+        pattern = update.find if update.regex else re.escape(update.find)
+        if update.whole_cell:
+            pattern = rf"\A(?:{pattern})\Z"
+        repl = update.replace if update.regex else update.replace.replace("\\", "\\\\")
+        flags = 0 if update.match_case else re.IGNORECASE
+        new = s.str.replace(re.compile(pattern, flags), repl, regex=True)
+    return new.to_numpy(dtype=object)
+
+
+def _test_values(uniques, condition: Condition):
+    """Which distinct values pass the condition (bool per value)."""
+    import numpy as np
+    import pandas as pd
+
+    s = pd.Series(uniques, dtype=object)
+    test, value = condition.test, condition.value
+    if test == "equals":
+        hit = s == value
+    elif test == "not equals":
+        hit = s != value
+    elif test == "contains":
+        hit = s.str.contains(value, regex=False)
+    elif test == "matches regex":
+        hit = s.str.contains(value, regex=True)
+    elif test == "is empty":
+        hit = s.str.strip() == ""
+    elif test == "not empty":
+        hit = s.str.strip() != ""
+    elif test in (">", ">=", "<", "<="):
+        try:
+            operand = float(value)
+        except ValueError:
+            raise ValueError(f"Not a number: {value!r}") from None
+        numbers = pd.to_numeric(s, errors="coerce")
+        hit = {
+            ">": numbers > operand,
+            ">=": numbers >= operand,
+            "<": numbers < operand,
+            "<=": numbers <= operand,
+        }[test]
+    else:
+        raise ValueError(f"Unknown condition: {test!r}")
+    return np.asarray(hit.fillna(False), dtype=bool)
+
+
+def compute_updates(
+    table,
+    update: BulkUpdate,
+    cancelled: Callable[[], bool] | None = None,
+) -> List[ColumnChanges]:
+    """
+    Work out a bulk update without touching the table.
+
+    Every column is handled as (distinct values, per-row codes): the
+    find/replace or condition runs once per distinct value, and the rows
+    to change are picked with numpy indexing over the codes. On repetitive
+    data that is a few thousand string operations for millions of cells.
+
+    `table` is anything with num_rows / iter_rows (a snapshot or model).
+    Returns only the cells whose value actually changes.
+    """
+    import numpy as np
+
+    n = table.num_rows
+    needed = set(update.columns)
+    if update.condition is not None:
+        needed.add(update.condition.column)
+    buffers = read_columns(table, sorted(needed))
+
+    mask = None
+    if update.rows is not None:
+        mask = np.zeros(n, dtype=bool)
+        rows = np.asarray(update.rows, dtype=np.intp)
+        mask[rows[(rows >= 0) & (rows < n)]] = True
+    if update.condition is not None:
+        uniques, codes = buffers[update.condition.column]
+        passed = _test_values(uniques, update.condition)[codes]
+        mask = passed if mask is None else mask & passed
+
+    changes = []
+    for c in update.columns:
+        if cancelled is not None and cancelled():
+            return []
+        uniques, codes = buffers[c]
+        new = _transform(uniques, update)
+        hit = (new != uniques)[codes]
+        if mask is not None:
+            hit &= mask
+        rows = np.flatnonzero(hit)
+        if rows.size:
+            changes.append(ColumnChanges(c, rows, new, codes[rows], uniques))
+    return changes
@@ -0,0 +1,224 @@
+# src/services/csv_backends.py
+import csv
+import importlib.util
+import io
+from array import array
+from itertools import islice
+from typing import List, NamedTuple
+
+# pandas / numpy are imported inside the pandas backend (heavy imports,
+# only needed once that backend actually runs)
+
+
+BACKEND_NAMES = ("auto", "stdlib", "pandas")
+
+# "auto" only picks pandas for files at least this big: below it the
+# pandas import costs more than the faster parse saves
+PANDAS_MIN_BYTES = 8 * 1024 * 1024
+# Bytes handed to one read_csv call (the first block is small, so the
+# first rows show up quickly)
+PANDAS_BLOCK_BYTES = 4 * 1024 * 1024
+PANDAS_FIRST_BLOCK_BYTES = 64 * 1024
+
+
+class CsvDialect(NamedTuple):
+    """
+    What a parser needs to know about a file (see csv_service.sniff_dialect).
+
+    - rectangular: every record of the sniffed sample had the same number
+      of fields (ragged files are left to the stdlib backend)
+    - fields: the most fields of a sampled record (0 = unknown)
+    """
+    delimiter: str = ","
+    quotechar: str = '"'
+    rectangular: bool = True
+    fields: int = 0
+
+
+class BackendFallback(Exception):
+    """
+    A backend can't parse the rest of the file (e.g. pandas hit a record
+    with more fields than the first one); the caller continues with the
+    stdlib backend.
+    """
+
+
+class CsvBackend:
+    """
+    A CSV parser. Reads a binary stream in chunks of records:
+
+    - iter_chunks(stream, dialect, encoding, first_rows, rows, skip):
+      chunks of about `first_rows` records, then `rows` each (a backend
+      may size them in bytes instead), after skipping the first `skip`
+      records; len(chunk) is its number of records
+    - to_rows(chunk): list of rows (lists of str)
+    - to_table(chunk): a models.compact_table.CompactTable
+    """
+
+    name = ""
+
+    def iter_chunks(self, stream, dialect: CsvDialect, encoding: str, first_rows: int, rows: int, skip: int = 0):
+        raise NotImplementedError
+
+    def to_rows(self, chunk) -> List[List[str]]:
+        raise NotImplementedError
+
+    def to_table(self, chunk):
+        from models.compact_table import CompactTable
+
+        return CompactTable.from_rows(self.to_rows(chunk))
+
+
+class StdlibBackend(CsvBackend):
+    """csv.reader: every dialect, ragged rows and blank lines kept as they are."""
+
+    name = "stdlib"
+
+    def iter_chunks(self, stream, dialect, encoding, first_rows, rows, skip=0):
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+        reader = csv.reader(
+            text,
+            delimiter=dialect.delimiter,
+            quotechar=dialect.quotechar,
+        )
+        if skip:
+            next(islice(reader, skip - 1, skip), None)
+        limit = first_rows
+        while True:
+            chunk = list(islice(reader, limit))
+            if not chunk:
+                return
+            yield chunk
+            limit = rows
+
+    def to_rows(self, chunk):
+        return chunk
+
+
+class PandasBackend(CsvBackend):
+    """
+    pandas' C engine, everything read as str. Chunks are DataFrames; a
+    compact load factorizes them column by column (to_table), so no
+    per-cell Python code runs at all.
+
+    The stream is cut into blocks of whole records (PANDAS_BLOCK_BYTES,
+    the first one small for a quick first screen) and every block is one
+    read_csv call: pandas' own chunked reader silently cuts a record with
+    extra fields when it starts a chunk. Records are read as
+    dialect.fields columns (short ones padded with ""); a longer record
+    raises BackendFallback.
+    """
+
+    name = "pandas"
+
+    def iter_chunks(self, stream, dialect, encoding, first_rows, rows, skip=0):
+        if not dialect.fields:
+            raise BackendFallback("Unknown number of fields")
+        for block in _record_blocks(stream, PANDAS_FIRST_BLOCK_BYTES, PANDAS_BLOCK_BYTES, dialect.quotechar):
+            chunk = self._parse_block(block, dialect, encoding)
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk = chunk.iloc[dropped:]
+                skip -= dropped
+            if len(chunk):
+                yield chunk
+
+    @staticmethod
+    def _parse_block(block: bytes, dialect: CsvDialect, encoding: str):
+        import warnings
+
+        import pandas as pd
+
+        with warnings.catch_warnings():
+            # "names do not match the data": a record had more fields
+            warnings.simplefilter("error", pd.errors.ParserWarning)
+            try:
+                return pd.read_csv(
+                    io.BytesIO(block),
+                    sep=dialect.delimiter,
+                    quotechar=dialect.quotechar,
+                    header=None,
+                    names=range(dialect.fields),
+                    index_col=False,
+                    dtype=str,
+                    na_filter=False,
+                    skip_blank_lines=False,
+                    encoding=encoding,
+                    engine="c",
+                    low_memory=False,
+                )
+            except (pd.errors.ParserError, pd.errors.ParserWarning) as e:
+                raise BackendFallback(str(e)) from e
+
+    def to_rows(self, chunk):
+        return chunk.to_numpy(dtype=object).tolist()
+
+    def to_table(self, chunk):
+        import pandas as pd
+        from models.compact_table import CompactTable
+
+        columns = []
+        for j in range(chunk.shape[1]):
+            codes, uniques = pd.factorize(chunk.iloc[:, j].to_numpy(dtype=object))
+            columns.append((uniques.tolist(), codes))
+        return CompactTable.from_column_codes(columns, len(chunk))
+
+
+def _record_blocks(stream, first_bytes: int, block_bytes: int, quotechar: str = '"'):
+    """Read a binary stream as blocks that each end at a record boundary."""
+    from services.csv_service import scan_record_offsets
+
+    carry = b""
+    size = first_bytes
+    while True:
+        data = stream.read(size)
+        if not data:
+            if carry:
+                yield carry
+            return
+        block = carry + data
+        # a block always starts at a record start, i.e. outside quotes
+        ends = array("Q")
+        scan_record_offsets(block, 0, ends, False, quotechar)
+        if not ends:
+            carry = block  # one record longer than the block: read more
+            continue
+        cut = ends[-1]
+        yield block[:cut]
+        carry = block[cut:]
+        size = block_bytes
+
+
+STDLIB_BACKEND = StdlibBackend()
+_BACKENDS = {backend.name: backend for backend in (STDLIB_BACKEND, PandasBackend())}
+
+
+def get_backend(name: str) -> CsvBackend:
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown CSV parser backend: {name!r}") from None
+
+
+def pandas_available() -> bool:
+    return importlib.util.find_spec("pandas") is not None
+
+
+def choose_backend(size: int, dialect: CsvDialect, requested: str = "auto") -> CsvBackend:
+    """
+    The backend for a file of `size` bytes.
+
+    - "stdlib" / "pandas" force a backend (pandas falls back to stdlib
+      when it isn't installed)
+    - "auto": pandas for big files with a plain dialect ('"' quotes, same
+      field count throughout the sample), stdlib for everything else
+    """
+    requested = requested or "auto"
+    if requested not in BACKEND_NAMES:
+        raise ValueError(f"Unknown CSV parser backend: {requested!r}")
+    if requested == "auto":
+        simple = dialect.quotechar == '"' and dialect.rectangular
+        requested = "pandas" if simple and size >= PANDAS_MIN_BYTES else "stdlib"
+    if requested == "pandas" and not pandas_available():
+        requested = "stdlib"
+    return get_backend(requested)
@@ -1,12 +1,545 @@
 # task_scheduler/services/csv_services.py
 import csv
-from typing import List, Tuple
+import hashlib
+import io
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from services import perf_service as perf
+from services.csv_backends import STDLIB_BACKEND, BackendFallback, CsvDialect, choose_backend, get_backend
+
+try:  # optional: numpy finds newlines in quote-free chunks much faster
+    import numpy as _np
+except ImportError:  # pragma: no cover - numpy ships with pandas
+    _np = None
+
+
+# Rows per yielded batch (bounded memory: only one batch is alive at a time)
+DEFAULT_BATCH_ROWS = 5000
+
+# Bytes read from the file per step (big reads suit network shares)
+READ_BUFFER_SIZE = 1024 * 1024
+
+# How much text is handed to csv.Sniffer
+SNIFF_SIZE = 4096
+SNIFF_DELIMITERS = [",", ";", "\t", "|"]
+
+# Bytes scanned per step when indexing row offsets / copying byte ranges
+INDEX_CHUNK_SIZE = 8 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Rows serialized per buffered write when saving
+WRITE_CHUNK_ROWS = 10000
+
+# Parallel parsing: files at least this big are split into byte ranges
+# parsed by a process pool (see iter_csv_parallel). Ranges are at least
+# PARALLEL_MIN_CHUNK_BYTES, about PARALLEL_CHUNKS_PER_WORKER per worker.
+PARALLEL_THRESHOLD_BYTES = 16 * 1024 * 1024
+PARALLEL_MIN_CHUNK_BYTES = 2 * 1024 * 1024
+PARALLEL_CHUNKS_PER_WORKER = 4
+# Bytes read per step when looking for a record boundary
+SPLIT_PROBE_SIZE = 64 * 1024
+# Records parsed per step inside one range
+RANGE_CHUNK_ROWS = 100_000
+
+# Tail refresh (check_file_tail): bytes hashed at the start and the end of
+# the loaded part to make sure it wasn't rewritten, and the largest growth
+# read as a tail (more is reloaded with progress instead)
+TAIL_CHECK_BYTES = 4096
+TAIL_MAX_BYTES = 64 * 1024 * 1024
+
+# Compressed files: the codec is detected from the first bytes of a file; saves
+# compress by the extension of the target name (see codec_for_save)
+CODEC_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+}
+CODEC_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+# Guess of how much a compressed CSV expands (to pick a parser or a table
+# model by size before it is read)
+COMPRESSED_SIZE_FACTOR = 8
+# Decompressed bytes per read-ahead block, and blocks kept ready
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024
+DECOMPRESS_AHEAD_BLOCKS = 4
+# gzip level for saves (gzip's own default; 9 is much slower for little gain)
+GZIP_LEVEL = 6
+
+
+class CsvBatch(NamedTuple):
+    """
+    One chunk of parsed rows.
+
+    - rows: list of rows, each a list of str (as_tables=True: a
+      models.compact_table.CompactTable holding them)
+    - bytes_read: bytes of the file consumed so far (for progress)
+    - total_bytes: size of the file on disk
+    """
+    rows: List[List[str]]
+    bytes_read: int
+    total_bytes: int
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    Raw binary stream wrapper that counts how many bytes were read.
+    Lets us report progress while csv.reader consumes a text stream.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        with perf.span("read"):
+            n = self._raw.readinto(b)
+        if n:
+            self.bytes_read += n
+        return n
+
+    def close(self):
+        try:
+            self._raw.close()
+        finally:
+            super().close()
+
+
+# ---------------------------------------------------------------------------
+# Compressed files (gzip, bz2, xz)
+# ---------------------------------------------------------------------------
+def _codec_of(head: bytes) -> str | None:
+    for codec, magic in CODEC_MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def detect_codec(path: str) -> str | None:
+    """Compression of a file by its first bytes: "gzip", "bz2", "xz" or None (plain)."""
+    with open(path, "rb") as f:
+        return _codec_of(f.read(max(map(len, CODEC_MAGIC.values()))))
+
+
+def codec_for_save(path: str) -> str | None:
+    """
+    Compression for saving to `path`: the one its extension asks for
+    (data.csv.gz), else the one of the file it replaces, so saving a
+    compressed file in place keeps it compressed.
+    """
+    codec = CODEC_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if codec is None:
+        try:
+            codec = detect_codec(path)
+        except OSError:
+            pass
+    return codec
+
+
+def _decompressor(stream, codec: str):
+    if codec == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if codec == "bz2":
+        import bz2
+
+        return bz2.BZ2File(stream, "rb")
+    import lzma
+
+    return lzma.LZMAFile(stream, "rb")
+
+
+class _ReadAhead(io.RawIOBase):
+    """
+    Raw stream that reads another one in blocks on a helper thread, up to
+    `depth` blocks ahead. File reads and zlib / bz2 / lzma release the GIL,
+    so reading and decompressing overlap with parsing. Errors of the
+    helper thread are raised by the next read.
+    """
+
+    def __init__(self, stream, block_size: int = DECOMPRESS_BLOCK_SIZE, depth: int = DECOMPRESS_AHEAD_BLOCKS):
+        self._queue: queue.Queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._block = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(
+            target=self._fill, args=(stream, block_size), name="csv-read-ahead", daemon=True
+        )
+        self._thread.start()
+
+    def _fill(self, stream, block_size: int):
+        try:
+            while True:
+                data = stream.read(block_size)
+                if not self._put(data) or not data:
+                    return
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._block:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._block = memoryview(item)
+        n = min(len(b), len(self._block))
+        b[:n] = self._block[:n]
+        self._block = self._block[n:]
+        return n
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        super().close()
+
+
+@contextmanager
+def open_csv_stream(path: str, buffer_size: int = READ_BUFFER_SIZE, read_ahead: bool = True):
+    """
+    Open a CSV file as a binary stream (context manager yielding
+    (counter, stream)). A compressed file (see CODEC_MAGIC) is decompressed
+    on the fly, on a read-ahead thread unless read_ahead=False; only its
+    compressed bytes are ever read from disk. counter.bytes_read counts
+    the bytes read from the file itself, so progress against its size on
+    disk works either way.
+    """
+    counter = _CountingReader(open(path, "rb"))
+    streams = [io.BufferedReader(counter, buffer_size=buffer_size)]
+    try:
+        codec = _codec_of(streams[0].peek(max(map(len, CODEC_MAGIC.values()))))
+        if codec is not None:
+            streams.append(_decompressor(streams[-1], codec))
+            if read_ahead:
+                streams.append(io.BufferedReader(_ReadAhead(streams[-1])))
+        yield counter, streams[-1]
+    finally:
+        # decompressors leave the stream they read from open
+        for stream in reversed(streams):
+            stream.close()
+
+
+@contextmanager
+def _compressing(out, codec: str | None, path: str):
+    """Wrap the binary file `out` into a compressor for `codec` (None: as it is)."""
+    if codec is None:
+        yield out
+        return
+    if codec == "gzip":
+        import gzip
+
+        # the name goes into the gzip header (instead of the temporary file's)
+        stream = gzip.GzipFile(os.path.basename(path), "wb", GZIP_LEVEL, out, mtime=0)
+    elif codec == "bz2":
+        import bz2
+
+        stream = bz2.BZ2File(out, "wb")
+    elif codec == "xz":
+        import lzma
+
+        stream = lzma.LZMAFile(out, "wb")
+    else:
+        raise ValueError(f"Unknown compression: {codec!r}")
+    try:
+        yield stream
+    finally:
+        stream.close()
+
+
+def sniff_delimiter(sample: str, default: str = ",") -> str:
+    """
+    Detect the delimiter of a CSV sample using csv.Sniffer,
+    falling back to `default` (comma).
+    """
+    return sniff_dialect(sample, default).delimiter
+
+
+def sniff_dialect(sample: str, default: str = ",") -> CsvDialect:
+    """
+    Detect delimiter and quote character of a CSV sample (csv.Sniffer,
+    falling back to `default` and '"') and the number of fields of its
+    complete records.
+    """
+    if not sample:
+        return CsvDialect(default)
+    try:
+        sniffed = csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS)
+        delimiter, quotechar = sniffed.delimiter, sniffed.quotechar or '"'
+    except Exception:
+        delimiter, quotechar = default, '"'
+
+    try:
+        reader = csv.reader(io.StringIO(sample, newline=""), delimiter=delimiter, quotechar=quotechar)
+        widths = [len(row) for row in reader if row]
+    except csv.Error:
+        widths = []
+    if len(sample) >= SNIFF_SIZE:
+        widths = widths[:-1]  # the last record may be cut off
+    if not widths:
+        return CsvDialect(delimiter, quotechar, rectangular=False)
+    return CsvDialect(delimiter, quotechar, rectangular=min(widths) == max(widths), fields=max(widths))
+
+
+def read_sample(path: str, encoding: str = "utf-8", size: int = SNIFF_SIZE) -> str:
+    """
+    Read the first `size` characters of a text file (for sniffing),
+    decompressed if the file is compressed.
+    """
+    with open_csv_stream(path, buffer_size=SNIFF_SIZE, read_ahead=False) as (_counter, stream):
+        return io.TextIOWrapper(stream, encoding=encoding, newline="", errors="replace").read(size)
+
+
+def iter_csv_batches(
+    path: str,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    encoding: str = "utf-8",
+    delimiter: str | None = None,
+    first_batch_size: int | None = None,
+    dialect: CsvDialect | None = None,
+    backend: str = "stdlib",
+    as_tables: bool = False,
+) -> Iterator[CsvBatch]:
+    """
+    Stream a CSV file as fixed-size batches of rows.
+
+    - only one batch is held in memory at a time
+    - every batch carries bytes_read / total_bytes for progress reporting
+    - if neither dialect nor delimiter is given it is detected with
+      sniff_dialect (fallback: comma)
+    - first_batch_size lets callers get a small first batch quickly
+      (e.g. to show the first screen of rows right away)
+    - backend: parser backend name (see services.csv_backends; "auto"
+      picks one by size and dialect). The default stays on csv.reader,
+      which round-trips every file exactly.
+    - as_tables=True yields every batch encoded as a CompactTable
+      (vectorized with the pandas backend)
+
+    If the backend gives up midway (BackendFallback), the rest of the file
+    is parsed by the stdlib backend, continuing after the rows already
+    yielded.
+
+    Compressed files (gzip, bz2, xz) are decompressed while they are read
+    (open_csv_stream); bytes_read / total_bytes are their compressed bytes.
+    """
+    if dialect is None:
+        dialect = sniff_dialect(read_sample(path, encoding))
+    if delimiter is not None:
+        dialect = dialect._replace(delimiter=delimiter)
+
+    total = os.path.getsize(path)
+    expanded = total * COMPRESSED_SIZE_FACTOR if detect_codec(path) is not None else total
+    parser = choose_backend(expanded, dialect, backend)
+    done = 0  # records yielded so far
+    while True:
+        try:
+            with open_csv_stream(path) as (counter, stream):
+                chunks = parser.iter_chunks(
+                    stream, dialect, encoding, (first_batch_size or batch_size) if not done else batch_size, batch_size, skip=done
+                )
+                for chunk in chunks:
+                    rows = parser.to_table(chunk) if as_tables else parser.to_rows(chunk)
+                    done += len(chunk)
+                    yield CsvBatch(rows, counter.bytes_read, total)
+            return
+        except BackendFallback:
+            if parser is STDLIB_BACKEND:
+                raise
+            parser = STDLIB_BACKEND
+
+
+# ---------------------------------------------------------------------------
+# Parallel parsing (byte ranges split at record boundaries)
+# ---------------------------------------------------------------------------
+def use_parallel_parse(size: int, workers: int | None = None) -> bool:
+    """Whether a file of `size` bytes is worth parsing with iter_csv_parallel."""
+    workers = workers or os.cpu_count() or 1
+    return workers > 1 and size >= PARALLEL_THRESHOLD_BYTES
+
+
+def _next_record_start(f, offset: int, in_quotes: bool, quotechar: str = '"') -> int | None:
+    """First record start after `offset` (quote state at `offset` given), or None at EOF."""
+    f.seek(offset)
+    pos = offset
+    while True:
+        chunk = f.read(SPLIT_PROBE_SIZE)
+        if not chunk:
+            return None
+        found = array("Q")
+        in_quotes = scan_record_offsets(chunk, pos, found, in_quotes, quotechar)
+        if found:
+            return found[0]
+        pos += len(chunk)
+
+
+def split_record_ranges(path: str, parts: int, quotechar: str = '"') -> List[Tuple[int, int]]:
+    """
+    Split a CSV file into about `parts` (start, end) byte ranges that each
+    hold whole records, so they can be parsed independently.
+
+    The file is cut near equally spaced offsets, at the first newline
+    that ends a record. Whether a newline is inside a quoted field follows
+    from the parity of the quote characters before it (as in
+    scan_record_offsets), so the quotes up to every cut are counted - one
+    sequential bytes.count() pass, much cheaper than parsing.
+    """
+    quote = quotechar.encode()
+    size = os.path.getsize(path)
+    starts = [0]
+    quotes = 0
+    pos = 0
+    with open(path, "rb") as f:
+        for k in range(1, max(parts, 1)):
+            target = size * k // parts
+            if target <= starts[-1]:
+                continue
+            f.seek(pos)
+            while pos < target:
+                chunk = f.read(min(INDEX_CHUNK_SIZE, target - pos))
+                if not chunk:
+                    break
+                quotes += chunk.count(quote)
+                pos += len(chunk)
+            start = _next_record_start(f, target, bool(quotes & 1), quotechar)
+            if start is None or start >= size:
+                break
+            starts.append(start)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def parse_csv_range(
+    path: str,
+    start: int,
+    end: int,
+    encoding: str = "utf-8",
+    dialect: CsvDialect = CsvDialect(),
+    backend: str = "stdlib",
+    as_tables: bool = False,
+):
+    """
+    Parse the records in bytes [start, end) of a file (worker side of
+    iter_csv_parallel). Returns the rows, or with as_tables=True one
+    CompactTable - much cheaper to send back than the rows.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        return _parse_bytes(data, encoding, dialect, get_backend(backend), as_tables)
+    except BackendFallback:
+        return _parse_bytes(data, encoding, dialect, STDLIB_BACKEND, as_tables)
+
+
+def _parse_bytes(data: bytes, encoding: str, dialect: CsvDialect, parser, as_tables: bool):
+    result = None
+    for chunk in parser.iter_chunks(io.BytesIO(data), dialect, encoding, RANGE_CHUNK_ROWS, RANGE_CHUNK_ROWS):
+        part = parser.to_table(chunk) if as_tables else parser.to_rows(chunk)
+        if result is None:
+            result = part
+        elif as_tables:
+            result.append_table(part)
+        else:
+            result.extend(part)
+    if result is None:
+        result = STDLIB_BACKEND.to_table([]) if as_tables else []
+    return result
+
+
+def iter_csv_parallel(
+    path: str,
+    encoding: str = "utf-8",
+    delimiter: str | None = None,
+    workers: int | None = None,
+    as_tables: bool = False,
+    chunk_bytes: int | None = None,
+    dialect: CsvDialect | None = None,
+    backend: str = "stdlib",
+) -> Iterator[CsvBatch]:
+    """
+    Parse a CSV file on all cores: the file is split into byte ranges at
+    record boundaries (split_record_ranges), the ranges are parsed in a
+    process pool and the results are yielded in file order as CsvBatch
+    items (one per range; bytes_read = end of the range).
+
+    - as_tables=True: each range comes back encoded as a CompactTable
+      (built in the worker); otherwise as plain rows
+    - dialect / delimiter / backend as for iter_csv_batches; the backend is
+      chosen once for the whole file
+    - only about two ranges per worker are in flight, so memory stays
+      bounded however big the file is
+    - closing the generator (cancel) drops the queued ranges
+
+    A compressed file has no byte ranges to split; it is streamed by
+    iter_csv_batches instead.
+    """
+    if dialect is None:
+        dialect = sniff_dialect(read_sample(path, encoding))
+    if delimiter is not None:
+        dialect = dialect._replace(delimiter=delimiter)
+    if detect_codec(path) is not None:
+        yield from iter_csv_batches(
+            path, RANGE_CHUNK_ROWS, encoding, dialect=dialect, backend=backend, as_tables=as_tables
+        )
+        return
+    workers = workers or os.cpu_count() or 1
+    total = os.path.getsize(path)
+    backend = choose_backend(total, dialect, backend).name
+    chunk_bytes = chunk_bytes or max(PARALLEL_MIN_CHUNK_BYTES, total // (workers * PARALLEL_CHUNKS_PER_WORKER))
+    ranges = iter(split_record_ranges(path, max(1, -(-total // chunk_bytes)), dialect.quotechar))
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque = deque()
+    try:
+        def submit():
+            item = next(ranges, None)
+            if item is not None:
+                start, end = item
+                future = pool.submit(parse_csv_range, path, start, end, encoding, dialect, backend, as_tables)
+                pending.append((future, end))
+
+        for _ in range(workers * 2):
+            submit()
+        while pending:
+            future, end = pending.popleft()
+            result = future.result()
+            submit()
+            yield CsvBatch(result, end, total)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def load_csv_file(
     path: str,
     encoding: str = "utf-8",
     delimiter: str | None = None,
+    backend: str = "stdlib",
 ) -> Tuple[List[str], List[List[str]]]:
     """
     Load a CSV file and return (headers, rows).
@@ -15,22 +548,14 @@ def load_csv_file(
     - rows: list of data rows, each a list of str
 
     If delimiter is None, try to detect it using csv.Sniffer
-    and fall back to comma.
-    """
-    with open(path, "r", encoding=encoding, newline="") as f:
-        # read a small sample for sniffing
-        sample = f.read(4096)
-        f.seek(0)
-
-        if delimiter is None:
-            try:
-                dialect = csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", "|"])
-                delimiter = dialect.delimiter
-            except Exception:
-                delimiter = ","  # fallback
+    and fall back to comma. backend: see iter_csv_batches.
 
-        reader = csv.reader(f, delimiter=delimiter)
-        rows = list(reader)
+    This materializes the whole file; prefer iter_csv_batches()
+    for anything that can be processed batch by batch.
+    """
+    rows: List[List[str]] = []
+    for batch in iter_csv_batches(path, encoding=encoding, delimiter=delimiter, backend=backend):
+        rows.extend(batch.rows)
 
     if not rows:
         return [], []
@@ -38,3 +563,388 @@ def load_csv_file(
     headers = rows[0]
     data_rows = rows[1:]
     return headers, data_rows
+
+
+# ---------------------------------------------------------------------------
+# Row offsets (byte positions of records in the file)
+# ---------------------------------------------------------------------------
+def scan_record_offsets(
+    chunk: bytes,
+    base: int,
+    offsets: array,
+    in_quotes: bool = False,
+    quotechar: str = '"',
+) -> bool:
+    """
+    Append to `offsets` the file offset following every record-ending
+    newline in `chunk` (which starts at file offset `base`) and return the
+    quote state at the end of the chunk.
+
+    Quote aware: a newline inside a quoted field does not end a record.
+    The parity of `quotechar` characters tells us whether we are inside
+    quotes (escaped quotes "" count twice, so they don't change the parity).
+    """
+    quote = quotechar.encode()
+    quotes = chunk.count(quote)
+
+    if quotes == 0 and not in_quotes and _np is not None:
+        # fast path: no quotes at all -> every newline ends a record
+        newlines = _np.flatnonzero(_np.frombuffer(chunk, dtype=_np.uint8) == 0x0A)
+        if len(newlines):
+            offsets.frombytes((newlines + (base + 1)).astype(_np.uint64).tobytes())
+        return in_quotes
+
+    pos = 0
+    find = chunk.find
+    count = chunk.count
+    while True:
+        nl = find(b"\n", pos)
+        if nl == -1:
+            # carry the quote state of the unfinished line
+            if quotes and count(quote, pos) & 1:
+                in_quotes = not in_quotes
+            return in_quotes
+        if quotes and count(quote, pos, nl) & 1:
+            in_quotes = not in_quotes
+        pos = nl + 1
+        if not in_quotes:
+            offsets.append(base + pos)
+
+
+def index_row_offsets(
+    path: str,
+    progress: Callable[[int, int], None] | None = None,
+    quotechar: str = '"',
+) -> array:
+    """
+    Return an array('Q') with the byte offset where every record of the
+    file starts (quote aware, so embedded newlines are handled; the
+    file's quote character is `quotechar`).
+    """
+    offsets = array("Q")
+    size = os.path.getsize(path)
+    if not size:
+        return offsets
+    offsets.append(0)
+
+    in_quotes = False
+    pos = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(INDEX_CHUNK_SIZE)
+            if not chunk:
+                break
+            in_quotes = scan_record_offsets(chunk, pos, offsets, in_quotes, quotechar)
+            pos += len(chunk)
+            if progress is not None:
+                progress(pos, size)
+
+    # a trailing newline doesn't start another row
+    if offsets[-1] >= size:
+        offsets.pop()
+    return offsets
+
+
+# ---------------------------------------------------------------------------
+# Tail reads: files that only grew since they were loaded (logs)
+# ---------------------------------------------------------------------------
+class TailMark(NamedTuple):
+    """
+    Where a loaded file ended. check_file_tail compares the file with it
+    later: the first and last TAIL_CHECK_BYTES before `size` must still
+    hash to `digest` for the file to count as only appended to. New
+    records are found with the file's quote character, `quotechar`.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    digest: bytes
+    quotechar: str = '"'
+
+
+class FileTail(NamedTuple):
+    """
+    Result of check_file_tail.
+
+    - status: "same", "grown", "changed" or "missing"
+    - grown: start / end = byte range of the new complete records (empty
+      while a record is still being written), offsets = where they start,
+      mark = the new end to check against next time
+    """
+    status: str
+    start: int = 0
+    end: int = 0
+    offsets: array = array("Q")
+    mark: TailMark | None = None
+
+
+def _edge_digest(f, size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    f.seek(0)
+    digest.update(f.read(min(size, TAIL_CHECK_BYTES)))
+    start = max(0, size - TAIL_CHECK_BYTES)
+    f.seek(start)
+    digest.update(f.read(size - start))
+    return digest.digest()
+
+
+def mark_file_end(
+    path: str,
+    size: int | None = None,
+    mtime_ns: int | None = None,
+    quotechar: str = '"',
+) -> TailMark | None:
+    """
+    TailMark for the current end of a file. With size / mtime_ns (e.g. of
+    the SourceFile a table was loaded from) None is returned if the file
+    no longer has them. Also None if the file doesn't end with a newline:
+    its last record may be incomplete, so appended bytes could belong to it;
+    and for a compressed file, whose bytes aren't records at all.
+    """
+    try:
+        with open(path, "rb") as f:
+            if _codec_of(f.read(max(map(len, CODEC_MAGIC.values())))) is not None:
+                return None
+            st = os.fstat(f.fileno())
+            if size is not None and st.st_size != size:
+                return None
+            if mtime_ns is not None and st.st_mtime_ns != mtime_ns:
+                return None
+            if st.st_size:
+                f.seek(st.st_size - 1)
+                if f.read(1) != b"\n":
+                    return None
+            return TailMark(path, st.st_size, st.st_mtime_ns, _edge_digest(f, st.st_size), quotechar)
+    except OSError:
+        return None
+
+
+def check_file_tail(mark: TailMark, max_bytes: int = TAIL_MAX_BYTES) -> FileTail:
+    """
+    Compare a file with a TailMark:
+
+    - "same": size and mtime unchanged
+    - "grown": only appended to (the checked edges are unchanged); the new
+      complete records are found with scan_record_offsets, so a record
+      that is half written is left for the next check
+    - "changed": shrank, rewritten (same size, new mtime or different
+      edges), or grew by more than max_bytes - a full reload with progress
+      is the better deal then
+    - "missing": the file can't be read (deleted, rotated away)
+    """
+    try:
+        with open(mark.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size == mark.size and st.st_mtime_ns == mark.mtime_ns:
+                return FileTail("same")
+            if st.st_size <= mark.size or st.st_size - mark.size > max_bytes:
+                return FileTail("changed")
+            if _edge_digest(f, mark.size) != mark.digest:
+                return FileTail("changed")
+            f.seek(mark.size)
+            data = f.read(st.st_size - mark.size)
+
+            found = array("Q")
+            scan_record_offsets(data, mark.size, found, False, mark.quotechar)
+            if not found:
+                # nothing complete yet; check again from the same mark
+                return FileTail("grown", mark.size, mark.size, array("Q"), mark)
+            end = found.pop()  # the offset after the last record-ending newline
+            new_mark = TailMark(mark.path, end, st.st_mtime_ns, _edge_digest(f, end), mark.quotechar)
+    except OSError:
+        return FileTail("missing")
+
+    offsets = array("Q", [mark.size])
+    offsets.extend(found)
+    return FileTail("grown", mark.size, end, offsets, new_mark)
+
+
+# ---------------------------------------------------------------------------
+# Saving: atomic writes, partial saves (copy unchanged bytes, re-encode
+# only changed rows) and full buffered writes
+# ---------------------------------------------------------------------------
+class SaveCancelled(Exception):
+    """Raised inside a save when the caller asked to cancel it."""
+
+
+@contextmanager
+def atomic_write(path: str):
+    """
+    Yield a binary file object for a temporary file next to `path`.
+    On success the data is flushed, fsync'ed and moved over `path` with
+    os.replace, so a crash mid-write never leaves a truncated file.
+    On any error (or SaveCancelled) the temporary file is removed.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)  # mkstemp files are private (0600)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _copy_range(src, dst, start: int, end: int):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise IOError("Source file is shorter than expected")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def _line_terminator(raw: bytes) -> str:
+    if raw.endswith(b"\r\n"):
+        return "\r\n"
+    if raw.endswith(b"\n"):
+        return "\n"
+    return ""
+
+
+def encode_rows(
+    rows: Iterable[List[str]],
+    delimiter: str = ",",
+    lineterminator: str = "\r\n",
+) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=delimiter, lineterminator=lineterminator)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def append_csv_rows(
+    path: str,
+    rows: List[List[str]],
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+):
+    """
+    Append rows to the end of an existing CSV file (a true append: the
+    existing bytes are not read or rewritten).
+    """
+    with open(path, "r+b") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        lineterminator = "\r\n"
+        if size:
+            f.seek(max(0, size - 2))
+            tail = f.read()
+            if tail.endswith(b"\n"):
+                lineterminator = _line_terminator(tail)
+            else:
+                # last record has no newline yet
+                f.write(lineterminator.encode(encoding))
+        f.seek(0, os.SEEK_END)
+        f.write(encode_rows(rows, delimiter, lineterminator).encode(encoding))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def patch_csv_file(
+    src_path: str,
+    dst_path: str,
+    offsets: array,
+    changed_rows: Iterable[int],
+    get_row: Callable[[int], List[str]],
+    appended_rows: Iterable[List[str]] = (),
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+    cancelled: Callable[[], bool] | None = None,
+):
+    """
+    Write `dst_path` as a copy of `src_path` where only the rows in
+    `changed_rows` are re-encoded (their cells come from get_row(r));
+    every other byte range is copied verbatim. `offsets` are the record
+    offsets of the source (see index_row_offsets). `appended_rows` go at
+    the end. The result is written atomically (see atomic_write), so
+    dst_path may be the source file itself.
+    """
+    size = os.path.getsize(src_path)
+
+    with atomic_write(dst_path) as out:
+        with open(src_path, "rb") as src:
+            pos = 0
+            for r in sorted(changed_rows):
+                if cancelled is not None and cancelled():
+                    raise SaveCancelled()
+                start = offsets[r]
+                end = offsets[r + 1] if r + 1 < len(offsets) else size
+                _copy_range(src, out, pos, start)
+
+                # keep the row's own line ending (none for an unterminated last row)
+                src.seek(start)
+                lineterminator = _line_terminator(src.read(end - start))
+                out.write(
+                    encode_rows([get_row(r)], delimiter, lineterminator).encode(encoding)
+                )
+                pos = end
+            _copy_range(src, out, pos, size)
+
+            src.seek(max(0, size - 2))
+            tail = src.read()
+
+        appended_rows = list(appended_rows)
+        if appended_rows:
+            lineterminator = _line_terminator(tail) or "\r\n"
+            if tail and not tail.endswith(b"\n"):
+                # last record has no newline yet
+                out.write(lineterminator.encode(encoding))
+            out.write(
+                encode_rows(appended_rows, delimiter, lineterminator).encode(encoding)
+            )
+
+
+def write_csv_atomic(
+    path: str,
+    rows: Iterable[List[str]],
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+    total_rows: int | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    chunk_rows: int = WRITE_CHUNK_ROWS,
+    codec: str | None = None,
+) -> int:
+    """
+    Serialize rows to `path` in large buffered chunks and replace the file
+    atomically at the end. Returns the number of rows written.
+
+    - progress(rows_written, total_rows) is called after every chunk
+    - cancelled() is checked between chunks; cancelling raises SaveCancelled
+      and leaves the existing file untouched
+    - codec: compress the file ("gzip", "bz2" or "xz"; see codec_for_save)
+    """
+    written = 0
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=delimiter)
+
+    with atomic_write(path) as raw, _compressing(raw, codec, path) as out:
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+            if written % chunk_rows == 0:
+                if cancelled is not None and cancelled():
+                    raise SaveCancelled()
+                out.write(buf.getvalue().encode(encoding))
+                buf.seek(0)
+                buf.truncate()
+                if progress is not None:
+                    progress(written, total_rows)
+        out.write(buf.getvalue().encode(encoding))
+
+    if progress is not None:
+        progress(written, total_rows)
+    return written
@@ -0,0 +1,279 @@
+# src/services/diff_service.py
+from array import array
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+from services.bulk_service import index_to_col_name
+
+# numpy is imported inside the functions (heavy import, only needed once a
+# diff actually runs). Nothing in here imports tkinter.
+
+# Modified rows whose changed cells are worked out (their new values are
+# held until the old side is read again); beyond that, modified rows are
+# still found, only without the cell detail.
+DETAIL_ROW_LIMIT = 200_000
+
+# Rows between progress reports / cancel checks
+PROGRESS_ROWS = 50_000
+
+# A row source is called for a fresh iterator over the rows of one side,
+# e.g. lambda: snapshot.iter_rows(). The old side is read twice (hashes,
+# then the cells of modified rows), the new side once.
+RowSource = Callable[[], Iterable[Sequence[str]]]
+
+
+class TableDiff(NamedTuple):
+    """
+    What changed from an old to a new version of a table (0-based rows).
+
+    - inserted: rows of the new table not in the old one
+    - deleted: rows of the old table not in the new one
+    - modified: (old row, new row) pairs, shape (n, 2), matched by key
+      (or by position between unchanged rows) but with different cells
+    - cells: new row -> changed columns, for the first DETAIL_ROW_LIMIT
+      modified rows (rows without detail changed as a whole)
+    - key_columns: the key the rows were matched by (empty: whole rows)
+    """
+    old_rows: int
+    new_rows: int
+    inserted: "numpy.ndarray"
+    deleted: "numpy.ndarray"
+    modified: "numpy.ndarray"
+    cells: Dict[int, List[int]]
+    key_columns: tuple = ()
+
+    @property
+    def changed(self) -> bool:
+        return bool(len(self.inserted) or len(self.deleted) or len(self.modified))
+
+    def summary(self) -> str:
+        cells = sum(len(c) for c in self.cells.values())
+        return (
+            f"{len(self.inserted):,} inserted, {len(self.deleted):,} deleted, "
+            f"{len(self.modified):,} modified row(s) ({cells:,} cells)"
+        )
+
+
+def _trimmed(row: Sequence[str]) -> tuple:
+    # trailing empty cells don't count: "a,b" and "a,b," (or a row padded
+    # to the table width) are the same row
+    n = len(row)
+    while n and not row[n - 1]:
+        n -= 1
+    return tuple(row[:n]) if n != len(row) else tuple(row)
+
+
+def check_key_columns(key_columns: Sequence[int], width: int, side: str) -> None:
+    """
+    Raise ValueError if a key column is past the `width` columns of a
+    table's header / first row (its rows would all share an empty key).
+    """
+    outside = [c for c in key_columns if c >= width]
+    if outside:
+        names = ", ".join(index_to_col_name(c) for c in outside)
+        raise ValueError(f"The {side} has no key column {names} (its first row has {width} column(s)).")
+
+
+def _key_function(key_columns: Sequence[int]):
+    """row -> hash of its key cells (missing cells count as empty)."""
+    get = itemgetter(*key_columns)
+    width = max(key_columns) + 1
+
+    def key_hash(row: tuple) -> int:
+        if len(row) < width:
+            row = row + ("",) * (width - len(row))
+        return hash(get(row))
+
+    return key_hash
+
+
+def _changed_columns(old: tuple, new: tuple) -> List[int]:
+    width = max(len(old), len(new))
+    old = old + ("",) * (width - len(old))
+    new = new + ("",) * (width - len(new))
+    return [c for c in range(width) if old[c] != new[c]]
+
+
+def _index_keys(keys):
+    """
+    Hash map key hash -> first old row with that key, plus the next old
+    row with the same key for every row (-1: none). Matching consumes a
+    key's rows in order, so duplicate keys pair up first with first.
+    """
+    import numpy as np
+
+    n = len(keys)
+    # built right to left, so the first row of every key wins
+    index = dict(zip(keys[::-1].tolist(), range(n - 1, -1, -1)))
+    next_same = None
+    if len(index) < n:
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1])
+        next_same = np.full(n, -1, dtype=np.int64)
+        next_same[order[same]] = order[same + 1]
+    return index, next_same
+
+
+def diff_tables(
+    old: RowSource,
+    new: RowSource,
+    key_columns: Sequence[int] = (),
+    detail_limit: int = DETAIL_ROW_LIMIT,
+    cancelled: Callable[[], bool] | None = None,
+    progress: Callable[[str, int], None] | None = None,
+) -> TableDiff | None:
+    """
+    Diff two versions of a table in O(rows) with hash maps.
+
+    - the old side is hashed (two 64-bit hashes per row: key and whole
+      row), the new side is streamed against it; memory grows with the
+      number of old rows and changes, not with the width of the rows
+    - key_columns: rows are matched by these columns' values (duplicate
+      keys pair up in order); without a key identical rows are matched
+      and a changed row pairs up with the old row at the same distance
+      from the last unchanged row
+    - the changed cells of modified rows are found in a second pass over
+      the old side
+
+    Rows that hash the same are taken as equal (64-bit hashes: a wrong
+    match is about as likely as a disk error). progress(phase, rows) is
+    called every PROGRESS_ROWS rows; returns None once cancelled().
+    Raises ValueError if a key column is past the first row of either
+    side (check_key_columns).
+    """
+    import numpy as np
+
+    cancelled = cancelled or (lambda: False)
+    key_columns = tuple(key_columns)
+    key_hash_of = _key_function(key_columns) if key_columns else hash
+
+    # old side: hashes only
+    key_hashes = array("q")
+    row_hashes = array("q")
+    n_old = 0
+    for row in old():
+        if not n_old and key_columns:
+            check_key_columns(key_columns, len(row), "old version")
+        row = _trimmed(row)
+        row_hash = hash(row)
+        row_hashes.append(row_hash)
+        key_hashes.append(key_hash_of(row) if key_columns else row_hash)
+        n_old += 1
+        if not n_old % PROGRESS_ROWS:
+            if cancelled():
+                return None
+            if progress is not None:
+                progress("hashing old rows", n_old)
+    keys = np.frombuffer(key_hashes, dtype=np.int64) if n_old else np.zeros(0, dtype=np.int64)
+    index, next_same = _index_keys(keys)
+    del key_hashes, keys
+
+    matched = bytearray(n_old)  # (per-row indexing of plain buffers beats numpy scalars)
+    inserted = array("q")
+    pairs = array("q")  # old row, new row, ...
+    detail: Dict[int, tuple] = {}  # old row -> (new row, new cells)
+    unpaired = array("q")  # without a key: new row, candidate old row, ...
+    kept: Dict[int, tuple] = {}  # their cells, for when they pair up
+
+    # new side: streamed against the map
+    last_old = last_new = -1
+    j = -1
+    for j, row in enumerate(new()):
+        if not j and key_columns:
+            check_key_columns(key_columns, len(row), "new version")
+        row = _trimmed(row)
+        row_hash = hash(row)
+        key_hash = key_hash_of(row) if key_columns else row_hash
+        i = index.get(key_hash)
+        if i is not None:
+            # consume: the key's next old row is matched next time
+            nxt = -1 if next_same is None else int(next_same[i])
+            if nxt < 0:
+                del index[key_hash]
+            else:
+                index[key_hash] = nxt
+            matched[i] = 1
+            if not key_columns:
+                last_old, last_new = i, j
+            elif row_hashes[i] != row_hash:
+                pairs.append(i)
+                pairs.append(j)
+                if len(detail) < detail_limit:
+                    detail[i] = (j, row)
+        elif key_columns:
+            inserted.append(j)
+        else:
+            unpaired.append(j)
+            unpaired.append(last_old + (j - last_new))
+            if len(kept) < detail_limit:
+                kept[j] = row
+        if not (j + 1) % PROGRESS_ROWS:
+            if cancelled():
+                return None
+            if progress is not None:
+                progress("matching new rows", j + 1)
+    n_new = j + 1
+
+    # without a key: changed rows in place of an old row pair up with it
+    for k in range(0, len(unpaired), 2):
+        j, i = unpaired[k], unpaired[k + 1]
+        if 0 <= i < n_old and not matched[i]:
+            matched[i] = 1
+            pairs.append(i)
+            pairs.append(j)
+            row = kept.pop(j, None)
+            if row is not None:
+                detail[i] = (j, row)
+        else:
+            inserted.append(j)
+    del index, kept
+
+    # cell detail: read the old side again for the modified rows only
+    cells: Dict[int, List[int]] = {}
+    if detail:
+        remaining = len(detail)
+        for i, row in enumerate(old()):
+            hit = detail.get(i)
+            if hit is not None:
+                j, new_row = hit
+                cells[j] = _changed_columns(_trimmed(row), new_row)
+                remaining -= 1
+                if not remaining:
+                    break
+            if not (i + 1) % PROGRESS_ROWS:
+                if cancelled():
+                    return None
+                if progress is not None:
+                    progress("comparing cells", i + 1)
+
+    inserted = np.sort(np.frombuffer(inserted, dtype=np.int64)) if len(inserted) else np.zeros(0, dtype=np.int64)
+    modified = np.frombuffer(pairs, dtype=np.int64).reshape(-1, 2) if len(pairs) else np.zeros((0, 2), dtype=np.int64)
+    modified = modified[np.argsort(modified[:, 1], kind="stable")]
+    return TableDiff(
+        old_rows=n_old,
+        new_rows=n_new,
+        inserted=inserted,
+        deleted=np.flatnonzero(np.frombuffer(matched, dtype=np.uint8) == 0),
+        modified=modified,
+        cells=cells,
+        key_columns=key_columns,
+    )
+
+
+def csv_rows(path: str, dialect=None) -> RowSource:
+    """
+    A row source streaming a CSV file in batches (the dialect is sniffed
+    once if not given). csv.reader is used: the diff needs rows as lists,
+    which the vectorized backends only build at extra cost.
+    """
+    from services.csv_service import iter_csv_batches, read_sample, sniff_dialect
+
+    if dialect is None:
+        dialect = sniff_dialect(read_sample(path))
+
+    def rows() -> Iterator[Sequence[str]]:
+        for batch in iter_csv_batches(path, dialect=dialect):
+            yield from batch.rows
+
+    return rows
@@ -1,3 +1,513 @@
 # task_scheduler/services/excel_services.py
-from typing import List
+import math
+import os
+import posixpath
+import re
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Mapping, NamedTuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
 
+from services.csv_service import SaveCancelled, _copy_range, atomic_write
+
+
+# Excel's hard limits per worksheet
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLS = 16_384
+
+# Rows between progress reports / cancel checks
+EXPORT_CHUNK_ROWS = 10000
+
+# Rows per batch handed to the table while importing a sheet
+IMPORT_BATCH_ROWS = 5000
+
+# Bytes read from the start of a worksheet part to find its <dimension>
+DIMENSION_PEEK_SIZE = 64 * 1024
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_WORKBOOK_RELS = "xl/_rels/workbook.xml.rels"
+_CONTENT_TYPES = "[Content_Types].xml"
+_CALC_CHAIN = "xl/calcChain.xml"
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+
+def _sheet_title(base: str, index: int) -> str:
+    # sheet titles are limited to 31 characters
+    title = base if index == 1 else f"{base} ({index})"
+    return title[-31:] if len(title) > 31 else title
+
+
+def export_rows_to_xlsx(
+    path: str,
+    rows: Iterable[List[str]],
+    total_rows: int | None = None,
+    sheet_name: str = "Sheet",
+    progress: Callable[[int, int | None], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> int:
+    """
+    Stream rows into a new .xlsx file and return the number of worksheets.
+
+    - uses openpyxl's write-only workbook: rows go straight to the sheet
+      XML on disk, so memory doesn't grow with the row count
+    - a new worksheet is started every EXCEL_MAX_ROWS rows
+      ("Sheet", "Sheet (2)", ...); columns past EXCEL_MAX_COLS are dropped
+    - cell values are written as text, exactly as in the table
+    - the file is written atomically (see csv_service.atomic_write)
+    """
+    # optional dependency, only needed for Excel export
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    wb = Workbook(write_only=True)
+    ws = None
+    sheets = 0
+    in_sheet = EXCEL_MAX_ROWS
+    written = 0
+
+    for row in rows:
+        if in_sheet >= EXCEL_MAX_ROWS:
+            sheets += 1
+            ws = wb.create_sheet(title=_sheet_title(sheet_name, sheets))
+            in_sheet = 0
+
+        if len(row) > EXCEL_MAX_COLS:
+            row = row[:EXCEL_MAX_COLS]
+        # control characters are not allowed in xlsx cells (and an error
+        # inside ws.append would break the write-only sheet), so check first
+        if ILLEGAL_CHARACTERS_RE.search("".join(row)):
+            row = [ILLEGAL_CHARACTERS_RE.sub("", v) for v in row]
+        ws.append(row)
+
+        in_sheet += 1
+        written += 1
+        if written % EXPORT_CHUNK_ROWS == 0:
+            if cancelled is not None and cancelled():
+                raise SaveCancelled()
+            if progress is not None:
+                progress(written, total_rows)
+
+    if ws is None:
+        sheets = 1
+        wb.create_sheet(title=_sheet_title(sheet_name, 1))
+
+    with atomic_write(path) as f:
+        wb.save(f)
+
+    if progress is not None:
+        progress(written, total_rows)
+    return sheets
+
+
+# ---------------------------
+# Import
+# ---------------------------
+class SheetInfo(NamedTuple):
+    """
+    A worksheet as listed in the workbook, before any cell is parsed.
+    rows / cols come from the sheet's <dimension> and are None when the
+    writer didn't record it.
+    """
+    name: str
+    part: str
+    dimension: str | None
+    rows: int | None
+    cols: int | None
+
+
+class ExcelBatch(NamedTuple):
+    rows: List[List[str]]
+    rows_read: int
+    total_rows: int | None
+
+
+def _column_number(letters: bytes) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ch - 64
+    return n
+
+
+def _column_letters(n: int) -> bytes:
+    letters = b""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = bytes((65 + rem,)) + letters
+    return letters
+
+
+def _read_dimension(zf: zipfile.ZipFile, part: str) -> tuple[str | None, int | None, int | None]:
+    """Peek at the start of a worksheet part; the sheet data is not read."""
+    try:
+        with zf.open(part) as f:
+            head = f.read(DIMENSION_PEEK_SIZE)
+    except KeyError:
+        return None, None, None
+    m = _DIMENSION_RE.search(head)
+    if m is None:
+        return None, None, None
+    c1, r1, c2, r2 = m.groups()
+    if c2 is None:
+        c2, r2 = c1, r1
+    rows = int(r2) - int(r1) + 1
+    cols = _column_number(c2) - _column_number(c1) + 1
+    return m.group(0).split(b'"')[1].decode("ascii"), rows, cols
+
+
+def list_sheets(path: str) -> List[SheetInfo]:
+    """
+    Sheet names and sizes of an .xlsx/.xlsm file, in workbook order.
+
+    Only the workbook part, its relationships and the first few KB of each
+    worksheet are read, so this is fast even for huge workbooks.
+    """
+    with zipfile.ZipFile(path) as zf:
+        sheets = []
+        for name, part in _sheet_parts(zf):
+            dimension, rows, cols = _read_dimension(zf, part)
+            sheets.append(SheetInfo(name, part, dimension, rows, cols))
+        return sheets
+
+
+def _sheet_parts(zf: zipfile.ZipFile) -> List[tuple[str, str]]:
+    """(sheet name, worksheet part) pairs, from the workbook and its rels."""
+    workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(zf.read(_WORKBOOK_RELS))
+
+    targets = {}
+    for rel in rels.iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            part = target.lstrip("/")
+        else:
+            part = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = part
+
+    parts = []
+    for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+        part = targets.get(sheet.get(f"{_NS_REL}id"))
+        if part is not None:
+            parts.append((sheet.get("name", ""), part))
+    return parts
+
+
+def _cell_text(value) -> str:
+    """Cell value as the text shown in the table."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_sheet_batches(
+    path: str,
+    sheet: SheetInfo,
+    batch_size: int = IMPORT_BATCH_ROWS,
+    first_batch_size: int | None = None,
+) -> Iterator[ExcelBatch]:
+    """
+    Stream the rows of one worksheet as lists of strings.
+
+    - openpyxl's read-only mode parses the sheet XML incrementally, so
+      memory stays bounded by the batch size
+    - formulas show their cached value (data_only); empty trailing cells
+      are dropped, like trailing fields that aren't there in a CSV
+    - closing the generator early (e.g. on cancel) closes the workbook
+    """
+    # optional dependency, only needed for Excel import
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet.name]
+        rows: List[List[str]] = []
+        read = 0
+        limit = first_batch_size or batch_size
+        for values in ws.iter_rows(values_only=True):
+            row = [_cell_text(v) for v in values]
+            while row and row[-1] == "":
+                row.pop()
+            rows.append(row)
+            if len(rows) >= limit:
+                read += len(rows)
+                yield ExcelBatch(rows, read, sheet.rows)
+                rows = []
+                limit = batch_size
+        if rows or not read:
+            read += len(rows)
+            yield ExcelBatch(rows, read, sheet.rows)
+    finally:
+        wb.close()
+
+
+# ---------------------------
+# In-place update
+# ---------------------------
+_CELL_REF_RE = re.compile(rb'\br="([A-Z]+)(\d+)"')
+_ROW_NUM_RE = re.compile(rb'\br="(\d+)"')
+_STYLE_RE = re.compile(rb'\ss="\d+"')
+_SPANS_RE = re.compile(rb'\sspans="[^"]*"')
+_SHARED_ANCHOR_RE = re.compile(rb'<(?:\w+:)?f\b[^>]*\bt="shared"[^>]*\bref="')
+_XML_ILLEGAL_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _is_number(value: str) -> bool:
+    """True if `value` is a number that reads back exactly as typed."""
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    return math.isfinite(number) and _cell_text(number) == value
+
+
+def _cell_xml(prefix: bytes, ref: bytes, style: bytes, value: str) -> bytes:
+    """
+    A <c> element for `value`: numbers as numbers, anything else as an
+    inline string (so sharedStrings.xml never needs to be rewritten).
+    The cell keeps its style; an empty value leaves a styled empty cell.
+    """
+    c = prefix + b"c"
+    head = b"<" + c + b' r="' + ref + b'"' + style
+    if value == "":
+        return head + b"/>"
+    if _is_number(value):
+        return head + b"><" + prefix + b"v>" + value.encode("ascii") + b"</" + prefix + b"v></" + c + b">"
+    text = escape(_XML_ILLEGAL_RE.sub("", value)).encode("utf-8")
+    is_, t = prefix + b"is", prefix + b"t"
+    return (
+        head + b' t="inlineStr"><' + is_ + b"><" + t + b' xml:space="preserve">'
+        + text + b"</" + t + b"></" + is_ + b"></" + c + b">"
+    )
+
+
+def _patch_row(prefix: bytes, row_num: int, attrs: bytes, content: bytes, values: dict[int, str]) -> tuple[bytes, bool]:
+    """
+    Rewrite one <row>: replace/insert the cells in `values` (column -> text,
+    1-based) and keep every other cell as is. Returns (row xml, whether a
+    formula was overwritten).
+    """
+    cell_re = re.compile(rb"<" + prefix + rb"c\b([^>]*?)(?:/>|>(.*?)</" + prefix + rb"c>)", re.S)
+    existing = {}
+    col = 0
+    for m in cell_re.finditer(content):
+        ref = _CELL_REF_RE.search(m.group(1))
+        col = _column_number(ref.group(1)) if ref else col + 1
+        existing[col] = m
+
+    dropped_formula = False
+    edits = []
+    for col, value in values.items():
+        ref = _column_letters(col) + str(row_num).encode("ascii")
+        m = existing.get(col)
+        if m is not None:
+            inner = m.group(2) or b""
+            if _SHARED_ANCHOR_RE.search(inner):
+                raise ValueError(
+                    f"Cell {ref.decode()} holds a shared formula used by other cells; "
+                    "it can't be overwritten in place."
+                )
+            dropped_formula = dropped_formula or b"<" + prefix + b"f" in inner
+            style = _STYLE_RE.search(m.group(1))
+            edits.append((m.start(), m.end(), col, _cell_xml(prefix, ref, style.group(0) if style else b"", value)))
+        else:
+            # new cells go before the first cell to their right
+            pos = min((m.start() for c, m in existing.items() if c > col), default=None)
+            if pos is None:
+                pos = max((m.end() for m in existing.values()), default=0)
+            edits.append((pos, pos, col, _cell_xml(prefix, ref, b"", value)))
+
+    edits.sort(key=lambda e: (e[0], e[1], e[2]))
+    out = []
+    pos = 0
+    for start, end, _col, xml in edits:
+        out.append(content[pos:start])
+        out.append(xml)
+        pos = end
+    out.append(content[pos:])
+
+    # spans is only an optimization hint and may no longer be right
+    attrs = _SPANS_RE.sub(b"", attrs)
+    row = prefix + b"row"
+    return b"<" + row + attrs + b">" + b"".join(out) + b"</" + row + b">", dropped_formula
+
+
+def _patch_dimension(xml: bytes, max_row: int, max_col: int) -> bytes:
+    m = _DIMENSION_RE.search(xml)
+    if m is None:
+        return xml
+    c1, r1, c2, r2 = m.groups()
+    if c2 is None:
+        c2, r2 = c1, r1
+    new_col = max(_column_number(c2), max_col)
+    new_row = max(int(r2), max_row)
+    if new_col == _column_number(c2) and new_row == int(r2):
+        return xml
+    ref = c1 + r1 + b":" + _column_letters(new_col) + str(new_row).encode("ascii")
+    start, end = m.span()
+    return xml[:start] + re.sub(rb'ref="[^"]*"', b'ref="' + ref + b'"', m.group(0)) + xml[end:]
+
+
+def patch_sheet_xml(xml: bytes, changes: Mapping[tuple[int, int], str]) -> tuple[bytes, bool]:
+    """
+    Apply cell changes {(row, col): text} (0-based, like the table) to the
+    XML of one worksheet. Only the touched <row> elements are rebuilt; the
+    rest of the document is copied as bytes.
+    Returns (new xml, whether a formula was overwritten).
+    """
+    m = re.search(rb"<(\w+:)?sheetData\b[^>]*?(/?)>", xml)
+    if m is None:
+        raise ValueError("Worksheet has no sheetData")
+    prefix = m.group(1) or b""
+    if m.group(2):
+        # <sheetData/>: expand it so rows can be added
+        tag = prefix + b"sheetData"
+        xml = xml[: m.start()] + b"<" + tag + b"></" + tag + b">" + xml[m.end():]
+        m = re.search(rb"<(\w+:)?sheetData\b[^>]*?>", xml)
+    body_start = m.end()
+    body_end = xml.index(b"</" + prefix + b"sheetData>", body_start)
+    body = xml[body_start:body_end]
+
+    by_row: dict[int, dict[int, str]] = {}
+    for (r, c), value in changes.items():
+        if not (0 <= r < EXCEL_MAX_ROWS and 0 <= c < EXCEL_MAX_COLS):
+            raise ValueError(f"Cell ({r + 1}, {c + 1}) is outside the Excel sheet limits")
+        by_row.setdefault(r + 1, {})[c + 1] = value
+    pending = sorted(by_row)
+    next_new = 0
+
+    row_tag = prefix + b"row"
+    row_re = re.compile(rb"<" + row_tag + rb"\b([^>]*?)(?:/>|>(.*?)</" + row_tag + rb">)", re.S)
+
+    def new_rows(below: int | None) -> List[bytes]:
+        nonlocal next_new
+        out = []
+        while next_new < len(pending) and (below is None or pending[next_new] < below):
+            num = pending[next_new]
+            attrs = b' r="' + str(num).encode("ascii") + b'"'
+            out.append(_patch_row(prefix, num, attrs, b"", by_row[num])[0])
+            next_new += 1
+        return out
+
+    out = []
+    pos = 0
+    row_num = 0
+    dropped_formula = False
+    for rm in row_re.finditer(body):
+        num_m = _ROW_NUM_RE.search(rm.group(1))
+        row_num = int(num_m.group(1)) if num_m else row_num + 1
+        if next_new < len(pending) and pending[next_new] < row_num:
+            out.append(body[pos:rm.start()])
+            out.extend(new_rows(row_num))
+            pos = rm.start()
+        values = by_row.get(row_num)
+        if values is None:
+            continue
+        out.append(body[pos:rm.start()])
+        row_xml, dropped = _patch_row(prefix, row_num, rm.group(1), rm.group(2) or b"", values)
+        out.append(row_xml)
+        dropped_formula = dropped_formula or dropped
+        pos = rm.end()
+        next_new += 1
+    out.append(body[pos:])
+    out.extend(new_rows(None))
+
+    xml = xml[:body_start] + b"".join(out) + xml[body_end:]
+    if pending:
+        max_col = max(max(cols) for cols in by_row.values())
+        xml = _patch_dimension(xml, pending[-1], max_col)
+    return xml, dropped_formula
+
+
+def _without_calc_chain(name: str, data: bytes) -> bytes:
+    """Drop references to xl/calcChain.xml from the content types / workbook rels."""
+    if name == _CONTENT_TYPES:
+        return re.sub(rb'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', b"", data)
+    return re.sub(rb'<Relationship\b[^>]*Target="[^"]*calcChain\.xml"[^>]*/>', b"", data)
+
+
+def _copy_zip_entry(raw, info: zipfile.ZipInfo, dst: zipfile.ZipFile):
+    """
+    Copy one zip entry without decompressing it: the compressed bytes are
+    moved as they are and only the headers are written anew.
+    """
+    raw.seek(info.header_offset)
+    header = raw.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_len = int.from_bytes(header[26:28], "little")
+    extra_len = int.from_bytes(header[28:30], "little")
+    data_start = info.header_offset + 30 + name_len + extra_len
+
+    copy = zipfile.ZipInfo(info.filename, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.external_attr = info.external_attr
+    copy.create_system = info.create_system
+    copy.comment = info.comment
+    # sizes and CRC go into the local header, no trailing data descriptor
+    copy.flag_bits = info.flag_bits & ~0x08
+    copy.CRC = info.CRC
+    copy.compress_size = info.compress_size
+    copy.file_size = info.file_size
+
+    copy.header_offset = dst.fp.tell()
+    dst.fp.write(copy.FileHeader())
+    _copy_range(raw, dst.fp, data_start, data_start + info.compress_size)
+    dst.filelist.append(copy)
+    dst.NameToInfo[copy.filename] = copy
+    dst.start_dir = dst.fp.tell()
+    dst._didModify = True
+
+
+def update_xlsx_cells(
+    path: str,
+    sheet_name: str,
+    changes: Mapping[tuple[int, int], str],
+    dst_path: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> int:
+    """
+    Write cell changes {(row, col): text} (0-based) into an existing
+    workbook and return the number of cells written.
+
+    - only the worksheet part of `sheet_name` is decompressed and patched
+      (see patch_sheet_xml); every other part - styles, shared strings,
+      other sheets, images - is copied compressed, byte for byte
+    - cells keep their style; numbers are stored as numbers, other text
+      as inline strings
+    - overwriting a formula drops xl/calcChain.xml (Excel rebuilds it)
+    - the result goes to `dst_path` (default: `path`) atomically
+    """
+    dst_path = dst_path or path
+    with zipfile.ZipFile(path) as src, open(path, "rb") as raw:
+        parts = dict(_sheet_parts(src))
+        part = parts.get(sheet_name)
+        if part is None:
+            raise KeyError(f"Worksheet {sheet_name!r} not found in {os.path.basename(path)}")
+
+        xml, dropped_formula = patch_sheet_xml(src.read(part), changes)
+        drop_calc_chain = dropped_formula and _CALC_CHAIN in src.NameToInfo
+
+        with atomic_write(dst_path) as f:
+            with zipfile.ZipFile(f, "w") as dst:
+                for info in src.infolist():
+                    if cancelled is not None and cancelled():
+                        raise SaveCancelled()
+                    name = info.filename
+                    if name == part:
+                        data = xml
+                    elif drop_calc_chain and name == _CALC_CHAIN:
+                        continue
+                    elif drop_calc_chain and name in (_CONTENT_TYPES, _WORKBOOK_RELS):
+                        data = _without_calc_chain(name, src.read(name))
+                    else:
+                        _copy_zip_entry(raw, info, dst)
+                        continue
+                    out = zipfile.ZipInfo(name, info.date_time)
+                    out.external_attr = info.external_attr
+                    dst.writestr(out, data, compress_type=zipfile.ZIP_DEFLATED)
+    return len(changes)
@@ -0,0 +1,322 @@
+# src/services/perf_service.py
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+# Lightweight timing of user-visible operations (open, save, export, ...).
+#
+# The app starts an Operation per action (TRACER.start) and activates it
+# on whatever thread works for it; code anywhere below (services, the
+# panel) marks its phases with span("parse") etc. and counts with
+# count(rows=...). With tracing off, TRACER.start returns a shared no-op
+# operation and span() returns a shared no-op context: one thread-local
+# lookup per call, nothing recorded.
+
+# Chrome-trace events kept (oldest dropped first)
+MAX_EVENTS = 200_000
+# Finished operations kept for the export
+MAX_OPERATIONS = 100
+
+_local = threading.local()
+
+
+# ---------------------------
+# Memory
+# ---------------------------
+_rss_reader = None
+
+
+def _linux_rss() -> int | None:
+    with open("/proc/self/statm", "rb") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _windows_rss() -> int | None:
+    import ctypes
+    from ctypes import wintypes
+
+    class _Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t)
+            for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                "PagefileUsage", "PeakPagefileUsage",
+            )
+        ]
+
+    counters = _Counters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def current_rss() -> int | None:
+    """Resident memory of this process in bytes (None if unknown)."""
+    global _rss_reader
+    if _rss_reader is None:
+        try:
+            import psutil
+
+            process = psutil.Process()
+            _rss_reader = lambda: process.memory_info().rss
+        except ImportError:
+            if sys.platform.startswith("linux"):
+                _rss_reader = _linux_rss
+            elif os.name == "nt":
+                _rss_reader = _windows_rss
+            else:
+                _rss_reader = lambda: None
+    try:
+        return _rss_reader()
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ---------------------------
+# Spans / operations
+# ---------------------------
+class _NullSpan:
+    """No-op stand-in for both a span and an operation (tracing off)."""
+
+    __slots__ = ()
+
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def span(self, name: str):
+        return self
+
+    def activate(self):
+        return self
+
+    def count(self, **counters):
+        pass
+
+    def finish(self, status: str = "ok", end: float | None = None):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("op", "name", "start", "child", "parent")
+
+    def __init__(self, op: "Operation", name: str):
+        self.op = op
+        self.name = name
+
+    def __enter__(self):
+        self.child = 0.0  # time spent in nested spans (excluded from self time)
+        self.parent = getattr(_local, "span", None)
+        _local.span = self
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        _local.span = self.parent
+        if self.parent is not None:
+            self.parent.child += duration
+        self.op._add_span(self.name, self.start, duration, duration - self.child)
+        return False
+
+
+class _Activation:
+    __slots__ = ("op", "previous")
+
+    def __init__(self, op: "Operation"):
+        self.op = op
+
+    def __enter__(self):
+        self.previous = getattr(_local, "op", None)
+        _local.op = self.op
+        return self.op
+
+    def __exit__(self, *exc):
+        _local.op = self.previous
+        return False
+
+
+class Operation:
+    """
+    One traced user action. Phases may run on several threads at once;
+    their self times (nested spans excluded) are summed per phase name.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict, start: float | None = None):
+        self.tracer = tracer
+        self.name = name
+        self.args = dict(args)
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.status = "running"
+        self.seconds = 0.0
+        self.memory_delta: int | None = None
+        self._lock = threading.Lock()
+        self._tid = threading.get_ident()
+        # a back-dated operation (Tracer.record) has no memory baseline
+        self._rss_start = current_rss() if start is None else None
+        self._start = time.perf_counter() if start is None else start
+
+    def span(self, name: str) -> _Span:
+        """Time a phase of this operation (a context manager)."""
+        return _Span(self, name)
+
+    def activate(self) -> _Activation:
+        """Make this the current operation of the calling thread (context manager)."""
+        return _Activation(self)
+
+    def count(self, **counters):
+        """Add to named counters (rows, cells, bytes, ...)."""
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + int(value)
+
+    def finish(self, status: str = "ok", end: float | None = None):
+        """End the operation (once; later calls are ignored)."""
+        if self.status != "running":
+            return
+        self.seconds = (time.perf_counter() if end is None else end) - self._start
+        self.status = status
+        rss = current_rss()
+        if rss is not None and self._rss_start is not None:
+            self.memory_delta = rss - self._rss_start
+        self.tracer._finished(self)
+
+    def _add_span(self, name: str, start: float, duration: float, self_time: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + self_time
+        self.tracer._event(name, "phase", start, duration, threading.get_ident(), None)
+
+    def summary(self) -> str:
+        """One line for the status bar: total, phases, counts, memory."""
+        parts = [f"{self.name}: {self.seconds:.2f} s"]
+        if self.status != "ok":
+            parts[0] += f" ({self.status})"
+        phases = sorted(self.phases.items(), key=lambda kv: kv[1], reverse=True)
+        if phases:
+            parts.append(", ".join(f"{name} {sec:.2f}" for name, sec in phases))
+        if self.counters:
+            parts.append(", ".join(f"{value:,} {key}" for key, value in self.counters.items()))
+        if self.memory_delta is not None:
+            parts.append(f"{self.memory_delta / 1e6:+.1f} MB")
+        return " | ".join(parts)
+
+
+class Tracer:
+    """
+    Collects operations and their phase events while enabled.
+
+    - start(name, **args) -> Operation (or a no-op one while disabled)
+    - on_finish(operation) is called when an operation ends
+    - export_chrome_trace(path) writes everything recorded so far as a
+      Chrome trace (chrome://tracing, Perfetto, speedscope)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.on_finish: Callable[[Operation], None] | None = None
+        self.last: Operation | None = None
+        self.operations: deque = deque(maxlen=MAX_OPERATIONS)
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._threads: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+
+    def start(self, name: str, **args):
+        if not self.enabled:
+            return _NULL
+        return Operation(self, name, args)
+
+    def record(self, name: str, start: float, end: float, phases: Dict[str, tuple]):
+        """
+        Add an operation timed by the caller (e.g. startup, which begins
+        before tracing can be switched on). phases: name -> (start, end),
+        perf_counter() values like start / end.
+        """
+        if not self.enabled:
+            return
+        op = Operation(self, name, {}, start=start)
+        for phase, (phase_start, phase_end) in phases.items():
+            op._add_span(phase, phase_start, phase_end - phase_start, phase_end - phase_start)
+        op.finish(end=end)
+
+    def clear(self):
+        self.operations.clear()
+        self._events.clear()
+        self._threads.clear()
+        self.last = None
+
+    def _event(self, name: str, cat: str, start: float, duration: float, tid: int, args: dict | None):
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        self._events.append(event)  # deque.append is thread-safe
+
+    def _finished(self, op: Operation):
+        args = dict(op.args, status=op.status, **op.counters)
+        if op.memory_delta is not None:
+            args["memory_delta_bytes"] = op.memory_delta
+        args.update({f"phase:{name}": round(sec, 6) for name, sec in op.phases.items()})
+        self._event(op.name, "operation", op._start, op.seconds, op._tid, args)
+        self.operations.append(op)
+        self.last = op
+        if self.on_finish is not None:
+            self.on_finish(op)
+
+    def chrome_trace(self) -> dict:
+        events: List[dict] = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        events.extend(self._events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> int:
+        """Write the Chrome-trace JSON file; returns the number of events."""
+        trace = self.chrome_trace()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        return len(trace["traceEvents"])
+
+
+TRACER = Tracer()
+
+
+def span(name: str):
+    """Time a phase of the calling thread's current operation (no-op without one)."""
+    op = getattr(_local, "op", None)
+    if op is None:
+        return _NULL
+    return op.span(name)
+
+
+def count(**counters):
+    """Add to the counters of the calling thread's current operation."""
+    op = getattr(_local, "op", None)
+    if op is not None:
+        op.count(**counters)
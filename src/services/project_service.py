@@ -0,0 +1,183 @@
+# src/services/project_service.py
+import os
+from typing import List, NamedTuple
+
+from models.dirty_tracker import SourceFile
+from services.csv_backends import CsvDialect
+
+# Project files are YAML:
+#
+#   version: 2
+#   files:
+#     - path: data/orders.csv
+#     - path: book.xlsx
+#       sheet: Prices
+#   active: 0
+#   parser_backend: auto
+#
+# Relative paths are relative to the project file. Version 1 projects
+# (one `csv_path: "..."` line) still open.
+PROJECT_VERSION = 2
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+# Rows per batch while preloading (one table is built per file, so bigger
+# batches only mean fewer, cheaper appends)
+PRELOAD_BATCH_ROWS = 50_000
+
+
+class ProjectFile(NamedTuple):
+    """One file of a project: a CSV, or a worksheet of a workbook (sheet None: the first)."""
+    path: str
+    sheet: str | None = None
+
+    @property
+    def is_excel(self) -> bool:
+        return self.path.lower().endswith(EXCEL_EXTENSIONS)
+
+    @property
+    def title(self) -> str:
+        name = os.path.basename(self.path)
+        return f"{name} [{self.sheet}]" if self.sheet else name
+
+
+class Project(NamedTuple):
+    files: List[ProjectFile]
+    active: int = 0  # index of the file shown
+    parser_backend: str = "auto"
+
+
+# ---------------------------
+# Reading / writing
+# ---------------------------
+def _read_legacy(text: str) -> dict:
+    # the old hand-written format: key: "value" lines, values not escaped
+    # (Windows paths like "C:\Users\..." aren't valid YAML strings)
+    data = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        data[key.strip()] = value.strip().strip('"').strip("'")
+    return data
+
+
+def load_project(path: str) -> Project:
+    """Read a project file (raises OSError / ValueError for a bad files list)."""
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError:
+        data = None
+    if not isinstance(data, dict) or "files" not in data:
+        # version 1 files are read line by line, values as written: in
+        # YAML "C:\temp\new.csv" would hold a tab and a newline
+        data = _read_legacy(text)
+
+    entries = data.get("files")
+    if entries is None:
+        entries = [data["csv_path"]] if data.get("csv_path") else []
+    if not isinstance(entries, list):
+        raise ValueError("'files' must be a list")
+
+    base = os.path.dirname(os.path.abspath(path))
+    files = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if not isinstance(entry, dict) or not entry.get("path"):
+            raise ValueError(f"Bad file entry: {entry!r}")
+        file_path = os.path.join(base, os.path.expanduser(str(entry["path"])))
+        sheet = entry.get("sheet")
+        files.append(ProjectFile(os.path.normpath(file_path), str(sheet) if sheet else None))
+
+    try:
+        active = int(data.get("active") or 0)
+    except (TypeError, ValueError):
+        active = 0
+    active = min(max(active, 0), max(len(files) - 1, 0))
+    return Project(files, active, str(data.get("parser_backend") or "auto"))
+
+
+def save_project(path: str, project: Project) -> None:
+    """Write a project file (atomically)."""
+    import yaml
+
+    from services.csv_service import atomic_write
+
+    files = []
+    for f in project.files:
+        entry = {"path": f.path}
+        if f.sheet:
+            entry["sheet"] = f.sheet
+        files.append(entry)
+    data = {
+        "version": PROJECT_VERSION,
+        "files": files,
+        "active": project.active,
+        "parser_backend": project.parser_backend,
+    }
+    # a one-CSV project stays readable by older versions of the viewer
+    if len(project.files) == 1 and not project.files[0].is_excel:
+        data["csv_path"] = project.files[0].path
+    text = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+    with atomic_write(path) as out:
+        out.write(text.encode("utf-8"))
+
+
+# ---------------------------
+# Preloading (runs in worker processes)
+# ---------------------------
+class PreloadedTable(NamedTuple):
+    """
+    A project file parsed by preload_table.
+
+    - table: a CompactTable, or for files at least `index_bytes` big the
+      row offsets of the file (the caller maps it: MmapCsvTable.with_index)
+    - source / dialect: for CSV files (None for worksheets)
+    - sheet: the worksheet read (the first one if file.sheet is None)
+    """
+    file: ProjectFile
+    table: object
+    indexed: bool
+    source: SourceFile | None
+    dialect: CsvDialect | None
+    sheet: str | None = None
+
+
+def preload_table(file: ProjectFile, backend: str = "auto", index_bytes: int | None = None) -> PreloadedTable:
+    """
+    Parse a whole project file into a CompactTable - small to send back
+    from a worker process and to keep cached. CSV files of index_bytes
+    and more are only indexed (like the disk-backed view opens them),
+    unless they are compressed.
+    """
+    from models.compact_table import CompactTable
+
+    table = CompactTable()
+    if file.is_excel:
+        from services.excel_service import iter_sheet_batches, list_sheets
+
+        sheets = list_sheets(file.path)
+        sheet = next((s for s in sheets if s.name == file.sheet), None) if file.sheet else (sheets[0] if sheets else None)
+        if sheet is None:
+            raise ValueError(f"{os.path.basename(file.path)}: no sheet {file.sheet!r}")
+        for batch in iter_sheet_batches(file.path, sheet, batch_size=PRELOAD_BATCH_ROWS):
+            table.append_rows(batch.rows)
+        return PreloadedTable(file, table, False, None, None, sheet.name)
+
+    from services.csv_service import detect_codec, index_row_offsets, iter_csv_batches, read_sample, sniff_dialect
+
+    dialect = sniff_dialect(read_sample(file.path))
+    source = SourceFile.stat(file.path, dialect.delimiter, codec=detect_codec(file.path), quotechar=dialect.quotechar)
+    if index_bytes is not None and source.size >= index_bytes and source.codec is None:
+        return PreloadedTable(file, index_row_offsets(file.path, quotechar=dialect.quotechar), True, source, dialect)
+    for batch in iter_csv_batches(
+        file.path, batch_size=PRELOAD_BATCH_ROWS, dialect=dialect, backend=backend, as_tables=True
+    ):
+        table.append_table(batch.rows)
+    return PreloadedTable(file, table, False, source, dialect)
@@ -0,0 +1,115 @@
+# task_scheduler/services/save_service.py
+import os
+from array import array
+from typing import Callable
+
+from services.csv_service import (
+    append_csv_rows,
+    index_row_offsets,
+    patch_csv_file,
+    write_csv_atomic,
+)
+
+
+# Above this share of edited rows a partial save isn't worth it
+PATCH_MAX_DIRTY_FRACTION = 0.2
+
+
+def _same_path(a: str, b: str) -> bool:
+    return os.path.abspath(a) == os.path.abspath(b)
+
+
+def _try_partial_save(
+    snapshot,
+    path: str,
+    changes,
+    offsets: array | None,
+    cancelled: Callable[[], bool] | None,
+) -> str | None:
+    """
+    Partial save if the edits allow it: "append" (rows only appended to
+    the same file) or "patch" (unchanged byte ranges copied from the source
+    file). Returns None when a full rewrite is needed.
+    """
+    source = changes.source
+    if source is None or changes.structural or source.codec is not None or not source.unchanged():
+        return None
+    if source.quotechar != '"':
+        return None  # re-encoded rows would be quoted differently from the rest
+
+    total = snapshot.num_rows
+    loaded = changes.loaded_rows
+    dirty = changes.dirty_rows
+    if total < loaded:
+        return None
+    if len(dirty) > PATCH_MAX_DIRTY_FRACTION * max(loaded, 1):
+        return None
+
+    appended = (snapshot.get_row(r) for r in range(loaded, total))
+    if _same_path(source.path, path) and not dirty:
+        if total > loaded:
+            append_csv_rows(path, list(appended), source.delimiter, source.encoding)
+        return "append"
+
+    if offsets is None:
+        offsets = index_row_offsets(source.path)
+    if len(offsets) != loaded:
+        return None  # file layout doesn't match what was loaded
+
+    patch_csv_file(
+        source.path,
+        path,
+        offsets,
+        dirty,
+        snapshot.get_row,
+        appended,
+        delimiter=source.delimiter,
+        encoding=source.encoding,
+        cancelled=cancelled,
+    )
+    return "patch"
+
+
+def save_table(
+    snapshot,
+    path: str,
+    changes,
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+    offsets: array | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    codec: str | None = None,
+) -> str:
+    """
+    Save a table snapshot to `path` and return how it was written:
+    "append", "patch" or "full".
+
+    - snapshot: read-only table (num_rows, get_row, iter_rows), e.g.
+      models.snapshot.RowListSnapshot or a model's snapshot()
+    - changes: models.dirty_tracker.DirtyTracker describing the edits of
+      the snapshot relative to the file it was loaded from
+    - offsets: record offsets of the source file, if already known
+    - codec: compress the file (see csv_service.codec_for_save); compressed
+      files are always written in full
+
+    Full saves go through write_csv_atomic (temp file + fsync + os.replace).
+    Raises services.csv_service.SaveCancelled when cancelled() turns true.
+    """
+    mode = None if codec is not None else _try_partial_save(snapshot, path, changes, offsets, cancelled)
+    if mode is not None:
+        if progress is not None:
+            progress(snapshot.num_rows, snapshot.num_rows)
+        return mode
+
+    write_csv_atomic(
+        path,
+        snapshot.iter_rows(),
+        delimiter=delimiter,
+        encoding=encoding,
+        total_rows=snapshot.num_rows,
+        progress=progress,
+        cancelled=cancelled,
+        codec=codec,
+    )
+    return "full"
@@ -0,0 +1,138 @@
+# src/services/table_edit_service.py
+from typing import Iterable, List, Sequence, Tuple
+
+
+def contiguous_runs(indexes: Iterable[int]) -> List[Tuple[int, int]]:
+    """[1, 2, 3, 7, 9, 10] -> [(1, 3), (7, 1), (9, 2)] as (start, length)."""
+    runs: List[Tuple[int, int]] = []
+    for i in sorted(set(indexes)):
+        if runs and runs[-1][0] + runs[-1][1] == i:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((i, 1))
+    return runs
+
+
+def pad_rows(rows: Iterable[Sequence[str]]) -> Tuple[List[list], int]:
+    """
+    Copy rows into new lists all padded with "" to the width of the widest
+    row. Returns (rows, width).
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    width = max((len(r) for r in rows), default=0)
+    return [list(r) + [""] * (width - len(r)) for r in rows], width
+
+
+def delete_rows(data: List[list], rows: Iterable[int]) -> int:
+    """
+    Remove `rows` (any order, may be non-contiguous) from `data` in place
+    with a single compaction pass. Returns the number of rows removed.
+    """
+    drop = set(rows)
+    if not drop:
+        return 0
+    before = len(data)
+    data[:] = [row for i, row in enumerate(data) if i not in drop]
+    return before - len(data)
+
+
+def insert_rows(data: List[list], runs: List[Tuple[int, int]], width: int) -> int:
+    """
+    Insert `length` empty rows before row `start` for each (start, length)
+    run (positions refer to `data` before the insert), in one pass.
+    Returns the number of rows inserted.
+    """
+    if not runs:
+        return 0
+    out: List[list] = []
+    pos = 0
+    added = 0
+    for start, length in sorted(runs):
+        start = min(start, len(data))
+        out.extend(data[pos:start])
+        out.extend([""] * width for _ in range(length))
+        pos = start
+        added += length
+    out.extend(data[pos:])
+    data[:] = out
+    return added
+
+
+def delete_columns(data: List[list], columns: Iterable[int]) -> int:
+    """Remove `columns` from every row in place; returns how many were removed."""
+    drop = set(columns)
+    if not drop:
+        return 0
+    width = max((len(row) for row in data), default=0)
+    keep = [c for c in range(width) if c not in drop]
+    if len(keep) == width:
+        return 0
+    for i, row in enumerate(data):
+        n = len(row)
+        data[i] = [row[c] for c in keep if c < n]
+    return width - len(keep)
+
+
+def insert_columns(data: List[list], runs: List[Tuple[int, int]]) -> int:
+    """
+    Insert `length` empty columns before column `start` for each run
+    (positions refer to the columns before the insert), in every row.
+    """
+    if not runs:
+        return 0
+    runs = sorted(runs)
+    added = sum(length for _start, length in runs)
+    last = runs[-1][0]
+    for i, row in enumerate(data):
+        if len(row) < last:
+            row = row + [""] * (last - len(row))  # keep short rows aligned
+        out: list = []
+        pos = 0
+        for start, length in runs:
+            out.extend(row[pos:start])
+            out.extend([""] * length)
+            pos = start
+        out.extend(row[pos:])
+        data[i] = out
+    return added
+
+
+def insert_rows_at(data: List[list], positions: Sequence[int], rows: Sequence[list]) -> int:
+    """
+    Put rows[k] back so it ends up at row positions[k] (sorted positions
+    in the table *after* the insert) - the inverse of delete_rows.
+    """
+    if not positions:
+        return 0
+    out: List[list] = []
+    src = 0
+    for pos, row in zip(positions, rows):
+        take = pos - len(out)
+        out.extend(data[src:src + take])
+        src += take
+        out.append(row)
+    out.extend(data[src:])
+    data[:] = out
+    return len(positions)
+
+
+def insert_columns_at(data: List[list], positions: Sequence[int], columns: Sequence[list]) -> int:
+    """
+    Put columns[k] (one value per row) back at column positions[k]
+    (sorted, after the insert) in every row - the inverse of delete_columns.
+    """
+    if not positions:
+        return 0
+    for i, row in enumerate(data):
+        out: list = []
+        src = 0
+        for pos, column in zip(positions, columns):
+            take = pos - len(out)
+            out.extend(row[src:src + take])
+            src += take
+            if len(out) < pos:
+                out.extend([""] * (pos - len(out)))  # short row
+            out.append(column[i] if i < len(column) else "")
+        out.extend(row[src:])
+        data[i] = out
+    return len(positions)
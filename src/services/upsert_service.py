@@ -0,0 +1,319 @@
+# src/services/upsert_service.py
+from typing import Callable, List, NamedTuple, Tuple
+
+from services.bulk_service import ColumnChanges, read_columns
+
+# numpy / pandas are imported inside the functions (heavy imports, only
+# needed once an upsert actually runs). Nothing in here imports tkinter.
+
+# What happens to master rows whose key is in the input
+ON_MATCH = (
+    "overwrite",  # input values replace master values
+    "fill empty",  # only empty master cells are filled
+    "keep master",  # matching rows stay as they are (only new rows are added)
+)
+
+# Several input rows with the same key
+DUPLICATE_INPUT = ("last wins", "first wins", "error")
+
+# Several master rows with the same key
+DUPLICATE_MASTER = ("update all", "update first", "error")
+
+
+class UpsertRules(NamedTuple):
+    """
+    How an input table is merged into a master table.
+
+    - key_columns: master columns the rows are matched by
+    - input_key_columns: the input's key columns (None: by header name
+      with `header`, else the same positions as key_columns)
+    - header: the first row of both is a header row: input columns go to
+      the master column of the same name (others are skipped) and the
+      header rows themselves are never matched
+    - on_match: see ON_MATCH
+    - clear_with_empty: empty input cells clear master cells (otherwise
+      they leave them alone)
+    - insert_new: append input rows whose key isn't in the master
+    - duplicate_input / duplicate_master: see DUPLICATE_INPUT / DUPLICATE_MASTER
+    """
+    key_columns: Tuple[int, ...]
+    input_key_columns: Tuple[int, ...] | None = None
+    header: bool = True
+    on_match: str = "overwrite"
+    clear_with_empty: bool = False
+    insert_new: bool = True
+    duplicate_input: str = "last wins"
+    duplicate_master: str = "update all"
+
+
+class UpsertPlan(NamedTuple):
+    """
+    An upsert worked out without touching the master (a dry run).
+
+    - changes: changed master cells per column (bulk_service.ColumnChanges,
+      absolute rows, only cells whose value actually changes)
+    - new_rows: rows to append, in the master's column layout
+    - matched: input rows whose key is in the master
+    - updated_rows: master rows with at least one changed cell
+    - duplicates: input rows dropped because their key came again
+    - skipped_columns: input column names without a master column
+    """
+    changes: List[ColumnChanges]
+    new_rows: List[List[str]]
+    input_rows: int
+    matched: int
+    updated_rows: int
+    duplicates: int
+    skipped_columns: Tuple[str, ...] = ()
+
+    @property
+    def cells(self) -> int:
+        return sum(ch.count for ch in self.changes)
+
+    @property
+    def empty(self) -> bool:
+        return not self.cells and not self.new_rows
+
+    def summary(self) -> str:
+        lines = [
+            f"Input rows: {self.input_rows:,}",
+            f"Matching a master key: {self.matched:,}",
+            f"Master rows updated: {self.updated_rows:,} ({self.cells:,} cells)",
+            f"New rows appended: {len(self.new_rows):,}",
+        ]
+        if self.duplicates:
+            lines.append(f"Duplicate input keys skipped: {self.duplicates:,}")
+        if self.skipped_columns:
+            lines.append("Input columns not in the master: " + ", ".join(self.skipped_columns))
+        return "\n".join(lines)
+
+
+# ---------------------------
+# Column mapping
+# ---------------------------
+def _header_names(table) -> List[str]:
+    return [name.strip() for name in table.get_row(0)] if table.num_rows else []
+
+
+def _map_columns(master, source, rules: UpsertRules):
+    """
+    -> (key pairs, value pairs, skipped names): (input column, master
+    column) pairs for the key and for the other columns taken over.
+    """
+    if not rules.key_columns:
+        raise ValueError("Choose the key column(s) to match rows by.")
+
+    if not rules.header:
+        input_keys = rules.input_key_columns or rules.key_columns
+        if len(input_keys) != len(rules.key_columns):
+            raise ValueError("The input needs as many key columns as the master.")
+        keys = list(zip(input_keys, rules.key_columns))
+        keyed = {ic for ic, _ in keys} | {mc for _, mc in keys}
+        values = [(c, c) for c in range(source.num_cols) if c not in keyed]
+        return keys, values, ()
+
+    master_names = _header_names(master)
+    input_names = _header_names(source)
+    by_name: dict = {}
+    for c, name in enumerate(master_names):
+        by_name.setdefault(name, c)
+
+    if rules.input_key_columns is not None:
+        if len(rules.input_key_columns) != len(rules.key_columns):
+            raise ValueError("The input needs as many key columns as the master.")
+        keys = list(zip(rules.input_key_columns, rules.key_columns))
+    else:
+        position = {}
+        for c, name in enumerate(input_names):
+            position.setdefault(name, c)
+        keys = []
+        for mc in rules.key_columns:
+            name = master_names[mc] if mc < len(master_names) else ""
+            if name not in position:
+                raise ValueError(f"The input has no key column {name!r}.")
+            keys.append((position[name], mc))
+
+    input_keys = {ic for ic, _ in keys}
+    master_keys = {mc for _, mc in keys}
+    values, skipped = [], []
+    for ic, name in enumerate(input_names):
+        if ic in input_keys:
+            continue
+        mc = by_name.get(name)
+        if mc is None:
+            skipped.append(name or f"#{ic + 1}")
+        elif mc not in master_keys:
+            values.append((ic, mc))
+    return keys, values, tuple(skipped)
+
+
+def _joint_codes(first_uniques, second_uniques):
+    """
+    Codes of two columns' distinct values in one shared space (pandas
+    hash table): equal strings get equal codes on both sides.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, _ = pd.factorize(np.concatenate([first_uniques, second_uniques]))
+    return codes[: len(first_uniques)], codes[len(first_uniques):]
+
+
+# ---------------------------
+# Planning
+# ---------------------------
+def plan_upsert(
+    master,
+    source,
+    rules: UpsertRules,
+    cancelled: Callable[[], bool] | None = None,
+) -> UpsertPlan | None:
+    """
+    Work out an upsert of `source` (the input) into `master` without
+    touching either; both are anything with num_rows / num_cols /
+    get_row / iter_rows (a snapshot, a model, a CompactTable).
+
+    Every column is handled as (distinct values, per-row codes) like a bulk
+    update: key values are matched through a hash table of the distinct
+    values (pandas.factorize), the composite key becomes one integer per
+    row, and the master's rows are grouped by it once. Everything after
+    reading the columns is vectorized, so the cost is linear in the rows
+    of both tables. Returns None once cancelled().
+    """
+    import numpy as np
+    import pandas as pd
+
+    cancelled = cancelled or (lambda: False)
+    if rules.on_match not in ON_MATCH:
+        raise ValueError(f"Unknown rule for matching rows: {rules.on_match!r}")
+    keys, values, skipped = _map_columns(master, source, rules)
+    if rules.on_match == "keep master":
+        values_to_update = []
+    else:
+        values_to_update = values
+
+    master_buffers = read_columns(master, sorted({mc for _, mc in keys + values}))
+    if cancelled():
+        return None
+    input_buffers = read_columns(source, sorted({ic for ic, _ in keys + values}))
+    if cancelled():
+        return None
+
+    first = 1 if rules.header else 0
+    n_master = max(master.num_rows - first, 0)
+    n_input = max(source.num_rows - first, 0)
+
+    # composite key -> one dense integer per row, shared by both tables
+    master_key = np.zeros(n_master, dtype=np.int64)
+    input_key = np.zeros(n_input, dtype=np.int64)
+    for ic, mc in keys:
+        m_uniques, m_codes = master_buffers[mc]
+        i_uniques, i_codes = input_buffers[ic]
+        m_joint, i_joint = _joint_codes(m_uniques, i_uniques)
+        size = len(m_joint) + len(i_joint)
+        combined = np.concatenate([
+            master_key * size + m_joint[m_codes[first:]],
+            input_key * size + i_joint[i_codes[first:]],
+        ])
+        codes, _ = pd.factorize(combined)
+        master_key, input_key = codes[:n_master], codes[n_master:]
+    num_keys = int(max(master_key.max(initial=-1), input_key.max(initial=-1))) + 1
+
+    # input: one row per key
+    dropped = pd.Series(input_key).duplicated(keep="first" if rules.duplicate_input == "first wins" else "last")
+    duplicates = int(dropped.sum())
+    if duplicates and rules.duplicate_input == "error":
+        raise ValueError(f"{duplicates:,} input row(s) repeat a key of an earlier row.")
+    input_rows = np.flatnonzero(~dropped.to_numpy())
+
+    # master: rows grouped by key (counting sort over the dense keys)
+    per_key = np.bincount(master_key, minlength=num_keys)
+    if rules.duplicate_master == "error" and (per_key > 1).any():
+        raise ValueError(f"{int((per_key > 1).sum()):,} key(s) appear in more than one master row.")
+    order = np.argsort(master_key, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(per_key)[:-1]]) if num_keys else np.zeros(0, dtype=np.int64)
+    if rules.duplicate_master == "update first":
+        per_key = np.minimum(per_key, 1)
+
+    hits = per_key[input_key[input_rows]]
+    matched_inputs = input_rows[hits > 0]
+    new_inputs = input_rows[hits == 0]
+    # (input row, master row) pairs: every master row of the input row's key
+    counts = hits[hits > 0]
+    pair_input = np.repeat(matched_inputs, counts)
+    group_start = np.repeat(starts[input_key[matched_inputs]], counts)
+    within = np.arange(len(pair_input)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_master = order[group_start + within]
+    if cancelled():
+        return None
+
+    changes = []
+    updated = np.zeros(n_master, dtype=bool)
+    for ic, mc in values_to_update:
+        i_uniques, i_codes = input_buffers[ic]
+        m_uniques, m_codes = master_buffers[mc]
+        new_codes = i_codes[first:][pair_input]
+        old_codes = m_codes[first:][pair_master]
+        m_joint, i_joint = _joint_codes(m_uniques, i_uniques)
+        write = m_joint[old_codes] != i_joint[new_codes]
+        if not rules.clear_with_empty:
+            write &= (i_uniques != "")[new_codes]
+        if rules.on_match == "fill empty":
+            write &= (m_uniques == "")[old_codes]
+        if not write.any():
+            continue
+        rows = pair_master[write]
+        sort = np.argsort(rows, kind="stable")
+        rows, new_codes, old_codes = rows[sort], new_codes[write][sort], old_codes[write][sort]
+        # distinct (old, new) pairs, so one code gives both values (undo)
+        pair_codes, pairs = pd.factorize(old_codes.astype(np.int64) * len(i_uniques) + new_codes)
+        changes.append(ColumnChanges(
+            mc,
+            rows + first,
+            i_uniques[pairs % len(i_uniques)],
+            pair_codes.astype(np.intp, copy=False),
+            m_uniques[pairs // len(i_uniques)],
+        ))
+        updated[rows] = True
+        if cancelled():
+            return None
+
+    new_rows: List[List[str]] = []
+    if rules.insert_new and len(new_inputs):
+        width = max([master.num_cols] + [mc + 1 for _, mc in keys + values])
+        new_rows = [[""] * width for _ in range(len(new_inputs))]
+        for ic, mc in keys + values:
+            i_uniques, i_codes = input_buffers[ic]
+            for row, value in zip(new_rows, i_uniques[i_codes[first:][new_inputs]].tolist()):
+                row[mc] = value
+
+    return UpsertPlan(
+        changes=changes,
+        new_rows=new_rows,
+        input_rows=n_input,
+        matched=len(matched_inputs),
+        updated_rows=int(updated.sum()),
+        duplicates=duplicates,
+        skipped_columns=skipped,
+    )
+
+
+# ---------------------------
+# Files
+# ---------------------------
+def read_csv_table(path: str, backend: str = "auto", dialect=None):
+    """Parse a whole CSV file into a CompactTable (vectorized where the backend allows)."""
+    from models.compact_table import CompactTable
+    from services.csv_service import iter_csv_batches
+
+    table = CompactTable()
+    for batch in iter_csv_batches(path, batch_size=100_000, dialect=dialect, backend=backend, as_tables=True):
+        table.append_table(batch.rows)
+    return table
+
+
+def apply_plan(table, plan: UpsertPlan) -> None:
+    """Write an UpsertPlan into a CompactTable (headless runs; the app goes through the panel)."""
+    for ch in plan.changes:
+        table.set_column(ch.column, ch.rows, ch.uniques, ch.codes)
+    table.append_rows(plan.new_rows)
@@ -1,6 +1,10 @@
 # task_scheduler/ui/excel_panel.py
 import customtkinter as ctk
 
+from services.bulk_service import CONDITION_TESTS
+
+NO_CONDITION = "(always)"
+
 
 def build_excel_panel(app: "CsvViewerApp"):
     """
@@ -10,7 +14,7 @@ def build_excel_panel(app: "CsvViewerApp"):
     frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")  # fill left column
 
     frame.grid_columnconfigure(0, weight=1)
-    frame.grid_rowconfigure(5, weight=1)  # spacer row
+    frame.grid_rowconfigure(6, weight=1)  # spacer row
 
     title = ctk.CTkLabel(frame, text="CSV Commands", font=ctk.CTkFont(size=16, weight="bold"))
     title.grid(row=0, column=0, pady=(10, 15), padx=10, sticky="w")
@@ -27,4 +31,61 @@ def build_excel_panel(app: "CsvViewerApp"):
     btn_delete_column = ctk.CTkButton(frame, text="Delete Column", command=app.delete_column)
     btn_delete_column.grid(row=4, column=0, padx=10, pady=5, sticky="ew")
 
+    bulk = build_bulk_section(frame, app)
+    bulk.grid(row=5, column=0, padx=10, pady=(15, 5), sticky="ew")
+
     return frame
+
+
+def build_bulk_section(master, app: "CsvViewerApp"):
+    """
+    Bulk update controls: find/replace (literal or regex) and set-column,
+    on whole columns or the selection, optionally only where a condition
+    holds. The values are kept in app.bulk_options for app.bulk_update().
+    """
+    section = ctk.CTkFrame(master, fg_color="transparent")
+    section.grid_columnconfigure(0, weight=1)
+    section.grid_columnconfigure(1, weight=1)
+
+    title = ctk.CTkLabel(section, text="Bulk Update", font=ctk.CTkFont(size=14, weight="bold"))
+    title.grid(row=0, column=0, columnspan=2, pady=(0, 5), sticky="w")
+
+    # entries are kept as widgets (a textvariable would hide the
+    # placeholder); everything in `options` has .get()
+    options = {
+        "regex": ctk.BooleanVar(value=False),
+        "match_case": ctk.BooleanVar(value=True),
+        "whole_cell": ctk.BooleanVar(value=False),
+        "selection_only": ctk.BooleanVar(value=False),
+        "if_test": ctk.StringVar(value=NO_CONDITION),
+    }
+    app.bulk_options = options
+
+    options["columns"] = ctk.CTkEntry(section, placeholder_text="Columns: A, C:E (empty = selected)")
+    options["columns"].grid(row=1, column=0, columnspan=2, pady=3, sticky="ew")
+    options["find"] = ctk.CTkEntry(section, placeholder_text="Find")
+    options["find"].grid(row=2, column=0, columnspan=2, pady=3, sticky="ew")
+    options["replace"] = ctk.CTkEntry(section, placeholder_text="Replace with / value")
+    options["replace"].grid(row=3, column=0, columnspan=2, pady=3, sticky="ew")
+
+    ctk.CTkCheckBox(section, text="Regex", variable=options["regex"]).grid(row=4, column=0, pady=3, sticky="w")
+    ctk.CTkCheckBox(section, text="Match case", variable=options["match_case"]).grid(row=4, column=1, pady=3, sticky="w")
+    ctk.CTkCheckBox(section, text="Whole cell", variable=options["whole_cell"]).grid(row=5, column=0, pady=3, sticky="w")
+    ctk.CTkCheckBox(section, text="Selected rows", variable=options["selection_only"]).grid(row=5, column=1, pady=3, sticky="w")
+
+    # condition: "if column [B] [equals] [value]"
+    options["if_column"] = ctk.CTkEntry(section, placeholder_text="If column")
+    options["if_column"].grid(row=6, column=0, pady=3, sticky="ew", padx=(0, 3))
+    ctk.CTkOptionMenu(section, variable=options["if_test"], values=[NO_CONDITION, *CONDITION_TESTS]).grid(
+        row=6, column=1, pady=3, sticky="ew"
+    )
+    options["if_value"] = ctk.CTkEntry(section, placeholder_text="Condition value")
+    options["if_value"].grid(row=7, column=0, columnspan=2, pady=3, sticky="ew")
+
+    ctk.CTkButton(section, text="Replace All", command=lambda: app.bulk_update("replace")).grid(
+        row=8, column=0, pady=(8, 3), sticky="ew", padx=(0, 3)
+    )
+    ctk.CTkButton(section, text="Set Column", command=lambda: app.bulk_update("set")).grid(
+        row=8, column=1, pady=(8, 3), sticky="ew"
+    )
+    return section
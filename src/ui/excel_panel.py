@@ -1,19 +1,78 @@
 # task_scheduler/ui/excel_panel.py
+from typing import NamedTuple
+
+import numpy as np
 import customtkinter as ctk
 from tksheet import Sheet
 
+from managers.background import BackgroundJob
+from models.dirty_tracker import DirtyTracker
+from models.search_index import SEARCH_MODES, SearchIndex, SearchQuery
+from models.snapshot import RowListSnapshot
+from models.undo_journal import CellDelta, ColumnsDelta, RowsDelta, UndoJournal
+from services import perf_service as perf
+from services import table_edit_service as table_edit
+from services.bulk_service import index_to_col_name
+
+
+# Windowed (virtual) mode: rows handed to the sheet at once, and how close
+# to the window edge (fraction of the window) scrolling may get before the
+# next window is fetched from the model.
+WINDOW_ROWS = 1000
+WINDOW_EDGE = 0.15
+
+# Search: delay before the match count is refreshed while typing, delay
+# before the index is rebuilt after structural edits, and the largest bulk
+# update patched into the index cell by cell (bigger ones rebuild it).
+SEARCH_DEBOUNCE_MS = 150
+INDEX_REBUILD_DELAY_MS = 500
+INDEX_INCREMENTAL_LIMIT = 50_000
+# Disk-backed tables are only indexed up to this many cells (the index
+# lives in memory, the table doesn't)
+DISK_INDEX_MAX_CELLS = 20_000_000
+
+# Diff highlights (show_diff): inserted rows, changed cells, and modified
+# rows whose changed cells weren't worked out
+DIFF_INSERTED_BG = "#c6efce"
+DIFF_CELL_BG = "#ffeb9c"
+DIFF_ROW_BG = "#fff5d6"
+
+
+def _cell_deltas(edits) -> list:
+    """Cell edits [(row, col, old, new)] -> one CellDelta per column."""
+    by_column: dict = {}
+    for r, c, old, new in edits:
+        by_column.setdefault(c, []).append((r, old, new))
+    deltas = []
+    for c, cells in sorted(by_column.items()):
+        cells.sort(key=lambda cell: cell[0])
+        rows, olds, news = zip(*cells)
+        deltas.append(CellDelta.from_values(c, rows, olds, news))
+    return deltas
 
-def index_to_col_name(index: int) -> str:
-    """Convert 0-based index to spreadsheet-like column name (A, B, ..., Z, AA, AB, ...)."""
-    name = ""
-    idx = index
-    while True:
-        idx, rem = divmod(idx, 26)
-        name = chr(ord("A") + rem) + name
-        if idx == 0:
-            break
-        idx -= 1
-    return name
+
+def _write_delta(data, delta: CellDelta):
+    """Write the new values of a CellDelta into list-of-rows data."""
+    c = delta.column
+    for r, value in zip(delta.rows.tolist(), delta.new_values().tolist()):
+        row = data[r]
+        if c >= len(row):
+            row.extend([""] * (c + 1 - len(row)))
+        row[c] = value
+
+
+class TableState(NamedTuple):
+    """A table taken out of the panel (CsvTablePanel.detach_table)."""
+    model: object  # table model, or None for sheet data
+    rows: list | None  # the sheet data (list of rows) without a model
+    dirty: DirtyTracker
+    journal: UndoJournal
+    view: dict | None
+
+    @property
+    def is_clean(self) -> bool:
+        """No unsaved edits and nothing to undo or redo."""
+        return self.dirty.is_clean and not self.journal.can_undo and not self.journal.can_redo
 
 
 class CsvTablePanel(ctk.CTkFrame):
@@ -28,20 +87,46 @@ class CsvTablePanel(ctk.CTkFrame):
     def __init__(self, master: "CsvViewerApp", **kwargs):
         super().__init__(master, corner_radius=10, **kwargs)
 
-        # Row 0 = title, row 1 = sheet (expands)
+        # Row 0 = title, row 1 = sheet (expands), row 2 = status line
         self.grid_rowconfigure(0, weight=0)
         self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=0)
         self.grid_columnconfigure(0, weight=1)
 
         title = ctk.CTkLabel(self, text="CSV Viewer", font=ctk.CTkFont(size=18, weight="bold"))
         title.grid(row=0, column=0, pady=(10, 5))
 
-        # Container for the Sheet widget
+        # Search bar (right side of the title row)
+        search_bar = ctk.CTkFrame(self, fg_color="transparent")
+        search_bar.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="e")
+        self.search_entry = ctk.CTkEntry(search_bar, width=200, placeholder_text="Search")
+        self.search_entry.grid(row=0, column=0, padx=(0, 4))
+        self.search_mode = ctk.StringVar(value=SEARCH_MODES[0])
+        ctk.CTkOptionMenu(search_bar, variable=self.search_mode, values=list(SEARCH_MODES), width=110,
+                          command=lambda _v: self._schedule_search_count()).grid(row=0, column=1, padx=4)
+        self.search_case = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(search_bar, text="Aa", variable=self.search_case, width=50,
+                        command=self._schedule_search_count).grid(row=0, column=2, padx=4)
+        ctk.CTkButton(search_bar, text="◀", width=30, command=lambda: self.find_next(backwards=True)).grid(row=0, column=3, padx=2)
+        ctk.CTkButton(search_bar, text="▶", width=30, command=self.find_next).grid(row=0, column=4, padx=2)
+        ctk.CTkButton(search_bar, text="Filter", width=60, command=self.filter_matches).grid(row=0, column=5, padx=4)
+        ctk.CTkButton(search_bar, text="Clear", width=60, command=self.clear_search).grid(row=0, column=6, padx=(0, 4))
+        self.search_count_label = ctk.CTkLabel(search_bar, text="", width=90, anchor="w")
+        self.search_count_label.grid(row=0, column=7)
+        self.search_entry.bind("<Return>", lambda _e: self.find_next())
+        self.search_entry.bind("<Shift-Return>", lambda _e: self.find_next(backwards=True))
+        self.search_entry.bind("<KeyRelease>", lambda _e: self._schedule_search_count())
+
+        # Container for the Sheet widget (row 0: tabs of a multi-file project)
         container = ctk.CTkFrame(self, fg_color="transparent")
         container.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
-        container.grid_rowconfigure(0, weight=1)
+        container.grid_rowconfigure(1, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
+        self.tab_bar = ctk.CTkSegmentedButton(container, values=[""], command=self._on_tab_clicked)
+        self._tab_labels: list[str] = []
+        self._on_tab_select = None
+
         # --- tksheet Sheet widget ---
         self.sheet = Sheet(
             container,
@@ -49,10 +134,56 @@ class CsvTablePanel(ctk.CTkFrame):
             show_y_scrollbar=True,
             show_top_left=False,   # no extra top-left box
         )
-        self.sheet.grid(row=0, column=0, sticky="nsew")
-        
-        # Enable useful bindings (edit, copy/paste, resize, etc.)
-        # Enable useful bindings (edit, copy/paste, resize, etc.)
+        self.sheet.grid(row=1, column=0, sticky="nsew")
+
+        # Whole-file scrollbar, only shown for disk-backed tables (load_model)
+        self.file_scrollbar = ctk.CTkScrollbar(
+            container, orientation="vertical", command=self._on_file_scroll
+        )
+
+        # Status line (load progress, row counts, ...); the cost of the last
+        # traced operation is shown on its right (see set_perf)
+        self.status_label = ctk.CTkLabel(self, text="", anchor="w")
+        self.status_label.grid(row=2, column=0, padx=10, pady=(0, 5), sticky="ew")
+        self.perf_label = ctk.CTkLabel(self, text="", anchor="e", text_color="gray60")
+        self.perf_label.grid(row=2, column=0, padx=10, pady=(0, 5), sticky="e")
+
+        # streaming state (see begin_stream / append_rows)
+        self.streaming = False
+        self._stream_started = False
+        self._stream_cols = 0
+        self._stream_rows = 0
+
+        # what changed since load / last save (used for partial saves)
+        self.dirty = DirtyTracker()
+
+        # undo / redo history as compact deltas (see undo / redo)
+        self.journal = UndoJournal()
+
+        # windowed mode state (see load_model)
+        self.model = None
+        self._window_start = 0
+        self._window_len = 0
+        self._window_cols = 0
+        self._window_pending = False
+        self._row_filter = None  # windowed mode: absolute rows shown (filter), or None
+        self._diff = None  # services.diff_service.TableDiff highlighted (show_diff)
+
+        # search index (see rebuild_index)
+        self.search_index: SearchIndex | None = None
+        self._index_job: BackgroundJob | None = None
+        self._index_pending: list = []   # edits made while the index builds
+        self._index_timer = None
+        self._search_timer = None
+        self._search_cache = None        # (query, index version, result)
+        self._filtered = False
+
+        self.sheet.bind("<<SheetRedrawn>>", self._on_sheet_redrawn)
+        self.sheet.bind("<<SheetModified>>", self._on_sheet_modified)
+
+        # Enable useful bindings (edit, copy/paste, resize, etc.).
+        # Undo / redo are not tksheet's: they go through self.journal,
+        # which also covers bulk updates and row/column edits.
         self.sheet.enable_bindings(
             "single_select",
             "row_select",
@@ -66,8 +197,6 @@ class CsvTablePanel(ctk.CTkFrame):
             "cut",
             "paste",
             "delete",
-            "undo",
-            "redo",
         )
 
 
@@ -79,6 +208,13 @@ class CsvTablePanel(ctk.CTkFrame):
     # ---------------------------
     def clear_table(self):
         """Clear all data from the sheet."""
+        self._release_model()
+        self._drop_index()
+        self._drop_diff()
+        self._filtered = False
+        self.sheet.display_rows("all")
+        self.dirty.reset(0)
+        self.journal.clear()
         # set_sheet_data([]) leaves headers but no rows
         self.sheet.set_sheet_data([[]])
         self.sheet.headers([])          # no column labels
@@ -96,35 +232,1073 @@ class CsvTablePanel(ctk.CTkFrame):
             self.clear_table()
             return
 
+        self._release_model()
+        self._drop_diff()
+        self._filtered = False
+        self.sheet.display_rows("all")
+
         # Ensure all rows have same length
-        num_cols = max(len(r) for r in rows)
-        normalized_rows = [
-            list(r) + [""] * (num_cols - len(r))
-            for r in rows
-        ]
+        with perf.span("normalize"):
+            normalized_rows, num_cols = table_edit.pad_rows(rows)
 
         # Set data
-        self.sheet.set_sheet_data(normalized_rows)
+        with perf.span("set_sheet_data"):
+            self.sheet.set_sheet_data(normalized_rows, redraw=False)
 
         # Column headers A, B, C, ...
         col_headers = [index_to_col_name(i) for i in range(num_cols)]
         self.sheet.headers(col_headers)
 
-        # Row headers 1, 2, 3, ...
-        row_headers = [str(i + 1) for i in range(len(normalized_rows))]
-        self.sheet.row_index(row_headers)
+        # Row headers 1, 2, 3, ...: tksheet's default index, drawn only for
+        # the visible rows (and still right after rows are inserted/deleted)
+        self.sheet.row_index([])
+
+        self.dirty.reset(len(normalized_rows))
+        self.journal.clear()
+        self.rebuild_index()
 
         # If your version supports themes, you *could* do:
         #   self.sheet.theme("light blue")
         # but since it raised AttributeError, we skip it.
 
+        with perf.span("refresh"):
+            self.sheet.refresh()
+        perf.count(cells=len(normalized_rows) * num_cols)
+
+    # ---------------------------
+    # Tabs (multi-file projects)
+    # ---------------------------
+    def set_tabs(self, titles: list[str], active: int | None = None, on_select=None):
+        """
+        Show one tab per title (none for fewer than two);
+        on_select(index) is called when a tab is clicked.
+        """
+        labels: list[str] = []
+        for title in titles:
+            label, n = title, 2
+            while label in labels:  # the tab bar needs distinct labels
+                label, n = f"{title} ({n})", n + 1
+            labels.append(label)
+        self._tab_labels = labels
+        self._on_tab_select = on_select
+        if len(labels) < 2:
+            self.tab_bar.grid_remove()
+            return
+        self.tab_bar.configure(values=labels)
+        self.select_tab(active)
+        self.tab_bar.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 4))
+
+    def select_tab(self, index: int | None):
+        """Mark a tab as the shown one (no callback)."""
+        if index is not None and 0 <= index < len(self._tab_labels):
+            self.tab_bar.set(self._tab_labels[index])
+        else:
+            self.tab_bar.set("")
+
+    def _on_tab_clicked(self, label: str):
+        if self._on_tab_select is not None and label in self._tab_labels:
+            self._on_tab_select(self._tab_labels.index(label))
+
+    def detach_table(self) -> "TableState":
+        """
+        Take the table out of the panel without closing it, together with
+        its change tracking, undo history and view (e.g. to switch tabs).
+        The panel is left empty.
+        """
+        self._clear_filter()
+        view = self.view_state() if self.row_count() else None
+        model = self.model
+        state = TableState(
+            model, None if model is not None else self.sheet.data, self.dirty, self.journal, view
+        )
+        self.model = None  # not closed: it belongs to the state now
+        self.file_scrollbar.grid_remove()
+        self.dirty = DirtyTracker()
+        self.journal = UndoJournal(state.journal.memory_cap)
+        self.clear_table()
+        return state
+
+    def attach_table(self, state: "TableState"):
+        """Show a table taken out by detach_table again, edits and undo history included."""
+        if state.model is not None:
+            self.load_model(state.model)
+            self.rebuild_index()
+        else:
+            self.load_data(state.rows)
+        self.dirty = state.dirty
+        self.journal = state.journal
+        if state.view:
+            self.restore_view_state(state.view)
+
+    # ---------------------------
+    # Streaming load (used by background loading)
+    # ---------------------------
+    def begin_stream(self):
+        """
+        Start a progressive load: clear the sheet and wait for row batches.
+        """
+        self.clear_table()
+        self.streaming = True
+        self._stream_started = False
+        self._stream_cols = 0
+        self._stream_rows = 0
+
+    def append_rows(self, rows):
+        """
+        Append one batch of rows (list[list[str]]) to the sheet and return
+        the number of rows streamed so far.
+
+        The first batch replaces the sheet data, later batches are inserted
+        at the end. Rows are padded to the widest row seen so far; when a
+        batch is wider, the existing data is widened once.
+        """
+        if not rows:
+            return self._stream_rows
+
+        width = max(len(r) for r in rows)
+        if width > self._stream_cols:
+            self._stream_cols = width
+            if self._stream_started:
+                self.sheet.total_columns(width)
+            self.sheet.headers(
+                [index_to_col_name(i) for i in range(width)], redraw=False
+            )
+
+        num_cols = self._stream_cols
+        with perf.span("normalize"):
+            for r in rows:
+                if len(r) < num_cols:
+                    r.extend([""] * (num_cols - len(r)))
+
+        with perf.span("set_sheet_data"):
+            if not self._stream_started:
+                self.sheet.set_sheet_data(rows, redraw=False)
+                self._stream_started = True
+            else:
+                # undo=False: a load must not end up in the undo history
+                self.sheet.insert_rows(
+                    rows,
+                    idx="end",
+                    undo=False,
+                    create_selections=False,
+                    redraw=False,
+                )
+
+        self._stream_rows += len(rows)
+        with perf.span("refresh"):
+            self.sheet.refresh()
+        return self._stream_rows
+
+    def finish_stream(self):
+        """
+        End a progressive load and return the number of rows loaded.
+        An empty file leaves an empty table.
+        """
+        if self.streaming and not self._stream_started:
+            self.clear_table()
+        self.streaming = False
+        return self._stream_rows
+
+    def append_file_rows(self, rows, source) -> int:
+        """
+        Tail refresh: records appended to the source file since it was
+        loaded go after the loaded rows, as part of the file (not edits,
+        not undoable). Returns the number of rows added.
+
+        - rows: list of rows; a CompactTable when a CompactTable model is
+          shown; None when the model grew itself (MmapCsvTable.extend)
+        - source: the SourceFile as it is now
+        - if the last row was in view, the view follows the new rows
+        """
+        before = self.row_count()
+        if self.model is not None:
+            _, last = self._visible_range()
+            follow = last >= self._view_rows() - 1 and self._row_filter is None
+            if isinstance(rows, list):
+                self.model.append_rows(rows)
+            elif rows is not None:
+                self.model.append_table(rows)
+            total = self._view_rows()
+            if follow and total > WINDOW_ROWS:
+                shown = max(last - self._visible_range()[0], 1)
+                self._show_window(total - WINDOW_ROWS, top_row=max(total - shown, 0))
+            else:
+                self.refresh_model()
+        elif rows:
+            follow = not self._filtered and self.sheet.get_yview()[1] >= 1.0
+            width = max(self.sheet.total_columns(), max(len(r) for r in rows))
+            if width > self.sheet.total_columns():
+                self.sheet.total_columns(width)
+                self.sheet.headers([index_to_col_name(i) for i in range(width)], redraw=False)
+            for r in rows:
+                if len(r) < width:
+                    r.extend([""] * (width - len(r)))
+            self.sheet.insert_rows(rows, idx="end", undo=False, create_selections=False, redraw=False)
+            if follow:
+                self.sheet.see(len(self.sheet.data) - 1, 0, keep_xscroll=True, redraw=False)
+            self.sheet.refresh()
+
+        added = self.row_count() - before
+        self.dirty.file_grew(added, source)
+        if added:
+            self.schedule_index_rebuild()
+        return added
+
+    def set_status(self, text: str):
+        """Show a short message in the status line under the sheet."""
+        self.status_label.configure(text=text)
+
+    def set_perf(self, text: str):
+        """Show the cost of the last traced operation (right side of the status line)."""
+        self.perf_label.configure(text=text)
+
+    # ---------------------------
+    # Windowed view over a table model (large files)
+    # ---------------------------
+    def load_model(self, model):
+        """
+        Show a table model (models.mmap_table.MmapCsvTable or
+        models.compact_table.CompactTable) through a
+        sliding window: only WINDOW_ROWS rows around the viewport are parsed
+        and handed to the sheet. Scrolling close to the window edges fetches
+        the next window from the model, so memory follows the screen, not
+        the file.
+
+        The model must provide num_rows, num_cols, get_rows(start, stop),
+        iter_rows(), set_cell(r, c, value) and close().
+        """
+        self.clear_table()
+        self.model = model
+        self._window_cols = 0
+        self.file_scrollbar.grid(row=1, column=1, sticky="ns")
+        self._show_window(0, top_row=0)
+
+    def refresh_model(self):
+        """
+        The model grew (e.g. a background load appended rows): fill the
+        window if it isn't full yet, otherwise just update the scrollbar.
+        """
+        if self.model is None:
+            return
+        if self._window_len < WINDOW_ROWS and self._window_len < self._view_rows():
+            first, _ = self._visible_range()
+            self._show_window(self._window_start, top_row=first)
+        else:
+            self._update_file_scrollbar()
+
+    def _release_model(self):
+        if self.model is None:
+            return
+        self.model.close()
+        self.model = None
+        self._row_filter = None
+        self.file_scrollbar.grid_remove()
+
+    def _view_rows(self) -> int:
+        """Rows in the windowed view (all model rows, or the filtered ones)."""
+        if self._row_filter is not None:
+            return len(self._row_filter)
+        return self.model.num_rows
+
+    def _model_row(self, pos: int) -> int:
+        """Absolute model row shown at view position `pos`."""
+        if self._row_filter is not None:
+            return int(self._row_filter[pos])
+        return pos
+
+    def _show_window(self, start: int, top_row: int):
+        model = self.model
+        total = self._view_rows()
+        start = max(0, min(start, total - WINDOW_ROWS))
+        stop = min(total, start + WINDOW_ROWS)
+
+        if self._row_filter is not None:
+            shown = self._row_filter[start:stop].tolist()
+            rows = [model.get_row(r) for r in shown]
+        else:
+            shown = range(start, stop)
+            rows = model.get_rows(start, stop)
+        num_cols = max(model.num_cols, 1)
+        for r in rows:
+            if len(r) < num_cols:
+                r.extend([""] * (num_cols - len(r)))
+
+        self._window_start = start
+        self._window_len = stop - start
+        with perf.span("set_sheet_data"):
+            self.sheet.set_sheet_data(
+                rows,
+                reset_col_positions=num_cols != self._window_cols,
+                redraw=False,
+            )
+        if num_cols != self._window_cols:
+            self._window_cols = num_cols
+            self.sheet.headers(
+                [index_to_col_name(i) for i in range(num_cols)], redraw=False
+            )
+        self.sheet.row_index([str(i + 1) for i in shown], redraw=False)
+        if self._diff is not None:
+            self._mark_diff()
+
+        if self._window_len:
+            self.sheet.set_yview((top_row - start) / self._window_len)
+        with perf.span("refresh"):
+            self.sheet.refresh()
+        self._update_file_scrollbar()
+
+    def _visible_range(self) -> tuple[int, int]:
+        """Absolute (first, last) visible row numbers in windowed mode."""
+        top, bottom = self.sheet.get_yview()
+        first = self._window_start + int(top * self._window_len)
+        last = self._window_start + int(bottom * self._window_len)
+        return first, last
+
+    def _update_file_scrollbar(self):
+        total = self._view_rows() if self.model is not None else 0
+        if not total:
+            self.file_scrollbar.set(0.0, 1.0)
+            return
+        first, last = self._visible_range()
+        self.file_scrollbar.set(first / total, max(last, first + 1) / total)
+
+    def _on_sheet_redrawn(self, event=None):
+        # coalesce: many redraws while scrolling -> one window check
+        if self.model is None or self._window_pending:
+            return
+        self._window_pending = True
+        self.after_idle(self._check_window)
+
+    def _check_window(self):
+        self._window_pending = False
+        if self.model is None or not self._window_len:
+            return
+
+        top, bottom = self.sheet.get_yview()
+        window_end = self._window_start + self._window_len
+        near_top = top < WINDOW_EDGE and self._window_start > 0
+        near_bottom = bottom > 1 - WINDOW_EDGE and window_end < self._view_rows()
+        if near_top or near_bottom:
+            first, _ = self._visible_range()
+            self._show_window(first - WINDOW_ROWS // 2, top_row=first)
+        else:
+            self._update_file_scrollbar()
+
+    def _on_file_scroll(self, *args):
+        """Command of the whole-file scrollbar ('moveto' / 'scroll' args)."""
+        if self.model is None or not args:
+            return
+        total = self._view_rows()
+        first, last = self._visible_range()
+        if args[0] == "moveto":
+            target = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = (last - first) if args[2] == "pages" else 1
+            target = first + int(args[1]) * step
+        else:
+            return
+        target = max(0, min(target, total - 1))
+        self._show_window(target - WINDOW_ROWS // 2, top_row=target)
+
+    def _on_sheet_modified(self, event):
+        """
+        Track edits for partial saves and undo; in windowed mode also write
+        them back to the model (the sheet only holds the current window).
+        """
+        cells = event["cells"]["table"]
+        if self.model is not None:
+            start = self._window_start
+            edits = []
+            for (r, c), old in cells.items():
+                row = self._model_row(start + r)
+                new = self.sheet.get_cell_data(r, c)
+                self.model.set_cell(row, c, new)
+                edits.append((row, c, old, new))
+            self.dirty.mark_cells((row, c) for row, c, _old, _new in edits)
+            self._index_edits(edits)
+            self.journal.record("Edit cells", _cell_deltas(edits))
+            return
+
+        edits = [(r, c, old, self.sheet.get_cell_data(r, c)) for (r, c), old in cells.items()]
+        self.dirty.mark_cells(cells)
+        self._index_edits(edits)
+        added_rows = event["added"]["rows"]
+        if added_rows:
+            self.dirty.rows_added(added_rows["table"])
+        if (
+            event["deleted"]["rows"]
+            or event["added"]["columns"]
+            or event["deleted"]["columns"]
+            or event["moved"]["rows"]
+            or event["moved"]["columns"]
+        ):
+            self.dirty.mark_structural()
+        if added_rows or self.dirty.structural:
+            self.schedule_index_rebuild()
+        self._record_sheet_edit(event, edits)
+
+    def _record_sheet_edit(self, event, edits):
+        """
+        Journal a sheet edit. A paste past the edges adds rows / columns:
+        those are recorded whole (as inserts), the other cells as deltas.
+        Deleted or moved rows/columns can't be replayed, so they end the
+        undo history.
+        """
+        if (
+            event["deleted"]["rows"]
+            or event["deleted"]["columns"]
+            or event["moved"]["rows"]
+            or event["moved"]["columns"]
+        ):
+            self.journal.clear()
+            return
+        added_rows = event["added"]["rows"]
+        added_columns = event["added"]["columns"]
+        new_rows = sorted(added_rows["table"] or added_rows["row_heights"]) if added_rows else []
+        new_columns = sorted(added_columns["table"] or added_columns["column_widths"]) if added_columns else []
+
+        data = self.sheet.data
+        deltas = []
+        if new_columns:
+            skip = set(new_rows)
+            deltas.append(ColumnsDelta("insert", tuple(new_columns), tuple(
+                [row[c] if c < len(row) else "" for i, row in enumerate(data) if i not in skip]
+                for c in new_columns
+            )))
+        if new_rows:
+            deltas.append(RowsDelta("insert", tuple(new_rows), tuple(list(data[r]) for r in new_rows if r < len(data))))
+        if new_rows or new_columns:
+            skip_rows, skip_columns = set(new_rows), set(new_columns)
+            edits = [e for e in edits if e[0] not in skip_rows and e[1] not in skip_columns]
+        deltas.extend(_cell_deltas(edits))
+        self.journal.record("Edit cells", deltas)
+
+    # ---------------------------
+    # Row / column structure (sheet mode)
+    # ---------------------------
+    def _set_structure(self, data, columns_changed: bool):
+        """Hand edited data back to the sheet: one redraw, then bookkeeping."""
+        num_cols = max((len(r) for r in data), default=0)
+        for r in data:
+            if len(r) < num_cols:
+                r.extend([""] * (num_cols - len(r)))
+        self._filtered = False
+        self._diff = None  # its rows no longer line up (highlights reset below)
+        self.sheet.display_rows("all")
+        self.sheet.deselect("all", redraw=False)
+        if columns_changed:
+            self.sheet.headers([index_to_col_name(i) for i in range(num_cols)], redraw=False)
+        self.sheet.set_sheet_data(
+            data,
+            reset_col_positions=columns_changed,
+            reset_row_positions=True,
+            redraw=True,
+            reset_highlights=True,
+        )
+        self.schedule_index_rebuild()
+
+    def insert_rows(self, rows: list[int] | None = None) -> int:
+        """
+        Insert empty rows above each block of selected rows (as many as the
+        block has), or one row at the end without a selection.
+        Returns the number of rows inserted.
+        """
+        data = self.sheet.data
+        if rows is None:
+            rows = self.selected_rows()
+        had_columns = self.column_count() > 0
+        width = max(self.column_count(), 1)
+        runs = table_edit.contiguous_runs(rows) or [(len(data), 1)]
+        appended = runs == [(len(data), 1)]
+        positions = self._inserted_positions([(min(start, len(data)), length) for start, length in runs])
+        added = table_edit.insert_rows(data, runs, width)
+        self.journal.record("Insert rows", [RowsDelta("insert", positions, ())])
+        if appended:
+            self.dirty.rows_added([len(data) - 1])
+        else:
+            self.dirty.mark_structural()
+        self._set_structure(data, columns_changed=not had_columns)
+        return added
+
+    def delete_rows(self, rows: list[int] | None = None) -> int:
+        """Delete the selected rows (any selection) in one pass."""
+        if rows is None:
+            rows = self.selected_rows()
+        data = self.sheet.data
+        positions = tuple(sorted({r for r in rows if 0 <= r < len(data)}))
+        contents = tuple(data[r] for r in positions)
+        removed = table_edit.delete_rows(data, rows)
+        if removed:
+            self.journal.record("Delete rows", [RowsDelta("delete", positions, contents)])
+            self.dirty.mark_structural()
+            self._set_structure(data, columns_changed=False)
+        return removed
+
+    def insert_columns(self, columns: list[int] | None = None) -> int:
+        """
+        Insert empty columns left of each block of selected columns, or one
+        column at the end without a selection.
+        """
+        if columns is None:
+            columns = self.selected_columns()
+        data = self.sheet.data
+        if not data:
+            data.append([])
+        runs = table_edit.contiguous_runs(columns) or [(self.column_count(), 1)]
+        added = table_edit.insert_columns(data, runs)
+        self.journal.record("Insert columns", [ColumnsDelta("insert", self._inserted_positions(runs), ())])
+        self.dirty.mark_structural()
+        self._set_structure(data, columns_changed=True)
+        return added
+
+    def delete_columns(self, columns: list[int] | None = None) -> int:
+        """Delete the selected columns (any selection) in one pass over the rows."""
+        if columns is None:
+            columns = self.selected_columns()
+        data = self.sheet.data
+        width = max((len(row) for row in data), default=0)
+        positions = tuple(sorted({c for c in columns if 0 <= c < width}))
+        contents = tuple([row[c] if c < len(row) else "" for row in data] for c in positions)
+        removed = table_edit.delete_columns(data, columns)
+        if removed:
+            self.journal.record("Delete columns", [ColumnsDelta("delete", positions, contents)])
+            self.dirty.mark_structural()
+            self._set_structure(data, columns_changed=True)
+        return removed
+
+    @staticmethod
+    def _inserted_positions(runs) -> tuple:
+        """(start, length) insert runs -> where the new items end up."""
+        positions = []
+        shift = 0
+        for start, length in sorted(runs):
+            positions.extend(range(start + shift, start + shift + length))
+            shift += length
+        return tuple(positions)
+
+    # ---------------------------
+    # Undo / redo
+    # ---------------------------
+    def undo(self) -> str | None:
+        """Undo the last edit; returns its label, or None if there is none."""
+        entry = self.journal.undo()
+        if entry is None:
+            return None
+        self._apply_entry(entry)
+        return entry.label
+
+    def redo(self) -> str | None:
+        """Redo the last undone edit; returns its label, or None if there is none."""
+        entry = self.journal.redo()
+        if entry is None:
+            return None
+        self._apply_entry(entry)
+        return entry.label
+
+    def _apply_entry(self, entry):
+        self._apply_deltas(entry.deltas)
+
+    def _apply_deltas(self, deltas):
+        """
+        Apply deltas in order as one batch. Cell-only batches are written
+        like a bulk update; with rows or columns involved the sheet data
+        is rebuilt once at the end. Rows added or removed past the loaded
+        rows (an upsert's new rows) keep partial saves possible.
+        """
+        self.dirty.touch()  # also for row-only batches in windowed mode
+        if all(isinstance(d, CellDelta) for d in deltas):
+            self._write_cells(list(deltas))
+            return
+        if self.model is not None:
+            self._apply_model_deltas(deltas)
+            return
+
+        data = self.sheet.data
+        columns_changed = False
+        structural = False
+        cells = []
+        for d in deltas:
+            if isinstance(d, CellDelta):
+                _write_delta(data, d)
+                cells.append(d)
+            elif isinstance(d, RowsDelta):
+                structural = structural or d.positions[0] < self.dirty.loaded_rows
+                if d.kind == "delete":
+                    table_edit.delete_rows(data, d.positions)
+                else:
+                    width = max((len(row) for row in data), default=0) or 1
+                    rows = [list(r) for r in d.contents] or [[""] * width for _ in d.positions]
+                    table_edit.insert_rows_at(data, d.positions, rows)
+            else:
+                columns_changed = structural = True
+                if d.kind == "delete":
+                    table_edit.delete_columns(data, d.positions)
+                else:
+                    columns = [list(col) for col in d.contents] or [[""] * len(data) for _ in d.positions]
+                    table_edit.insert_columns_at(data, d.positions, columns)
+        if structural:
+            self.dirty.mark_structural()
+        else:
+            self.dirty.mark_columns(((d.column, d.rows.tolist()) for d in cells), sum(d.count for d in cells))
+        self._set_structure(data, columns_changed=columns_changed)
+
+    def _apply_model_deltas(self, deltas):
+        """
+        Windowed mode: cell deltas, and rows appended to / dropped from
+        the end of the model (the only row changes made there).
+        """
+        cells = []
+        for d in deltas:
+            if isinstance(d, CellDelta):
+                cells.append(d)
+            elif isinstance(d, RowsDelta) and d.kind == "insert":
+                self.model.append_rows([list(r) for r in d.contents])
+            elif isinstance(d, RowsDelta):
+                self.model.truncate(d.positions[0])
+                self._row_filter = None  # may list dropped rows
+            else:
+                raise ValueError("Columns can't be inserted or deleted in windowed mode.")
+        if cells:
+            self._write_cells(cells)  # redraws the window
+        else:
+            first, _ = self._visible_range()
+            self._show_window(self._window_start, top_row=first)
+        self.schedule_index_rebuild()
+
+    # ---------------------------
+    # Search index
+    # ---------------------------
+    def rebuild_index(self):
+        """
+        (Re)build the search index from a snapshot on a worker thread.
+        Edits made meanwhile are queued and replayed once it is ready.
+        """
+        self._drop_index()
+        if not self.row_count():
+            return
+        model = self.model
+        if model is not None and not hasattr(model, "column_codes"):
+            if model.num_rows * max(model.num_cols, 1) > DISK_INDEX_MAX_CELLS:
+                return  # too big to index in memory; search stays off
+        snapshot = self.snapshot()
+
+        def work(job):
+            try:
+                return SearchIndex.build(snapshot, cancelled=lambda: job.cancelled)
+            finally:
+                snapshot.close()
+
+        def on_done(index):
+            self._index_job = None
+            if index is None:
+                return
+            for r, c, old, new in self._index_pending:
+                index.update_cell(r, c, old, new)
+            self._index_pending = []
+            self.search_index = index
+            self._schedule_search_count()
+
+        def on_error(e):
+            self._index_job = None
+            self._index_pending = []
+            self.set_status(f"Search index build failed (match counts are off): {e}")
+
+        self._index_job = BackgroundJob(self, work, on_done=on_done, on_error=on_error).start()
+
+    def schedule_index_rebuild(self):
+        """Rows/columns were inserted, deleted or moved: rebuild a bit later."""
+        if self._index_timer is not None:
+            self.after_cancel(self._index_timer)
+        self._index_pending = []
+        self.search_index = None
+        self._search_cache = None
+
+        def run():
+            self._index_timer = None
+            self.rebuild_index()
+
+        self._index_timer = self.after(INDEX_REBUILD_DELAY_MS, run)
+
+    def _drop_index(self):
+        if self._index_job is not None:
+            self._index_job.cancel()
+            self._index_job = None
+        if self._index_timer is not None:
+            self.after_cancel(self._index_timer)
+            self._index_timer = None
+        self.search_index = None
+        self._index_pending = []
+        self._search_cache = None
+
+    def _index_edits(self, edits):
+        """Cell edits [(row, col, old, new)] -> update the index incrementally."""
+        if self.search_index is not None:
+            for r, c, old, new in edits:
+                self.search_index.update_cell(r, c, old, new)
+            self._schedule_search_count()
+        elif self._index_job is not None:
+            self._index_pending.extend(edits)
+
+    # ---------------------------
+    # Search / filter
+    # ---------------------------
+    def focus_search(self):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, "end")
+
+    def _query(self) -> SearchQuery | None:
+        text = self.search_entry.get()
+        if not text:
+            return None
+        return SearchQuery(text, self.search_mode.get(), bool(self.search_case.get()))
+
+    def _search(self):
+        """Result of the current query (cached until the index changes)."""
+        query = self._query()
+        index = self.search_index
+        if query is None or index is None:
+            return None
+        cached = self._search_cache
+        if cached is not None and cached[0] == query and cached[1] == index.version and cached[2] is index:
+            return cached[3]
+        result = index.search(query)
+        self._search_cache = (query, index.version, index, result)
+        return result
+
+    def _schedule_search_count(self):
+        if self._search_timer is not None:
+            self.after_cancel(self._search_timer)
+        self._search_timer = self.after(SEARCH_DEBOUNCE_MS, self._update_search_count)
+
+    def _update_search_count(self):
+        self._search_timer = None
+        if self._query() is None:
+            text = ""
+        elif self.search_index is None:
+            text = "indexing..." if self._index_job is not None else ""
+        else:
+            text = f"{self._search().count:,} matches"
+        self.search_count_label.configure(text=text)
+
+    def _current_cell(self) -> tuple[int, int]:
+        """Selected cell as absolute (row, col); (-1, -1) if none."""
+        selected = self.sheet.get_currently_selected()
+        if not selected:
+            return -1, -1
+        r, c = selected.row, selected.column
+        if self.model is not None:
+            return self._model_row(self._window_start + r), c
+        return self.sheet.displayed_row_to_data(r), c
+
+    def find_next(self, backwards: bool = False):
+        """Select the next (or previous) cell matching the search box."""
+        result = self._search()
+        if result is None:
+            if self._query() is not None and self.search_index is None:
+                self.set_status("The search index is still being built...")
+            return
+        row, col = self._current_cell()
+        if backwards and row < 0:
+            row, col = 2**62, 2**31
+        cell = result.next_cell(row, col, backwards)
+        if cell is None:
+            self.set_status("No matches")
+            return
+        self.go_to_cell(*cell)
+
+    def go_to_cell(self, row: int, col: int):
+        """Scroll to and select an absolute table cell."""
+        if self.model is not None:
+            pos = row
+            if self._row_filter is not None:
+                pos = int(np.searchsorted(self._row_filter, row))
+                if pos >= len(self._row_filter) or self._row_filter[pos] != row:
+                    self._set_model_filter(None)
+                    pos = row
+            if not (self._window_start <= pos < self._window_start + self._window_len):
+                self._show_window(pos - WINDOW_ROWS // 2, top_row=pos)
+            r = pos - self._window_start
+        else:
+            if self._filtered and row not in self.sheet.displayed_rows:
+                self._clear_filter()
+            r = self.sheet.data_row_to_displayed(row)
+        self.sheet.see(r, col)
+        self.sheet.select_cell(r, col)
+
+    def filter_matches(self):
+        """Only show the rows with a matching cell."""
+        result = self._search()
+        if result is None:
+            return
+        rows = result.rows()
+        if self.model is not None:
+            self._set_model_filter(rows)
+        else:
+            self.sheet.display_rows(rows.tolist(), all_rows_displayed=False, redraw=True)
+            self._filtered = True
+        self.set_status(f"Showing {len(rows):,} of {self.row_count():,} rows")
+
+    def clear_search(self):
+        self.search_entry.delete(0, "end")
+        self._clear_filter()
+        self._update_search_count()
+
+    def _clear_filter(self):
+        if self.model is not None:
+            if self._row_filter is not None:
+                self._set_model_filter(None)
+        elif self._filtered:
+            self.sheet.display_rows("all", redraw=True)
+            self._filtered = False
+        self.set_status("")
+
+    def _set_model_filter(self, rows):
+        self._row_filter = rows
+        self._window_cols = 0
+        self._show_window(0, top_row=0)
+
+    # ---------------------------
+    # Diff highlights (services.diff_service)
+    # ---------------------------
+    def show_diff(self, diff):
+        """
+        Highlight a TableDiff whose new side is the table shown: inserted
+        rows green, changed cells yellow (whole rows for modified rows
+        without cell detail). Deleted rows aren't in this table; they are
+        only counted. Windowed mode marks every window as it is shown.
+        """
+        self._diff = diff
+        self._mark_diff()
+        self.sheet.refresh()
+
+    def clear_diff(self):
+        if self._diff is None:
+            return
+        self._drop_diff()
+        self.sheet.refresh()
+
+    def _drop_diff(self):
+        if self._diff is not None:
+            self._diff = None
+            self.sheet.dehighlight_all(redraw=False)
+
+    def _mark_diff(self):
+        diff = self._diff
+        inserted, modified = diff.inserted, diff.modified[:, 1]
+        if self.model is not None:
+            # sheet rows are window positions: find the changed rows shown
+            start, stop = self._window_start, self._window_start + self._window_len
+            if self._row_filter is not None:
+                shown = np.asarray(self._row_filter[start:stop])
+            else:
+                shown = np.arange(start, stop)
+            inserted_pos = np.flatnonzero(np.isin(shown, inserted))
+            modified_pos = np.flatnonzero(np.isin(shown, modified))
+            modified_rows = shown[modified_pos]
+        else:
+            total = len(self.sheet.data)
+            inserted_pos = inserted[inserted < total]
+            modified_pos = modified_rows = modified[modified < total]
+
+        self.sheet.dehighlight_all(redraw=False)
+        whole_rows, cells = [], []
+        for pos, r in zip(modified_pos.tolist(), modified_rows.tolist()):
+            columns = diff.cells.get(r)
+            if columns is None:
+                whole_rows.append(pos)
+            else:
+                cells.extend((pos, c) for c in columns)
+        # (empty lists must not reach tksheet: they'd mean cell 0, 0)
+        if inserted_pos.size:
+            self.sheet.highlight_rows(inserted_pos.tolist(), bg=DIFF_INSERTED_BG, redraw=False)
+        if whole_rows:
+            self.sheet.highlight_rows(whole_rows, bg=DIFF_ROW_BG, redraw=False)
+        if cells:
+            self.sheet.highlight_cells(cells=cells, bg=DIFF_CELL_BG, redraw=False)
+
+    def next_change(self, backwards: bool = False):
+        """Select the next (or previous) inserted or modified row of the highlighted diff."""
+        diff = self._diff
+        if diff is None:
+            return
+        rows = np.union1d(diff.inserted, diff.modified[:, 1])
+        if not rows.size:
+            return
+        current, _ = self._current_cell()
+        if backwards:
+            i = int(np.searchsorted(rows, current)) - 1
+        else:
+            i = int(np.searchsorted(rows, current, side="right"))
+        row = int(rows[i % rows.size])  # wraps around
+        columns = diff.cells.get(row)
+        self.go_to_cell(row, columns[0] if columns else 0)
+
+    # ---------------------------
+    # View state (remembered per project between sessions)
+    # ---------------------------
+    def view_state(self) -> dict:
+        """Column widths and scroll position, as plain JSON-friendly values."""
+        if self.model is not None:
+            top_row, _ = self._visible_range()
+        else:
+            top_row = int(self.sheet.get_yview()[0] * self.sheet.get_total_rows())
+        return {
+            "column_widths": [round(w) for w in self.sheet.get_column_widths()],
+            "top_row": top_row,
+            "xview": round(self.sheet.get_xview()[0], 4),
+        }
+
+    def restore_view_state(self, state: dict):
+        """
+        Apply a view_state() to the table now shown. Widths are taken for
+        the columns both have; the scroll position is clamped to the table.
+        """
+        total = self._view_rows() if self.model is not None else self.sheet.get_total_rows()
+        top_row = min(int(state.get("top_row", 0)), max(total - 1, 0))
+        if self.model is not None:
+            if top_row:
+                self._show_window(top_row - WINDOW_ROWS // 2, top_row=top_row)
+        elif total:
+            self.sheet.set_yview(top_row / total)
+
+        widths = state.get("column_widths") or []
+        current = self.sheet.get_column_widths()
+        n = min(len(widths), len(current))
+        if n:
+            self.sheet.set_column_widths(list(widths[:n]) + list(current[n:]))
+        self.sheet.set_xview(float(state.get("xview", 0.0)))
         self.sheet.refresh()
 
+    # ---------------------------
+    # Data access (works for both sheet data and models)
+    # ---------------------------
+    def row_count(self) -> int:
+        if self.model is not None:
+            return self.model.num_rows
+        return len(self.sheet.data)
+
+    def column_count(self) -> int:
+        if self.model is not None:
+            return self.model.num_cols
+        return self.sheet.total_columns()
+
+    def selected_rows(self) -> list[int]:
+        """Rows with a selection (whole rows or cells), as absolute table rows."""
+        rows = self.sheet.get_selected_rows(get_cells_as_rows=True)
+        if self.model is not None:
+            return sorted(self._model_row(self._window_start + r) for r in rows)
+        return sorted(self.sheet.displayed_row_to_data(r) for r in rows)
+
+    def selected_columns(self) -> list[int]:
+        """Columns with a selection (whole columns or cells)."""
+        return sorted(self.sheet.get_selected_columns(get_cells_as_columns=True))
+
+    def apply_column_changes(self, changes, label: str = "Bulk update") -> int:
+        """
+        Apply a bulk update (list of services.bulk_service.ColumnChanges)
+        as one batch and journal it for undo (dictionary-encoded old and
+        new values, a few bytes per cell). Returns the number of cells changed.
+        """
+        deltas = [
+            CellDelta.from_codes(ch.column, ch.rows, ch.old_uniques, ch.codes, ch.uniques, ch.codes)
+            for ch in changes
+            if ch.count
+        ]
+        count = self._write_cells(deltas)
+        self.journal.record(label, deltas)
+        return count
+
+    def apply_upsert(self, plan, label: str = "Upsert") -> int:
+        """
+        Apply an upsert (services.upsert_service.UpsertPlan) as one batch
+        and one undo step: the cell updates like a bulk update, the new
+        rows appended after the table. Returns the number of cells changed.
+        In windowed mode rows can only be appended to in-memory tables.
+        """
+        deltas = [
+            CellDelta.from_codes(ch.column, ch.rows, ch.old_uniques, ch.codes, ch.uniques, ch.codes)
+            for ch in plan.changes
+            if ch.count
+        ]
+        if plan.new_rows:
+            if self.model is not None and not hasattr(self.model, "append_rows"):
+                raise ValueError("Rows can't be appended to a disk-backed table; save it as a new file first.")
+            start = self.row_count()
+            deltas.append(RowsDelta("insert", tuple(range(start, start + len(plan.new_rows))), tuple(plan.new_rows)))
+        if not deltas:
+            return 0
+        self._apply_deltas(deltas)
+        self.journal.record(label, deltas)
+        return plan.cells
+
+    def _write_cells(self, deltas) -> int:
+        """
+        Write CellDeltas (their new values): the data is written directly
+        (models get one set_column call per column) and the sheet is redrawn
+        once. Returns the number of cells changed.
+        """
+        count = sum(d.count for d in deltas)
+        if not count:
+            return 0
+
+        # small updates patch the index, big ones rebuild it
+        edits = None
+        if (self.search_index is not None or self._index_job is not None) and count <= INDEX_INCREMENTAL_LIMIT:
+            edits = [
+                (r, d.column, old, new)
+                for d in deltas
+                for r, old, new in zip(d.rows.tolist(), d.old_values().tolist(), d.new_values().tolist())
+            ]
+
+        if self.model is not None:
+            for d in deltas:
+                self.model.set_column(d.column, d.rows, d.new_uniques, d.new_codes)
+            first, _ = self._visible_range()
+            self._show_window(self._window_start, top_row=first)
+        else:
+            data = self.sheet.data
+            for d in deltas:
+                _write_delta(data, d)
+            self.sheet.refresh()
+
+        self.dirty.mark_columns(((d.column, d.rows.tolist()) for d in deltas), count)
+        if edits is not None:
+            self._index_edits(edits)
+        else:
+            self.schedule_index_rebuild()
+        return count
+
+    def get_row(self, r: int):
+        """Row r of the table (not a copy in sheet mode)."""
+        if self.model is not None:
+            return self.model.get_row(r)
+        return self.sheet.data[r]
+
+    def iter_rows(self):
+        """
+        Iterate over all rows without copying the whole table first.
+        In windowed mode rows are streamed from the model.
+        """
+        if self.model is not None:
+            return self.model.iter_rows()
+        return iter(self.sheet.data)
+
+    def snapshot(self):
+        """
+        Read-only copy of the whole table for background saving
+        (num_rows, get_row, iter_rows, close). Edits made after this call
+        don't show up in it.
+        """
+        if self.model is not None:
+            return self.model.snapshot()
+        return RowListSnapshot(self.sheet.data)
 
     def get_data(self):
         """
         Return current sheet data as list of rows (list[list[str]]).
+        In windowed mode this materializes the whole model; prefer iter_rows().
         """
+        if self.model is not None:
+            return list(self.model.iter_rows())
         try:
             # newer tksheet versions
             return self.sheet.get_sheet_data(return_copy=True)
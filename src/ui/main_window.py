@@ -1,22 +1,83 @@
 # task_scheduler/ui/main_window.py
 import csv
 import os
+import time
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
+from typing import NamedTuple
 
 import customtkinter as ctk
 from managers.hotkeys import register_hotkeys
 
-from ui.excel_panel import CsvTablePanel
-from managers.settings_manager import load_settings, add_recent_project
+from managers.settings_manager import SettingsStore
+from managers.background import BackgroundJob
+from managers.file_watcher import FileWatcher
+from services import perf_service as perf
+from services.csv_backends import BACKEND_NAMES, CsvDialect
+from services.bulk_service import BulkUpdate, Condition, compute_updates, parse_columns
+from models.dirty_tracker import SourceFile
+from models.table_cache import CachedTable, TableCache, table_memory
 
+# Only what the first frame needs is imported here. The table panel
+# (tksheet, numpy), the CSV / Excel services and the table models are
+# imported where they are first used, after the window has painted.
 
 from ui.menu_panel import build_menu_bar
-from ui.commands_panel import build_excel_panel
+from ui.commands_panel import NO_CONDITION, build_excel_panel
+
+_IMPORTED_AT = time.perf_counter()
+
+
+# Rows per batch handed from the loader thread to the sheet.
+# The first batch is small so the first screen shows up right away.
+FIRST_BATCH_ROWS = 200
+BATCH_ROWS = 5000
+
+# Files at least this big are loaded into a dictionary-encoded CompactTable
+# (shown through the windowed view) instead of plain lists in the sheet.
+COMPACT_THRESHOLD_BYTES = 8 * 1024 * 1024
+# Same for Excel sheets, by the cell count from the sheet's dimension
+COMPACT_THRESHOLD_CELLS = 1_000_000
+
+# Files at least this big are opened as a disk-backed, windowed table
+# (memory-mapped + row index) instead of being loaded into the sheet.
+VIRTUAL_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Delay between the first frame and building the table panel, so the
+# window manager gets to show the painted window first
+STARTUP_DEFER_MS = 10
+
+# Poll interval of a tail refresh job (small: the new rows of a growing
+# file should show up within milliseconds)
+TAIL_POLL_MS = 5
+
+# Preloaded project tables up to this many cells are shown as plain sheet
+# data (all edits available, decoded in well under a second); bigger ones
+# go straight to the windowed view, so switching tabs stays instant.
+TAB_SHEET_MAX_CELLS = 200_000
+
+
+class StartupTimes(NamedTuple):
+    """Seconds from process start until each startup milestone."""
+    imports: float      # ui.main_window and its imports loaded
+    first_frame: float  # window painted (sidebar, menus, empty table area)
+    ready: float        # table panel built, app fully usable
+
+    def __str__(self) -> str:
+        return f"imports {self.imports:.3f} s, first frame {self.first_frame:.3f} s, ready {self.ready:.3f} s"
 
 
 class CsvViewerApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, started: float | None = None, report_startup: bool = False):
+        """
+        started: time.perf_counter() at process start (for StartupTimes;
+        default: now). report_startup=True prints the startup times and
+        quits once the app is usable, without restoring the last project.
+        """
+        self._started = started if started is not None else time.perf_counter()
+        self._report_startup = report_startup
+        self._first_frame_at: float | None = None
+        self.startup_times: StartupTimes | None = None
         super().__init__()
 
         # --- Window setup ---
@@ -30,7 +91,27 @@ class CsvViewerApp(ctk.CTk):
         # current CSV path
         # --- state ---
         self.csv_path: str | None = None   # currently opened CSV
+        self.excel_source: tuple[str, str] | None = None  # (workbook, sheet) if imported from Excel
         self.project_path: str | None = None  # currently opened/saved project (YAML)
+        self.parser_backend = "auto"  # CSV parser backend (project option, see csv_backends)
+        self._load_job: BackgroundJob | None = None  # running background CSV load
+        self._save_job: BackgroundJob | None = None  # running background save
+        self._bulk_job: BackgroundJob | None = None  # running bulk update
+        self._diff_job: BackgroundJob | None = None  # running compare
+        self._last_upsert: tuple | None = None  # (input path, UpsertRules) of the last upsert dialog
+        # where the CSV in the panel ends and how it was parsed, so a file
+        # that only grew can be refreshed by appending (see _refresh_csv)
+        self._tail_mark = None  # services.csv_service.TailMark
+        self._csv_dialect: CsvDialect | None = None
+        self.file_watcher = FileWatcher(self, self._on_csv_changed)
+        # multi-file projects: one tab per file (services.project_service.ProjectFile);
+        # tables not shown wait in the cache, or in _tab_states while
+        # they have unsaved edits (never evicted)
+        self.project_files: list = []
+        self._active_tab: int | None = None
+        self._tab_states: dict = {}  # ProjectFile -> (ui.excel_panel.TableState, CsvDialect | None)
+        self._shown_entry: CachedTable | None = None  # cache entry behind the shown sheet data
+        self._preload_job: BackgroundJob | None = None
 
         # Layout: col 0 = sidebar, col 1 = main area
         self.grid_rowconfigure(0, weight=1)
@@ -40,12 +121,21 @@ class CsvViewerApp(ctk.CTk):
         # LEFT: commands panel
         self.commands_panel = build_excel_panel(self)
 
-        # RIGHT: CSV table panel
-        self.csv_panel = CsvTablePanel(self)
-        self.csv_panel.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+        # RIGHT: CSV table panel, built right after the first frame (see
+        # csv_panel); an empty frame holds its place until then
+        self._csv_panel = None
+        self._panel_placeholder = ctk.CTkFrame(self, corner_radius=10)
+        self._panel_placeholder.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
 
         self._update_title_with_path()
 
+        # --- NEW: load settings (the last project is reopened after the first frame) ---
+        # kept in memory, written to settings.json shortly after changes
+        self.settings = SettingsStore()
+        perf.TRACER.enabled = bool(self.settings["perf_trace"])
+        self.table_cache = TableCache(int(self.settings["table_cache_mb"]) * 1024 * 1024)
+        perf.TRACER.on_finish = lambda op: self.csv_panel.set_perf(op.summary())
+
         # Menu bar
         build_menu_bar(self)
         
@@ -53,18 +143,73 @@ class CsvViewerApp(ctk.CTk):
         register_hotkeys(self)
 
         self._update_title_with_path()
-        
-        # --- NEW: load settings & auto-open last project if available ---
-        self.settings = load_settings()
+
+        # closing the window ends mainloop without destroying it, so
+        # run_app can still save the view (see shutdown)
+        self.protocol("WM_DELETE_WINDOW", self.quit)
+        self.after_idle(self._on_first_frame)
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+    @property
+    def csv_panel(self):
+        """The table panel; built on first use if startup hasn't built it yet."""
+        if self._csv_panel is None:
+            from ui.excel_panel import CsvTablePanel
+
+            panel = CsvTablePanel(self)
+            panel.journal.memory_cap = int(self.settings["undo_memory_mb"]) * 1024 * 1024
+            self._panel_placeholder.destroy()
+            panel.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+            self._csv_panel = panel
+        return self._csv_panel
+
+    def _on_first_frame(self):
+        # runs once the event loop is idle: draw what's there, then do the
+        # heavy part of startup in the next tick
+        self.update_idletasks()
+        self._first_frame_at = time.perf_counter()
+        self.after(STARTUP_DEFER_MS, self._finish_startup)
+
+    def _finish_startup(self):
+        panel_start = time.perf_counter()
+        self.csv_panel
+        ready = time.perf_counter()
+        started = self._started
+        self.startup_times = StartupTimes(
+            _IMPORTED_AT - started, self._first_frame_at - started, ready - started
+        )
+        perf.TRACER.record(
+            "Startup",
+            started,
+            ready,
+            {
+                "imports": (started, _IMPORTED_AT),
+                "first frame": (_IMPORTED_AT, self._first_frame_at),
+                "table panel": (panel_start, ready),
+            },
+        )
+        if self._report_startup:
+            print(self.startup_times, flush=True)
+            self.quit()
+            return
+        self.after_idle(self._restore_last_project)
+
+    def _restore_last_project(self):
+        """Reopen the most recent project; its CSV streams in in the background."""
         recent = self.settings.get("recent_projects", [])
         if recent:
-            last_project = recent[0]
             # don't spam error popups on startup; fail silently
-            self._open_project_by_path(last_project, show_errors=False)
+            self._open_project_by_path(recent[0], show_errors=False)
+
+    def shutdown(self):
+        """Remember the project's view, write pending settings and close the window."""
+        self.cancel_load()
+        self._remember_project_view()
+        self.settings.flush()
+        self.destroy()
 
-        self._update_title_with_path()
-        
-        
     # ------------------------------------------------------------------
     # Appearance / Help
     # ------------------------------------------------------------------
@@ -90,6 +235,42 @@ class CsvViewerApp(ctk.CTk):
             "About",
             "Task Scheduler\n\nBuilt with customtkinter.\n© Osama ElMorady's toolbox 😉"
         )
+
+    # ------------------------------------------------------------------
+    # Performance trace
+    # ------------------------------------------------------------------
+    def set_perf_trace(self, enabled: bool):
+        """
+        Turn timing of file actions on or off (remembered in settings).
+        While on, the cost of the last action is shown in the status line.
+        """
+        perf.TRACER.enabled = enabled
+        if not enabled:
+            self.csv_panel.set_perf("")
+        self.settings.set("perf_trace", enabled)
+
+    def export_perf_trace(self):
+        """Write the recorded operations as a Chrome trace (chrome://tracing, Perfetto)."""
+        if not perf.TRACER.operations:
+            messagebox.showinfo(
+                "Export Performance Trace",
+                "Nothing recorded yet. Turn on View > Performance Trace and open or save a file.",
+            )
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Performance Trace",
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")],
+            initialfile="csv-viewer-trace.json",
+        )
+        if not path:
+            return
+        try:
+            events = perf.TRACER.export_chrome_trace(path)
+        except Exception as e:
+            messagebox.showerror("Export Performance Trace", f"Failed to write trace:\n{e}")
+            return
+        self.csv_panel.set_status(f"Trace written to {os.path.basename(path)} ({events:,} events)")
     # ------------------------------------------------------------------
     # File actions
     # ------------------------------------------------------------------
@@ -107,8 +288,15 @@ class CsvViewerApp(ctk.CTk):
             ):
                 return
 
-        self.csv_path = None
+        if not self._confirm_discard_tabs("New Project"):
+            return
+
+        self.cancel_load()
+        self._remember_project_view()
+        self._close_project_tabs()
+        self._set_source()
         self.project_path = None
+        self.parser_backend = "auto"
         self.csv_panel.clear_table()
         self._update_title_with_path()
 
@@ -124,7 +312,7 @@ class CsvViewerApp(ctk.CTk):
 
 
     def save_project(self):
-        if not self.csv_path:
+        if not self.csv_path and not self.project_files:
             if not messagebox.askyesno(
                 "Save Project",
                 "No CSV is open. Save project anyway (without CSV path)?",
@@ -139,53 +327,23 @@ class CsvViewerApp(ctk.CTk):
         if not path:
             return
 
-        project_data = {
-            "csv_path": self.csv_path or "",
-        }
+        from services.project_service import Project, save_project
+
+        self._adopt_current_file()
+        project = Project(list(self.project_files), self._active_tab or 0, self.parser_backend)
 
         try:
-            self._save_project_yaml(path, project_data)
+            save_project(path, project)
             self.project_path = path
 
             # 🔥 update recent projects & settings
-            self.settings = add_recent_project(path)
+            self.settings.add_recent_project(path)
 
             messagebox.showinfo("Save Project", f"Project saved to:\n{path}")
         except Exception as e:
             messagebox.showerror("Save Project", f"Failed to save project:\n{e}")
 
 
-    def _load_project_yaml(self, path: str) -> dict:
-        """
-        VERY simple YAML reader for key: value pairs.
-        Enough for now and still valid YAML for the future.
-        """
-        project = {}
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if ":" not in line:
-                    continue
-                key, value = line.split(":", 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-                project[key] = value
-        return project
-
-    def _save_project_yaml(self, path: str, data: dict) -> None:
-        lines = []
-        for key, value in data.items():
-            if value is None:
-                value = ""
-            # basic quoting; you can improve later
-            lines.append(f'{key}: "{value}"')
-        text = "\n".join(lines) + "\n"
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(text)
-
-
     def _open_project_by_path(self, path: str, show_errors: bool = True):
         """
         Core logic to open a project from a given path.
@@ -193,9 +351,16 @@ class CsvViewerApp(ctk.CTk):
         """
         import traceback
 
+        from services.project_service import load_project
+
+        if show_errors and not self._confirm_discard_tabs("Open Project"):
+            return
+        trace = perf.TRACER.start(f"Open Project {os.path.basename(path)}")
         try:
-            project = self._load_project_yaml(path)
+            with trace.activate(), perf.span("read project"):
+                project = load_project(path)
         except Exception as e:
+            trace.finish("error")
             if show_errors:
                 messagebox.showerror("Open Project", f"Failed to open project:\n{e}")
             else:
@@ -204,31 +369,381 @@ class CsvViewerApp(ctk.CTk):
                 traceback.print_exc()
             return
 
+        self._remember_project_view()
+        self.cancel_load()
+        self._close_project_tabs()
         self.project_path = path
-        self.csv_path = project.get("csv_path") or None
+        self._set_source()
+
+        # what the last session remembered about this project: the active
+        # CSV's dialect (no re-sniffing) and the view (column widths, scroll)
+        state = self.settings.project_state(path)
+        backend = project.parser_backend if project.parser_backend != "auto" else state.get("parser_backend")
+        self.parser_backend = backend if backend in BACKEND_NAMES else "auto"
 
         # Update recent_projects in settings
-        self.settings = add_recent_project(path)
+        self.settings.add_recent_project(path)
 
-        if self.csv_path:
-            try:
-                rows = self._load_csv_file(self.csv_path)
-                self.csv_panel.load_data(rows)
-            except Exception as e:
-                if show_errors:
-                    messagebox.showerror(
-                        "Open Project", f"Project loaded, but CSV failed:\n{e}"
-                    )
-        else:
+        if not project.files:
             self.csv_panel.clear_table()
+            trace.finish()
+            self._update_title_with_path()
+            return
 
+        self.project_files = list(project.files)
+        self._active_tab = project.active
+        active = self.project_files[project.active]
+        same_csv = not active.is_excel and state.get("csv_path") == active.path
+        dialect = None
+        if same_csv and isinstance(state.get("dialect"), dict):
+            try:
+                dialect = CsvDialect(**state["dialect"])
+            except TypeError:
+                dialect = None
+        view = state.get("view") if same_csv else None
+
+        self._show_tabs()
+        self._enter_tab(project.active, trace=trace, dialect=dialect, view=view, show_errors=show_errors)
+        # the other files are parsed meanwhile, all at once
+        self._start_preload([f for f in self.project_files if f != active])
         self._update_title_with_path()
 
+    # ------------------------------------------------------------------
+    # Project tabs
+    # ------------------------------------------------------------------
+    def add_project_files(self):
+        """Add CSV files / workbooks (one tab per worksheet) to the project and preload them."""
+        paths = filedialog.askopenfilenames(
+            title="Add Files to Project",
+            filetypes=[("CSV and Excel files", "*.csv *.csv.gz *.csv.bz2 *.csv.xz *.xlsx *.xlsm"), ("All files", "*.*")],
+        )
+        if not paths:
+            return
+
+        from services.excel_service import list_sheets
+        from services.project_service import ProjectFile
+
+        self._adopt_current_file()
+        added = []
+        for path in paths:
+            path = os.path.normpath(path)
+            files = [ProjectFile(path)]
+            if files[0].is_excel:
+                try:
+                    files = [ProjectFile(path, sheet.name) for sheet in list_sheets(path)]
+                except Exception as e:
+                    messagebox.showerror("Add Files to Project", f"Failed to read workbook:\n{e}")
+                    continue
+            added.extend(f for f in files if f not in self.project_files and f not in added)
+        if not added:
+            return
+
+        self.project_files.extend(added)
+        if self._active_tab is None:
+            self._active_tab = 0
+            self._show_tabs()
+            self._enter_tab(0)
+            added = added[1:]
+        else:
+            self._show_tabs()
+        self._start_preload(added)
+
+    def close_tab(self):
+        """Remove the shown file from the project (the file itself stays)."""
+        index = self._active_tab
+        if index is None:
+            return
+        panel = self.csv_panel
+        if not panel.dirty.is_clean and not messagebox.askyesno(
+            "Close Tab", "The table has unsaved edits. Close it anyway?"
+        ):
+            return
+        self.cancel_load()
+        self._shown_entry = None
+        panel.detach_table().journal.clear()
+        file = self.project_files.pop(index)
+        self.table_cache.discard(file)
+        self._set_source()
+        if not self.project_files:
+            self._active_tab = None
+            self._show_tabs()
+            self._update_title_with_path()
+            return
+        self._active_tab = min(index, len(self.project_files) - 1)
+        self._show_tabs()
+        self._enter_tab(self._active_tab)
+
+    def switch_tab(self, index: int):
+        """Show another file of the project: from the cache if it was preloaded, else loaded now."""
+        if index == self._active_tab or not 0 <= index < len(self.project_files):
+            return
+        if self._save_job is not None or self._bulk_job is not None:
+            messagebox.showinfo("Switch Tab", "Please wait until the current save or update has finished.")
+            self.csv_panel.select_tab(self._active_tab)
+            return
+        self._remember_project_view()
+        self._leave_tab()
+        self._active_tab = index
+        self.csv_panel.select_tab(index)
+        self._enter_tab(index)
+
+    def _show_tabs(self):
+        self.csv_panel.set_tabs([f.title for f in self.project_files], self._active_tab, self.switch_tab)
+
+    def _adopt_current_file(self):
+        """A file opened outside a project becomes the project's first tab."""
+        from services.project_service import ProjectFile
+
+        if self._active_tab is not None:
+            return
+        if self.csv_path:
+            self.project_files = [ProjectFile(self.csv_path)]
+        elif self.excel_source:
+            self.project_files = [ProjectFile(*self.excel_source)]
+        else:
+            return
+        self._active_tab = 0
+
+    def _leave_tab(self):
+        """
+        Take the shown table out of the panel: kept in _tab_states if it
+        has unsaved edits, otherwise put back into the cache (a half
+        loaded table is dropped; it is loaded again when shown).
+        """
+        from models.compact_table import CompactTable
+
+        file = self.project_files[self._active_tab]
+        loading = self._load_job is not None
+        self.cancel_load()
+        panel = self.csv_panel
+        source, dialect = panel.dirty.source, self._csv_dialect
+        sheet = self.excel_source[1] if self.excel_source else None
+        state = panel.detach_table()
+        entry, self._shown_entry = self._shown_entry, None
+        self._set_source()
+
+        if not state.is_clean:
+            self._tab_states[file] = (state, dialect)
+            return
+        if loading:
+            if state.model is not None:
+                state.model.close()
+            return
+        if state.model is not None:
+            entry = CachedTable(state.model, table_memory(state.model), source, dialect, sheet)
+        elif entry is None or entry.source != source or entry.table.num_rows != len(state.rows):
+            # streamed into the sheet, or grown since (tail refresh)
+            table = CompactTable.from_rows(state.rows)
+            entry = CachedTable(table, table_memory(table), source, dialect, sheet)
+        self.table_cache.put(file, entry)
+
+    def _enter_tab(self, index: int, trace=None, dialect=None, view=None, show_errors: bool = True):
+        """Show the file of tab `index`: its kept state, its cached table, or load it."""
+        file = self.project_files[index]
+        kept = self._tab_states.pop(file, None)
+        if kept is not None:
+            state, dialect = kept
+            self._set_file_source(file)
+            self.csv_panel.attach_table(state)
+            if not file.is_excel:
+                self._track_csv_end(dialect)
+            self._update_title_with_path()
+            return
 
+        entry = self.table_cache.pop(file)
+        if entry is not None and entry.source is not None and not entry.source.unchanged():
+            entry.table.close()  # the file changed since it was preloaded
+            entry = None
+        if entry is not None:
+            self._show_cached(file, entry)
+            if trace is not None:
+                trace.finish()
+            return
 
+        if file.is_excel:
+            self._start_project_sheet_load(file, show_errors)
+            if trace is not None:
+                trace.finish()
+            return
+        self._start_csv_load(
+            file.path,
+            error_title="Open Project",
+            error_text=f"Failed to load {file.title}",
+            show_errors=show_errors,
+            trace=trace,
+            dialect=dialect,
+            view=view,
+        )
+
+    def _set_file_source(self, file):
+        if file.is_excel:
+            self._set_source(excel_source=(file.path, file.sheet or ""))
+        else:
+            self._set_source(csv_path=file.path)
+
+    def _show_cached(self, file, entry: CachedTable):
+        from models.compact_table import CompactTable
+
+        panel = self.csv_panel
+        table = entry.table
+        self._set_file_source(file._replace(sheet=entry.sheet or file.sheet))
+        started = time.perf_counter()
+        if isinstance(table, CompactTable) and table.num_rows * max(table.num_cols, 1) <= TAB_SHEET_MAX_CELLS:
+            panel.load_data(table.get_rows(0, table.num_rows))
+            self._shown_entry = entry  # cached again as is when the tab is left clean
+        else:
+            panel.load_model(table)
+            panel.rebuild_index()
+        panel.dirty.reset(panel.row_count(), entry.source)
+        if not file.is_excel:
+            self._track_csv_end(entry.dialect)
+        panel.set_status(f"{file.title}: {panel.row_count():,} rows (preloaded, {time.perf_counter() - started:.3f}s)")
+        self._update_title_with_path()
+
+    def _start_project_sheet_load(self, file, show_errors: bool):
+        from services.excel_service import list_sheets
+
+        try:
+            sheets = list_sheets(file.path)
+        except Exception as e:
+            if show_errors:
+                messagebox.showerror("Open Project", f"Failed to read workbook:\n{e}")
+            else:
+                self.csv_panel.set_status(f"Failed to read workbook {file.title}: {e}")
+            return
+        sheet = next((s for s in sheets if s.name == file.sheet), None) if file.sheet else (sheets[0] if sheets else None)
+        if sheet is None:
+            self.csv_panel.set_status(f"{file.title}: worksheet not found")
+            return
+        self._start_excel_load(file.path, sheet)
 
+    def _start_preload(self, files):
+        """
+        Parse project files in worker processes, all at once, into the
+        table cache. Stops once the cache budget is reached.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+        from models.mmap_table import MmapCsvTable
+        from services.project_service import preload_table
 
+        files = [f for f in files if f not in self.table_cache and f not in self._tab_states]
+        if not files:
+            return
+        self._cancel_preload()
+        backend = self.parser_backend
+        workers = min(len(files), os.cpu_count() or 1)
+        trace = perf.TRACER.start(f"Preload {len(files)} files")
+        stats = {"done": 0, "failed": []}
+
+        def work(job):
+            pool = ProcessPoolExecutor(max_workers=workers)
+            queued = iter(files)
+            pending = {}
+            try:
+                def submit():
+                    file = next(queued, None)
+                    if file is not None:
+                        pending[pool.submit(preload_table, file, backend, VIRTUAL_THRESHOLD_BYTES)] = file
+
+                # two per worker in flight: results wait in the queue, not in the pool
+                for _ in range(workers * 2):
+                    submit()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file = pending.pop(future)
+                        error = future.exception()
+                        item = (file, None if error else future.result(), error)
+                        if job.cancelled or not job.emit(item):
+                            return None
+                        submit()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        def on_item(item):
+            file, result, error = item
+            if error is not None:
+                stats["failed"].append(file.title)
+                self.csv_panel.set_status(f"Preloading {file.title} failed: {error}")
+                return
+            stats["done"] += 1
+            shown = self._active_tab is not None and self.project_files[self._active_tab] == file
+            if shown or file not in self.project_files or file in self._tab_states:
+                return  # loaded (or removed) meanwhile
+            table = result.table
+            if result.indexed:
+                table = MmapCsvTable.with_index(
+                    file.path,
+                    table,
+                    result.source.size,
+                    delimiter=result.dialect.delimiter,
+                    quotechar=result.dialect.quotechar,
+                )
+            trace.count(rows=table.num_rows)
+            entry = CachedTable(table, table_memory(table), result.source, result.dialect, result.sheet)
+            # put() returns the entries it dropped to stay within the budget
+            evicted = self.table_cache.put(file, entry)
+            if evicted:
+                job.cancel()  # budget reached: the rest loads when shown
+
+        def on_finish(_result=None, error=None):
+            if self._preload_job is job:
+                self._preload_job = None
+            trace.finish("error" if error is not None else "ok")
+            cached = self.table_cache.used / 1e6
+            text = f"Preloaded {stats['done']} of {len(files)} files ({cached:.0f} MB cached)"
+            if stats["failed"]:
+                text += "; failed: " + ", ".join(stats["failed"])
+            if error is not None:
+                text += f"; preloading stopped: {error}"
+            self.csv_panel.set_status(text)
+
+        job = BackgroundJob(
+            self,
+            work,
+            on_item=on_item,
+            on_done=on_finish,
+            on_error=lambda e: on_finish(error=e),
+            on_cancel=on_finish,
+            trace=trace,
+        )
+        self._preload_job = job.start()
+
+    def _cancel_preload(self):
+        if self._preload_job is not None:
+            self._preload_job.cancel()
+            self._preload_job = None
+
+    def _confirm_discard_tabs(self, title: str) -> bool:
+        """Ask before dropping tabs with unsaved edits (other than the shown one)."""
+        if not self._tab_states:
+            return True
+        names = ", ".join(f.title for f in self._tab_states)
+        return messagebox.askyesno(title, f"These tabs have unsaved edits: {names}\nDiscard them?")
+
+    def _close_project_tabs(self):
+        self._cancel_preload()
+        self.table_cache.clear()
+        for state, _dialect in self._tab_states.values():
+            if state.model is not None:
+                state.model.close()
+            state.journal.clear()
+        self._tab_states.clear()
+        self.project_files = []
+        self._active_tab = None
+        self._shown_entry = None
+        self._show_tabs()
+
+    def _remember_project_view(self):
+        """Store the open project's view state (column widths, scroll) in the settings."""
+        if self.project_path is None or self._csv_panel is None or not self.csv_path:
+            return
+        if not self._csv_panel.row_count():
+            return
+        self.settings.set_project_state(
+            self.project_path, csv_path=self.csv_path, view=self._csv_panel.view_state()
+        )
 
     # ------------------------------------------------------------------
     # Excel helpers
@@ -238,22 +753,211 @@ class CsvViewerApp(ctk.CTk):
 
     def export_to_excel(self):
         """
-        Placeholder: you can later export current table to Excel.
+        Export the current table to .xlsx on a worker thread.
+        Rows are streamed from a snapshot into a write-only workbook, with a
+        new worksheet every 1,048,576 rows.
         """
-        messagebox.showinfo(
-            "Export to Excel",
-            "Export to Excel is not implemented yet.\n\n"
-            "Later, we can export the current CSV table to .xlsx using pandas.",
+        if self._save_job is not None:
+            messagebox.showinfo("Export to Excel", "A save or export is already in progress.")
+            return
+
+        panel = self.csv_panel
+        if not panel.row_count():
+            messagebox.showinfo("Export to Excel", "There is no data to export.")
+            return
+
+        base = os.path.splitext(os.path.basename(self.csv_path))[0] if self.csv_path else "data"
+        initialdir = os.path.dirname(self.csv_path) if self.csv_path else ""
+        path = filedialog.asksaveasfilename(
+            title="Export to Excel",
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            initialfile=base + ".xlsx",
+            initialdir=initialdir or None,
         )
+        if not path:
+            return
+
+        from services.excel_service import export_rows_to_xlsx
+
+        name = os.path.basename(path)
+        trace = perf.TRACER.start(f"Export to Excel {name}")
+        with trace.activate(), perf.span("snapshot"):
+            snapshot = panel.snapshot()
+        trace.count(rows=snapshot.num_rows)
+
+        def work(job):
+            try:
+                with perf.span("serialize"):
+                    return export_rows_to_xlsx(
+                        path,
+                        snapshot.iter_rows(),
+                        total_rows=snapshot.num_rows,
+                        sheet_name=base,
+                        progress=lambda done, total: job.emit((done, total)),
+                        cancelled=lambda: job.cancelled,
+                    )
+            finally:
+                snapshot.close()
+
+        def on_item(item):
+            done, total = item
+            pct = (100.0 * done / total) if total else 100.0
+            panel.set_status(f"Exporting {name}... {done:,} rows ({pct:.0f}%)")
+
+        def on_done(sheets):
+            self._save_job = None
+            trace.finish()
+            panel.set_status(f"Exported {name} ({sheets} worksheet(s))")
+            messagebox.showinfo("Export to Excel", f"Exported to:\n{path}")
+
+        def on_error(e):
+            self._save_job = None
+            trace.finish("error")
+            panel.set_status("")
+            messagebox.showerror("Export to Excel", f"Failed to export:\n{e}")
+
+        def on_cancel():
+            self._save_job = None
+            trace.finish("cancelled")
+            panel.set_status("Export cancelled")
+
+        panel.set_status(f"Exporting {name}...")
+        self._save_job = BackgroundJob(
+            self,
+            work,
+            on_item=on_item,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancel=on_cancel,
+            trace=trace,
+        ).start()
 
     def import_from_excel(self):
         """
-        Placeholder: you can later import Excel and show it in the table.
+        Open a worksheet of an .xlsx/.xlsm file in the table.
+        Sheet names and sizes are listed up front (without parsing any
+        cells); only the chosen sheet is parsed, streamed in the background
+        like a CSV load.
         """
-        messagebox.showinfo(
-            "Import from Excel",
-            "Import from Excel is not implemented yet.\n\n"
-            "Later, we can load .xlsx and display it like a CSV.",
+        path = filedialog.askopenfilename(
+            title="Import from Excel",
+            filetypes=[("Excel files", "*.xlsx *.xlsm"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        from services.excel_service import list_sheets
+        from ui.sheet_picker import ask_sheet
+
+        try:
+            sheets = list_sheets(path)
+        except Exception as e:
+            messagebox.showerror("Import from Excel", f"Failed to read workbook:\n{e}")
+            return
+        if not sheets:
+            messagebox.showinfo("Import from Excel", "The workbook has no worksheets.")
+            return
+
+        sheet = sheets[0] if len(sheets) == 1 else ask_sheet(self, sheets)
+        if sheet is None:
+            return
+
+        self.cancel_load()
+        self._start_excel_load(path, sheet)
+
+    def save_to_workbook(self):
+        """
+        Write the edited cells back into the worksheet they were imported
+        from. Only that sheet's XML is rewritten; formatting, other sheets
+        and all other parts of the workbook are left as they are.
+        """
+        if self.excel_source is None:
+            messagebox.showinfo("Save to Workbook", "Open a worksheet with Import from Excel first.")
+            return
+        if self._save_job is not None:
+            messagebox.showinfo("Save to Workbook", "A save or export is already in progress.")
+            return
+
+        panel = self.csv_panel
+        dirty = panel.dirty
+        if dirty.structural:
+            messagebox.showerror(
+                "Save to Workbook",
+                "Rows or columns were inserted, deleted or moved, so cells no longer\n"
+                "line up with the workbook. Use Export to Excel instead.",
+            )
+            return
+
+        # edited cells + every non-empty cell of appended rows
+        changes = {}
+        for r, c in dirty.dirty_cells:
+            row = panel.get_row(r)
+            changes[(r, c)] = row[c] if c < len(row) else ""
+        for r in range(dirty.loaded_rows, panel.row_count()):
+            for c, value in enumerate(panel.get_row(r)):
+                if value != "":
+                    changes[(r, c)] = value
+        if not changes:
+            messagebox.showinfo("Save to Workbook", "There are no changes to save.")
+            return
+
+        from services.excel_service import update_xlsx_cells
+
+        path, sheet_name = self.excel_source
+        pending = dirty.detach(panel.row_count())
+        generation = dirty.generation
+        name = f"{os.path.basename(path)} [{sheet_name}]"
+        trace = perf.TRACER.start(f"Save to Workbook {name}")
+        trace.count(cells=len(changes))
+
+        def work(job):
+            with perf.span("serialize"):
+                return update_xlsx_cells(path, sheet_name, changes, cancelled=lambda: job.cancelled)
+
+        def restore():
+            if panel.dirty.generation == generation:
+                panel.dirty.merge_back(pending)
+
+        def on_done(cells):
+            self._save_job = None
+            trace.finish()
+            panel.set_status(f"Updated {cells:,} cell(s) in {name}")
+
+        def on_error(e):
+            self._save_job = None
+            trace.finish("error")
+            restore()
+            panel.set_status("")
+            messagebox.showerror("Save to Workbook", f"Failed to update workbook:\n{e}")
+
+        def on_cancel():
+            self._save_job = None
+            trace.finish("cancelled")
+            restore()
+            panel.set_status("Save cancelled (workbook left unchanged)")
+
+        panel.set_status(f"Updating {name}...")
+        self._save_job = BackgroundJob(
+            self, work, on_done=on_done, on_error=on_error, on_cancel=on_cancel, trace=trace
+        ).start()
+
+    def _start_excel_load(self, path: str, sheet: "SheetInfo"):
+        from services.excel_service import iter_sheet_batches
+
+        cells = (sheet.rows or 0) * (sheet.cols or 0)
+        name = f"{os.path.basename(path)} [{sheet.name}]"
+        self._load_batches(
+            name,
+            produce=lambda: iter_sheet_batches(
+                path, sheet, batch_size=BATCH_ROWS, first_batch_size=FIRST_BATCH_ROWS
+            ),
+            on_start=lambda: self._set_source(excel_source=(path, sheet.name)),
+            on_finish=lambda _result, loaded: self.csv_panel.dirty.reset(loaded),
+            compact=cells >= COMPACT_THRESHOLD_CELLS,
+            error_title="Import from Excel",
+            error_text="Failed to import worksheet",
+            trace=perf.TRACER.start(f"Import from Excel {name}"),
         )
 
     
@@ -289,9 +993,10 @@ class CsvViewerApp(ctk.CTk):
                 writer.writerow([""])   # one empty cell
 
             # Update app state to point to this new CSV
-            self.csv_path = path
+            self._set_source(csv_path=path)
 
             # Load a single empty cell into the sheet
+            self.cancel_load()
             self.csv_panel.load_data([[""]])
 
             # Update window title
@@ -306,41 +1011,189 @@ class CsvViewerApp(ctk.CTk):
     def open_csv(self):
         path = filedialog.askopenfilename(
             title="Open CSV",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[("CSV files", "*.csv *.csv.gz *.csv.bz2 *.csv.xz"), ("All files", "*.*")],
         )
         if not path:
             return
 
-        try:
-            rows = self._load_csv_file(path)
-        except Exception as e:
-            messagebox.showerror("Open CSV", f"Failed to open CSV:\n{e}")
-            return
-
-        self.csv_path = path
-        self.csv_panel.load_data(rows)
-        self._update_title_with_path()
+        self._start_csv_load(path, error_title="Open CSV", error_text="Failed to open CSV")
 
     def reload_csv(self):
         if not self.csv_path:
             messagebox.showinfo("Reload CSV", "No CSV file is currently open.")
             return
 
-        try:
-            rows = self._load_csv_file(self.csv_path)
-        except Exception as e:
-            messagebox.showerror("Reload CSV", f"Failed to reload CSV:\n{e}")
+        self._refresh_csv(manual=True)
+
+    def set_watch_file(self, enabled: bool):
+        """Follow changes of the open CSV file on disk (remembered in settings)."""
+        self.settings.set("watch_file", enabled)
+        if enabled and self.csv_path and self._load_job is None:
+            self.file_watcher.watch(self.csv_path)
+        elif not enabled:
+            self.file_watcher.stop()
+
+    # ------------------------------------------------------------------
+    # Tail refresh (files that grow, e.g. logs)
+    # ------------------------------------------------------------------
+    def _track_csv_end(self, dialect: CsvDialect | None, size: int | None = None):
+        """
+        Remember where the CSV in the panel ends (its SourceFile, or `size`
+        bytes of it for a memory-mapped table) and how it was parsed, and
+        watch the file if that is on.
+        """
+        from services.csv_service import mark_file_end
+
+        source = self.csv_panel.dirty.source
+        self._csv_dialect = dialect
+        self._tail_mark = None
+        quotechar = dialect.quotechar if dialect is not None else '"'
+        if source is not None and self.csv_path and os.path.abspath(source.path) == os.path.abspath(self.csv_path):
+            if size is None:
+                self._tail_mark = mark_file_end(source.path, source.size, source.mtime_ns, quotechar)
+            else:
+                self._tail_mark = mark_file_end(source.path, size, quotechar=quotechar)
+        if self.settings["watch_file"] and self.csv_path:
+            self.file_watcher.watch(self.csv_path)
+
+    def _on_csv_changed(self, path: str) -> bool:
+        # FileWatcher callback; False = busy, ask again on the next poll
+        if path != self.csv_path:
+            return True
+        return self._refresh_csv(manual=False)
+
+    def _refresh_csv(self, manual: bool) -> bool:
+        """
+        Bring the table up to date with its CSV file.
+
+        - only appended to: just the new records are parsed and added
+          (_start_tail_refresh), edits are kept
+        - changed otherwise: reloaded in full, keeping the view; a watch
+          refresh (manual=False) never drops unsaved edits, it only says
+          so in the status line
+        - manual (F5) with unsaved edits: reloaded in full, as always
+
+        Returns False if a watch refresh has to wait for a running job.
+        """
+        from services.csv_service import check_file_tail
+
+        panel = self.csv_panel
+        dirty = panel.dirty
+        busy = self._load_job is not None or self._save_job is not None or self._bulk_job is not None
+        if busy and not manual:
+            return False
+        name = os.path.basename(self.csv_path)
+
+        status = "changed"
+        if self._tail_mark is not None and not busy and (dirty.is_clean or not manual):
+            tail = check_file_tail(self._tail_mark)
+            status = tail.status
+        if status == "same":
+            if manual:
+                panel.set_status(f"{name} is up to date")
+            return True
+        appendable = panel.row_count() == dirty.loaded_rows and not dirty.structural
+        if status == "grown" and appendable:
+            self._start_tail_refresh(tail)
+            return True
+        if not manual:
+            if status == "missing":
+                panel.set_status(f"{name} is gone from disk")
+            else:
+                panel.set_status(f"{name} changed on disk; Reload (F5) to see it (unsaved edits would be lost)")
+            if dirty.is_clean and appendable and status == "changed":
+                self._reload_csv(show_errors=False)
+            return True
+        self._reload_csv(show_errors=True)
+        return True
+
+    def _reload_csv(self, show_errors: bool):
+        panel = self.csv_panel
+        self._start_csv_load(
+            self.csv_path,
+            error_title="Reload CSV",
+            error_text="Failed to reload CSV",
+            show_errors=show_errors,
+            view=panel.view_state() if panel.row_count() else None,
+        )
+
+    def _start_tail_refresh(self, tail):
+        """Parse the records the file got since the last look and append them to the table."""
+        from models.compact_table import CompactTable
+        from models.mmap_table import MmapCsvTable
+        from services.csv_backends import choose_backend
+        from services.csv_service import parse_csv_range
+
+        if tail.end == tail.start:
+            self._tail_mark = tail.mark  # only half a record so far
             return
+        panel = self.csv_panel
+        path = self.csv_path
+        name = os.path.basename(path)
+        model = panel.model
+        source = panel.dirty.source
+        dialect = self._csv_dialect or CsvDialect(source.delimiter)
+        backend = choose_backend(tail.end - tail.start, dialect, self.parser_backend).name
+        trace = perf.TRACER.start(f"Refresh {name}")
+        trace.count(bytes=tail.end - tail.start)
+
+        def work(job):
+            if isinstance(model, MmapCsvTable):
+                return None  # the new rows are indexed already (tail.offsets)
+            with perf.span("parse"):
+                return parse_csv_range(
+                    path, tail.start, tail.end, source.encoding, dialect, backend,
+                    as_tables=isinstance(model, CompactTable),
+                )
+
+        def on_done(rows):
+            self._load_job = None
+            if panel.dirty.source is not source or panel.model is not model:
+                trace.finish("cancelled")  # another table took its place
+                return
+            if panel.row_count() != panel.dirty.loaded_rows or panel.dirty.structural:
+                trace.finish("cancelled")  # rows were added meanwhile; try again
+                self.after_idle(self._on_csv_changed, path)
+                return
+            if isinstance(model, MmapCsvTable):
+                model.extend(tail.offsets, tail.end)
+            grown = source._replace(size=tail.end, mtime_ns=tail.mark.mtime_ns)
+            with perf.span("append"):
+                added = panel.append_file_rows(rows, grown)
+            self._tail_mark = tail.mark
+            trace.count(rows=added)
+            trace.finish()
+            panel.set_status(f"{name}: {added:+,} rows from disk, {panel.row_count():,} rows")
+
+        def on_error(e):
+            self._load_job = None
+            trace.finish("error")
+            panel.set_status(f"Refreshing {name} failed: {e}")
+
+        self._load_job = BackgroundJob(
+            self,
+            work,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancel=lambda: trace.finish("cancelled"),
+            poll_ms=TAIL_POLL_MS,
+            trace=trace,
+        ).start()
+
 
-        self.csv_panel.load_data(rows)
-        self._update_title_with_path()
-        
     def save_csv(self):
         """
         Save the current sheet data to a CSV file.
+
+        The table is snapshotted on the UI thread and written by a worker
+        thread (partial or full, always atomic), so the window stays usable
+        and edits made meanwhile don't end up half-saved.
         """
-        rows = self.csv_panel.get_data()
-        if not rows:
+        if self._save_job is not None:
+            messagebox.showinfo("Save CSV", "A save is already in progress.")
+            return
+
+        if not self.csv_panel.row_count():
             messagebox.showinfo("Save CSV", "There is no data to save.")
             return
 
@@ -351,62 +1204,841 @@ class CsvViewerApp(ctk.CTk):
         path = filedialog.asksaveasfilename(
             title="Save CSV",
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Compressed CSV files", "*.csv.gz *.csv.bz2 *.csv.xz"),
+                ("All files", "*.*"),
+            ],
             initialfile=initialfile,
             initialdir=initialdir or None,
         )
         if not path:
             return
 
-        try:
-            with open(path, "w", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                for row in rows:
-                    writer.writerow(row)
+        from models.mmap_table import MmapCsvTable
+        from services.csv_service import codec_for_save
+        from services.save_service import save_table
+
+        # A disk-backed table keeps its file mapped, and Windows refuses to
+        # replace a mapped file: write next to it and swap once it's unmapped.
+        panel = self.csv_panel
+        model = panel.model
+        mapped_path = getattr(model, "path", None)
+        replaces_model = mapped_path is not None and os.path.abspath(mapped_path) == os.path.abspath(path)
+        target = path + ".saving" if replaces_model else path
+
+        source = panel.dirty.source
+        delimiter = source.delimiter if source else ","
+        codec = codec_for_save(path)  # by extension, or that of the file replaced
+
+        # a memory-mapped table already knows where the rows of its file start
+        offsets = None
+        if isinstance(model, MmapCsvTable) and source is not None and os.path.abspath(model.path) == os.path.abspath(source.path):
+            offsets = model.offsets
+
+        name = os.path.basename(path)
+        trace = perf.TRACER.start(f"Save CSV {name}")
+        with trace.activate(), perf.span("snapshot"):
+            snapshot = panel.snapshot()
+        trace.count(rows=snapshot.num_rows)
+        changes = panel.dirty.detach(snapshot.num_rows)
+        generation = panel.dirty.generation
+
+        def work(job):
+            try:
+                with perf.span("serialize"):
+                    return save_table(
+                        snapshot,
+                        target,
+                        changes,
+                        delimiter=delimiter,
+                        offsets=offsets,
+                        progress=lambda done, total: job.emit((done, total)),
+                        cancelled=lambda: job.cancelled,
+                        codec=codec,
+                    )
+            finally:
+                snapshot.close()
 
-            self.csv_path = path
-            self._update_title_with_path()
+        def on_item(item):
+            done, total = item
+            pct = (100.0 * done / total) if total else 100.0
+            panel.set_status(f"Saving {name}... {done:,} rows ({pct:.0f}%)")
+
+        def still_same_table() -> bool:
+            return panel.dirty.generation == generation
+
+        def on_done(mode):
+            self._save_job = None
+            trace.finish()
+            try:
+                if replaces_model and still_same_table():
+                    panel.clear_table()  # unmap first (required on Windows)
+                    os.replace(target, path)
+                    self._start_csv_load(path, error_title="Save CSV", error_text="Saved, but reload failed")
+                elif replaces_model:
+                    os.replace(target, path)
+                elif still_same_table():
+                    # the file on disk now matches the snapshot
+                    panel.dirty.saved(SourceFile.stat(path, delimiter, codec=codec))
+            except Exception as e:
+                messagebox.showerror("Save CSV", f"Failed to save CSV:\n{e}")
+                return
+
+            if still_same_table() or replaces_model:
+                self._set_source(csv_path=path)
+                self._update_title_with_path()
+            if still_same_table() and not replaces_model:
+                self._track_csv_end(CsvDialect(delimiter))
+            panel.set_status(f"Saved {name} ({mode} write)")
             messagebox.showinfo("Save CSV", f"CSV saved to:\n{path}")
-        except Exception as e:
+
+        def on_error(e):
+            self._save_job = None
+            trace.finish("error")
+            if still_same_table():
+                panel.dirty.merge_back(changes)
+            panel.set_status("")
             messagebox.showerror("Save CSV", f"Failed to save CSV:\n{e}")
 
-    
-    
-    def _load_csv_file(self, path: str):
-        with open(path, "r", encoding="utf-8", newline="") as f:
-            reader = csv.reader(f)
-            rows = list(reader)
+        def on_cancel():
+            self._save_job = None
+            trace.finish("cancelled")
+            if still_same_table():
+                panel.dirty.merge_back(changes)
+            panel.set_status("Save cancelled (file left unchanged)")
+
+        panel.set_status(f"Saving {name}...")
+        self._save_job = BackgroundJob(
+            self,
+            work,
+            on_item=on_item,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancel=on_cancel,
+            trace=trace,
+        ).start()
+
+    def cancel_save(self):
+        """
+        Cancel a running background save or Excel export;
+        the target file stays as it was.
+        """
+        if self._save_job is not None:
+            self._save_job.cancel()
 
-        # return all rows; viewer will handle headers visually (A, B, C, ...)
-        return rows
+    # ------------------------------------------------------------------
+    # Background CSV loading
+    # ------------------------------------------------------------------
+    def _start_csv_load(
+        self,
+        path: str,
+        error_title: str,
+        error_text: str,
+        show_errors: bool = True,
+        trace=None,
+        dialect: CsvDialect | None = None,
+        view: dict | None = None,
+    ):
+        """
+        Load `path` on a worker thread and stream the rows into the sheet.
+
+        The old table stays visible until the first batch arrives, so a file
+        that cannot be opened at all doesn't wipe the current view.
+        Bigger files are loaded into a CompactTable (parsed on all cores
+        when big enough), and the biggest are opened memory-mapped
+        (_start_virtual_load). Compressed files are decompressed while
+        they stream in (csv_service.open_csv_stream).
+
+        trace: the perf operation to time the load under (default: a new one).
+        dialect: the file's known dialect (skips sniffing); view: a
+        CsvTablePanel.view_state() to restore once the rows are in.
+        """
+        from services.csv_service import COMPRESSED_SIZE_FACTOR, detect_codec, use_parallel_parse
 
-    def _update_title_with_path(self):
-        if not self.csv_path:
-            self.title("CSV Viewer")
+        self.cancel_load()
+
+        try:
+            size = os.path.getsize(path)
+            codec = detect_codec(path)
+        except OSError:
+            size, codec = 0, None  # let the loader report the error
+        if trace is None:
+            trace = perf.TRACER.start(f"{error_title} {os.path.basename(path)}")
+        trace.count(bytes=size)
+        if codec is not None:
+            # no memory map / byte ranges for a compressed file: always streamed
+            compact = size * COMPRESSED_SIZE_FACTOR >= COMPACT_THRESHOLD_BYTES
+            parallel = False
+        elif size >= VIRTUAL_THRESHOLD_BYTES:
+            self._start_virtual_load(path, error_title, error_text, show_errors, trace=trace, view=view)
+            return
         else:
+            compact = size >= COMPACT_THRESHOLD_BYTES
+            parallel = compact and use_parallel_parse(size)
+        backend = self.parser_backend
+        project = self.project_path
+
+        def on_finish(result, loaded):
+            source, used_dialect = result
+            self.csv_panel.dirty.reset(loaded, source)
+            self._track_csv_end(used_dialect)
+            if project is not None and project == self.project_path:
+                self.settings.set_project_state(
+                    project, csv_path=path, dialect=used_dialect._asdict(), parser_backend=backend
+                )
+            if view:
+                self.csv_panel.restore_view_state(view)
+
+        self._load_batches(
+            os.path.basename(path),
+            produce=lambda: self._csv_batches(path, backend, compact, parallel, dialect),
+            on_start=lambda: self._set_source(csv_path=path),
+            on_finish=on_finish,
+            compact=compact,
+            error_title=error_title,
+            error_text=error_text,
+            show_errors=show_errors,
+            trace=trace,
+        )
+
+    def _csv_batches(self, path: str, backend: str, compact: bool, parallel: bool, dialect: CsvDialect | None = None):
+        """
+        Worker side of a CSV load: yields CsvBatch (rows, bytes_read, total)
+        tuples and returns (SourceFile the rows came from, dialect used).
+
+        - the dialect is sniffed once (unless given); `backend` ("auto",
+          "stdlib", "pandas") picks the parser for both the sheet and the
+          compact path
+        - compact=True yields every batch already encoded as a CompactTable
+        - parallel=True parses byte ranges in a process pool
+        """
+        from services.csv_service import detect_codec, iter_csv_batches, iter_csv_parallel, read_sample, sniff_dialect
+
+        if dialect is None:
+            with perf.span("sniff"):
+                dialect = sniff_dialect(read_sample(path))
+        source = SourceFile.stat(path, dialect.delimiter, codec=detect_codec(path), quotechar=dialect.quotechar)
+        if parallel:
+            yield from iter_csv_parallel(path, dialect=dialect, backend=backend, as_tables=True)
+            return source, dialect
+        yield from iter_csv_batches(
+            path,
+            batch_size=BATCH_ROWS,
+            first_batch_size=FIRST_BATCH_ROWS,
+            dialect=dialect,
+            backend=backend,
+            as_tables=compact,
+        )
+        return source, dialect
+
+    def _set_source(self, csv_path: str | None = None, excel_source: tuple[str, str] | None = None):
+        """
+        Remember where the table in the panel came from (CSV or Excel
+        sheet). Tail refreshes stop until _track_csv_end is called for it.
+        """
+        self.csv_path = csv_path
+        self.excel_source = excel_source
+        self._tail_mark = None
+        self.file_watcher.stop()
+        # a file opened or saved under a new name while a project tab is
+        # shown replaces that tab's file
+        if self._active_tab is not None and (csv_path or excel_source):
+            from services.project_service import ProjectFile
+
+            file = ProjectFile(csv_path) if csv_path else ProjectFile(*excel_source)
+            current = self.project_files[self._active_tab]
+            if file != current and not (file.path == current.path and current.sheet is None):
+                self.project_files[self._active_tab] = file
+                self._shown_entry = None
+                self._show_tabs()
+
+    def _load_batches(
+        self,
+        name: str,
+        produce,
+        on_start,
+        on_finish,
+        compact: bool,
+        error_title: str,
+        error_text: str,
+        show_errors: bool = True,
+        trace=None,
+    ):
+        """
+        Shared driver for background loads.
+
+        - produce() runs on the worker thread: a generator of
+          (rows, done, total) batches whose return value is the load result
+        - on_start() runs on the Tk thread when the first batch arrives
+          (the old table stays visible until then)
+        - on_finish(result, loaded_rows) runs on the Tk thread at the end
+        - compact=True encodes the rows into a CompactTable on the worker
+          and shows it windowed (batches may also arrive pre-encoded as
+          CompactTable chunks); otherwise rows are appended to the sheet
+        - trace: perf operation the load is timed under (finished here)
+        """
+        from models.compact_table import CompactTable
+
+        panel = self.csv_panel
+        trace = trace if trace is not None else perf.TRACER.start(f"Load {name}")
+        table = CompactTable() if compact else None
+        state = {"started": False}
+
+        def work(job):
+            batches = produce()
+            try:
+                while True:
+                    try:
+                        with perf.span("parse"):
+                            rows, done, total = next(batches)
+                    except StopIteration as stop:
+                        return stop.value
+                    if job.cancelled:
+                        return None
+                    if isinstance(rows, CompactTable):
+                        with perf.span("encode"):
+                            table.append_table(rows)
+                        rows = None
+                    elif table is not None:
+                        with perf.span("encode"):
+                            table.append_rows(rows)
+                        rows = None
+                    if not job.emit((rows, done, total)):
+                        return None
+            finally:
+                batches.close()  # release the file / workbook on cancel
+
+        def start():
+            if state["started"]:
+                return
+            state["started"] = True
+            on_start()
+            if table is not None:
+                panel.load_model(table)
+            else:
+                panel.begin_stream()
+            self._update_title_with_path()
+
+        def on_item(item):
+            rows, done, total = item
+            start()
+            if table is not None:
+                if panel.model is table:
+                    panel.refresh_model()
+                loaded = table.num_rows
+            else:
+                loaded = panel.append_rows(rows)
+            pct = (100.0 * done / total) if total else 100.0
+            panel.set_status(f"Loading {name}... {loaded:,} rows ({pct:.0f}%)")
+
+        def on_done(result):
+            self._load_job = None
+            start()
+            if table is not None:
+                if panel.model is table:
+                    panel.refresh_model()
+                loaded = table.num_rows
+                detail = f" (compact, {table.nbytes() / 1e6:.1f} MB)"
+            else:
+                loaded = panel.finish_stream()
+                detail = ""
+            on_finish(result, loaded)
+            panel.rebuild_index()
+            trace.count(rows=loaded, cells=loaded * panel.column_count())
+            trace.finish()
+            panel.set_status(f"Loaded {loaded:,} rows{detail}")
+            self._update_title_with_path()
+
+        def on_error(e):
+            self._load_job = None
+            trace.finish("error")
+            panel.finish_stream()
+            panel.set_status("")
+            if show_errors:
+                messagebox.showerror(error_title, f"{error_text}:\n{e}")
+            else:
+                print(f"{error_text}: {e}")
+
+        panel.set_status(f"Loading {name}...")
+        self._load_job = BackgroundJob(
+            self,
+            work,
+            on_item=on_item,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancel=lambda: trace.finish("cancelled"),
+            trace=trace,
+        ).start()
+
+    def _start_virtual_load(
+        self,
+        path: str,
+        error_title: str,
+        error_text: str,
+        show_errors: bool = True,
+        trace=None,
+        view: dict | None = None,
+    ):
+        """
+        Open a big file as a memory-mapped table. Only the row index is built
+        in the background; rows are parsed later, window by window, while
+        the user scrolls.
+        """
+        from models.mmap_table import MmapCsvTable
+
+        name = os.path.basename(path)
+        trace = trace if trace is not None else perf.TRACER.start(f"Open {name}")
+        # the opened table, for on_cancel: a cancel that comes after the
+        # index is built never reaches on_done, and the file stays mapped
+        # (and locked on Windows) until the table is closed
+        opened = []
+
+        def work(job):
+            model = MmapCsvTable(path)
+            try:
+                with perf.span("index"):
+                    done = model.build_index(
+                        progress=lambda pos, total: job.emit((pos, total)),
+                        cancelled=lambda: job.cancelled,
+                    )
+                if done:
+                    source = SourceFile.stat(path, model.delimiter, quotechar=model.quotechar)
+            except BaseException:
+                model.close()
+                raise
+            if not done:
+                model.close()
+                return None
+            opened.append(model)
+            return model, source
+
+        def on_item(item):
+            pos, total = item
+            pct = (100.0 * pos / total) if total else 100.0
+            self.csv_panel.set_status(f"Indexing {name}... ({pct:.0f}%)")
+
+        def on_done(result):
+            self._load_job = None
+            model, source = result
+            self._set_source(csv_path=path)
+            self.csv_panel.load_model(model)
+            self.csv_panel.dirty.reset(model.num_rows, source)
+            self._track_csv_end(CsvDialect(model.delimiter, model.quotechar), size=model.size)
+            if view:
+                self.csv_panel.restore_view_state(view)
+            self.csv_panel.rebuild_index()
+            trace.count(rows=model.num_rows)
+            trace.finish()
+            self.csv_panel.set_status(
+                f"Opened {model.num_rows:,} rows (disk-backed view)"
+            )
+            self._update_title_with_path()
+
+        def on_error(e):
+            self._load_job = None
+            trace.finish("error")
+            self.csv_panel.set_status("")
+            if show_errors:
+                messagebox.showerror(error_title, f"{error_text}:\n{e}")
+            else:
+                print(f"{error_text}: {e}")
+
+        def on_cancel():
+            trace.finish("cancelled")
+            for model in opened:
+                model.close()
+
+        self.csv_panel.set_status(f"Indexing {name}...")
+        self._load_job = BackgroundJob(
+            self,
+            work,
+            on_item=on_item,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancel=on_cancel,
+            trace=trace,
+        ).start()
+
+    def cancel_load(self):
+        """
+        Cancel a running background load (rows loaded so far stay visible).
+        """
+        job = self._load_job
+        if job is None:
+            return
+        self._load_job = None
+        job.cancel()
+        if self.csv_panel.streaming:
+            loaded = self.csv_panel.finish_stream()
+            self.csv_panel.set_status(f"Load cancelled after {loaded:,} rows")
+        else:
+            self.csv_panel.set_status("Load cancelled")
+
+    def _update_title_with_path(self):
+        if self.csv_path:
             name = os.path.basename(self.csv_path)
             self.title(f"CSV Viewer - {name}")
+        elif self.excel_source:
+            workbook, sheet = self.excel_source
+            self.title(f"CSV Viewer - {os.path.basename(workbook)} [{sheet}]")
+        else:
+            self.title("CSV Viewer")
             
             
 
     # ------------------------------------------------------------------
-    # CSV edit commands (stubs for now)
+    # Compare (diff against a CSV file)
+    # ------------------------------------------------------------------
+    def compare_csv(self, pick_file: bool = False):
+        """
+        Diff the table against a CSV file - the one it was loaded from, or
+        another one (pick_file) - and highlight what changed. The file is
+        hashed and the table streamed against it on a worker thread
+        (services.diff_service), so neither side is held in memory twice.
+        """
+        title = "Compare"
+        panel = self.csv_panel
+        if self._diff_job is not None:
+            messagebox.showinfo(title, "A compare is already running.")
+            return
+        if pick_file:
+            path = filedialog.askopenfilename(
+                title="Compare With File",
+                filetypes=[("CSV files", "*.csv *.csv.gz *.csv.bz2 *.csv.xz"), ("All files", "*.*")],
+            )
+            if not path:
+                return
+        else:
+            path = self.csv_path
+            if not path or not os.path.exists(path):
+                messagebox.showinfo(title, "The table has no CSV file on disk; use Compare With File... instead.")
+                return
+
+        text = simpledialog.askstring(
+            title, "Match rows by key column(s), e.g. A or A, C\n(empty: compare whole rows)", parent=self
+        )
+        if text is None:
+            return
+
+        from services.diff_service import check_key_columns, csv_rows, diff_tables
+
+        try:
+            key_columns = parse_columns(text)
+            check_key_columns(key_columns, panel.column_count(), "table")
+        except ValueError as e:
+            messagebox.showerror(title, str(e))
+            return
+
+        # the file the table came from was sniffed already
+        dialect = self._csv_dialect if not pick_file else None
+        snapshot = panel.snapshot()
+        dirty, generation, rows = panel.dirty, panel.dirty.generation, panel.row_count()
+        name = os.path.basename(path)
+        trace = perf.TRACER.start(f"Compare {name}")
+        started = time.perf_counter()
+
+        def work(job):
+            try:
+                return diff_tables(
+                    csv_rows(path, dialect),
+                    snapshot.iter_rows,
+                    key_columns,
+                    cancelled=lambda: job.cancelled,
+                    progress=lambda phase, count: job.emit((phase, count)),
+                )
+            finally:
+                snapshot.close()
+
+        def on_item(item):
+            phase, count = item
+            panel.set_status(f"Compare: {phase} ({count:,})...")
+
+        def on_done(diff):
+            self._diff_job = None
+            trace.finish()
+            if diff is None:
+                return
+            if panel.dirty is not dirty or dirty.generation != generation or panel.row_count() != rows:
+                panel.set_status("Compare discarded: the table changed meanwhile")
+                return
+            panel.show_diff(diff)
+            result = diff.summary() if diff.changed else "no differences"
+            panel.set_status(f"Compared with {name}: {result} in {time.perf_counter() - started:.2f}s")
+
+        def on_error(e):
+            self._diff_job = None
+            trace.finish("error")
+            panel.set_status("")
+            messagebox.showerror(title, f"Compare failed:\n{e}")
+
+        def on_cancel():
+            self._diff_job = None
+            trace.finish("cancelled")
+            panel.set_status("Compare cancelled")
+
+        panel.clear_diff()
+        panel.set_status(f"Comparing with {name}...")
+        self._diff_job = BackgroundJob(
+            self, work, on_item=on_item, on_done=on_done, on_error=on_error, on_cancel=on_cancel, trace=trace
+        ).start()
+
+    def cancel_compare(self):
+        if self._diff_job is not None:
+            self._diff_job.cancel()
+
+    # ------------------------------------------------------------------
+    # Upsert (update the table from an input CSV by key)
+    # ------------------------------------------------------------------
+    def upsert_from_csv(self):
+        """
+        Merge an input CSV into the table (the master) by key columns:
+        matching rows take the input's values (per the conflict rules), new
+        keys are appended. Planned on a worker thread from a snapshot
+        (services.upsert_service), then either shown as a dry-run summary
+        or applied as one undoable batch.
+        """
+        from ui.upsert_dialog import ask_upsert
+
+        title = "Upsert from CSV"
+        panel = self.csv_panel
+        if self._bulk_job is not None:
+            messagebox.showinfo(title, "A bulk update is already running.")
+            return
+        if not panel.row_count():
+            messagebox.showinfo(title, "Open the master table first.")
+            return
+        choice = ask_upsert(self, title, self._last_upsert)
+        if choice is None:
+            return
+        path, rules, dry_run = choice
+        self._last_upsert = (path, rules)
+
+        from services.upsert_service import plan_upsert, read_csv_table
+
+        backend = self.parser_backend
+        # the plan holds row/column positions of the snapshot (see bulk_update)
+        snapshot = panel.snapshot()
+        dirty, version = panel.dirty, panel.dirty.version
+        name = os.path.basename(path)
+        trace = perf.TRACER.start(f"Upsert {name}")
+        started = time.perf_counter()
+
+        def work(job):
+            try:
+                with perf.span("read input"):
+                    source = read_csv_table(path, backend)
+                with perf.span("plan"):
+                    return plan_upsert(snapshot, source, rules, cancelled=lambda: job.cancelled)
+            finally:
+                snapshot.close()
+
+        def on_done(plan):
+            self._bulk_job = None
+            try:
+                if plan is not None:
+                    finish(plan)
+            finally:
+                trace.finish()
+
+        def finish(plan):
+            seconds = time.perf_counter() - started
+            if dry_run:
+                panel.set_status(f"{title}: dry run in {seconds:.2f}s")
+                messagebox.showinfo(f"{title} (dry run)", f"{plan.summary()}\n\nNothing was changed.")
+                return
+            if panel.dirty is not dirty or dirty.version != version:
+                panel.set_status(f"{title} discarded: the table changed meanwhile")
+                return
+            if plan.empty:
+                panel.set_status(f"{title}: nothing to change ({plan.matched:,} matching rows)")
+                return
+            try:
+                with perf.span("apply"):
+                    count = panel.apply_upsert(plan, label=title)
+            except ValueError as e:
+                messagebox.showerror(title, str(e))
+                return
+            panel.set_status(
+                f"{title}: {plan.updated_rows:,} row(s) updated ({count:,} cells), "
+                f"{len(plan.new_rows):,} appended in {time.perf_counter() - started:.2f}s"
+            )
+
+        def on_error(e):
+            self._bulk_job = None
+            trace.finish("error")
+            panel.set_status("")
+            messagebox.showerror(title, f"Upsert failed:\n{e}")
+
+        panel.set_status(f"{title}: reading {name}...")
+        self._bulk_job = BackgroundJob(self, work, on_done=on_done, on_error=on_error, trace=trace).start()
+
+    # ------------------------------------------------------------------
+    # Bulk update (left panel)
     # ------------------------------------------------------------------
+    def _read_bulk_update(self, action: str) -> BulkUpdate:
+        """Build a BulkUpdate from the panel controls (raises ValueError)."""
+        opts = self.bulk_options
+        panel = self.csv_panel
+        num_cols = panel.column_count()
+
+        text = opts["columns"].get().strip()
+        columns = parse_columns(text) if text else panel.selected_columns()
+        if not columns:
+            if action == "set":
+                raise ValueError("Choose the columns to set (type them or select them).")
+            columns = list(range(num_cols))
+        outside = [c for c in columns if c >= num_cols]
+        if outside:
+            raise ValueError(f"The table has only {num_cols} column(s).")
+
+        rows = None
+        if opts["selection_only"].get():
+            rows = tuple(panel.selected_rows())
+            if not rows:
+                raise ValueError("Nothing is selected.")
+
+        condition = None
+        test = opts["if_test"].get()
+        if test != NO_CONDITION:
+            cond_cols = parse_columns(opts["if_column"].get())
+            if len(cond_cols) != 1:
+                raise ValueError("The condition needs exactly one column.")
+            condition = Condition(cond_cols[0], test, opts["if_value"].get())
+
+        return BulkUpdate(
+            action=action,
+            columns=tuple(columns),
+            find=opts["find"].get(),
+            replace=opts["replace"].get(),
+            regex=bool(opts["regex"].get()),
+            match_case=bool(opts["match_case"].get()),
+            whole_cell=bool(opts["whole_cell"].get()),
+            rows=rows,
+            condition=condition,
+        )
+
+    def bulk_update(self, action: str):
+        """
+        Run a find/replace ("replace") or set-column ("set") over whole
+        columns or the selection. The new values are computed on a worker
+        thread from a snapshot and applied to the table in one batch.
+        """
+        title = "Replace All" if action == "replace" else "Set Column"
+        panel = self.csv_panel
+        if self._bulk_job is not None:
+            messagebox.showinfo(title, "A bulk update is already running.")
+            return
+        if not panel.row_count():
+            messagebox.showinfo(title, "There is no data to update.")
+            return
+        try:
+            update = self._read_bulk_update(action)
+        except ValueError as e:
+            messagebox.showerror(title, str(e))
+            return
+
+        # the changes are row/column positions of the snapshot: any edit
+        # meanwhile (cells, structure, undo, reload) makes them stale
+        snapshot = panel.snapshot()
+        dirty, version = panel.dirty, panel.dirty.version
+        started = time.perf_counter()
+
+        def work(job):
+            try:
+                return compute_updates(snapshot, update, cancelled=lambda: job.cancelled)
+            finally:
+                snapshot.close()
+
+        def on_done(changes):
+            self._bulk_job = None
+            if panel.dirty is not dirty or dirty.version != version:
+                panel.set_status("Bulk update discarded: the table changed meanwhile")
+                return
+            count = panel.apply_column_changes(changes, label=title)
+            panel.set_status(f"{title}: {count:,} cell(s) changed in {time.perf_counter() - started:.2f}s")
+
+        def on_error(e):
+            self._bulk_job = None
+            panel.set_status("")
+            messagebox.showerror(title, f"Bulk update failed:\n{e}")
+
+        panel.set_status(f"{title}...")
+        self._bulk_job = BackgroundJob(self, work, on_done=on_done, on_error=on_error).start()
+
+    # ------------------------------------------------------------------
+    # Undo / redo
+    # ------------------------------------------------------------------
+    def _journal_step(self, title: str, step):
+        if self._save_job is not None:
+            messagebox.showinfo(title, "Please wait until the current save has finished.")
+            return
+        if self._bulk_job is not None:
+            messagebox.showinfo(title, "Please wait until the running bulk update or upsert has finished.")
+            return
+        started = time.perf_counter()
+        label = step()
+        if label is None:
+            self.csv_panel.set_status(f"Nothing to {title.lower()}")
+            return
+        self.csv_panel.set_status(f"{title}: {label} ({time.perf_counter() - started:.2f}s)")
+
+    def undo(self):
+        """Undo the last edit (cells, bulk update, inserted/deleted rows or columns)."""
+        self._journal_step("Undo", self.csv_panel.undo)
+
+    def redo(self):
+        """Redo the last undone edit."""
+        self._journal_step("Redo", self.csv_panel.redo)
+
+    # ------------------------------------------------------------------
+    # CSV edit commands (act on the current selection)
+    # ------------------------------------------------------------------
+    def _structure_edit(self, title: str, action) -> bool:
+        panel = self.csv_panel
+        if panel.model is not None:
+            messagebox.showinfo(
+                title,
+                "Inserting or deleting rows/columns isn't available for large\n"
+                "tables shown in the windowed view.",
+            )
+            return False
+        if self._save_job is not None:
+            messagebox.showinfo(title, "Please wait until the current save has finished.")
+            return False
+        if self._bulk_job is not None:
+            messagebox.showinfo(title, "Please wait until the running bulk update or upsert has finished.")
+            return False
+        started = time.perf_counter()
+        count = action()
+        panel.set_status(f"{title}: {count:,} in {time.perf_counter() - started:.2f}s")
+        return True
+
     def add_row(self):
-        messagebox.showinfo("Add Row", "Add Row is not implemented yet.\n(You can implement it later.)")
+        """Insert empty rows above each selected block (one row at the end if nothing is selected)."""
+        self._structure_edit("Rows inserted", self.csv_panel.insert_rows)
 
     def add_column(self):
-        messagebox.showinfo("Add Column", "Add Column is not implemented yet.\n(You can implement it later.)")
+        """Insert empty columns left of each selected block (one at the end if nothing is selected)."""
+        self._structure_edit("Columns inserted", self.csv_panel.insert_columns)
 
     def delete_row(self):
-        messagebox.showinfo("Delete Row", "Delete Row is not implemented yet.\n(You can implement it later.)")
+        """Delete all selected rows, contiguous or not."""
+        if not self.csv_panel.selected_rows():
+            messagebox.showinfo("Delete Row", "Select the rows (or cells) to delete first.")
+            return
+        self._structure_edit("Rows deleted", self.csv_panel.delete_rows)
 
     def delete_column(self):
-        messagebox.showinfo("Delete Column", "Delete Column is not implemented yet.\n(You can implement it later.)")
-
-            
+        """Delete all selected columns, contiguous or not."""
+        if not self.csv_panel.selected_columns():
+            messagebox.showinfo("Delete Column", "Select the columns (or cells) to delete first.")
+            return
+        self._structure_edit("Columns deleted", self.csv_panel.delete_columns)
 
 
-def run_app():
-    app = CsvViewerApp()
+def run_app(started: float | None = None, report_startup: bool = False):
+    """Start the GUI (see CsvViewerApp for the arguments)."""
+    app = CsvViewerApp(started=started, report_startup=report_startup)
     app.mainloop()
+    app.shutdown()
@@ -14,24 +14,44 @@ def build_menu_bar(app: "CsvViewerApp"):
     file_menu.add_command(label="New Project...", command=app.new_project, accelerator="Ctrl+N")
     file_menu.add_command(label="Open Project...", command=app.open_project, accelerator="Ctrl+O")
     file_menu.add_command(label="Save Project As...", command=app.save_project, accelerator="Ctrl+S")
+    file_menu.add_command(label="Add Files to Project...", command=app.add_project_files)
+    file_menu.add_command(label="Close Tab", command=app.close_tab)
     file_menu.add_separator()
     file_menu.add_command(label="Export to Excel...", command=app.export_to_excel)
     file_menu.add_command(label="Import from Excel...", command=app.import_from_excel)
+    file_menu.add_command(label="Save to Workbook", command=app.save_to_workbook)
     file_menu.add_separator()
     file_menu.add_command(label="Exit", command=app.quit, accelerator="Esc")
     menubar.add_cascade(label="File", menu=file_menu)
 
     # # ---------- Edit menu ----------
     edit_menu = tk.Menu(menubar, tearoff=0)
-    edit_menu.add_command(label="Clear Table", command=app.csv_panel.clear_table)
+    edit_menu.add_command(label="Undo", command=app.undo, accelerator="Ctrl+Z")
+    edit_menu.add_command(label="Redo", command=app.redo, accelerator="Ctrl+Y")
+    edit_menu.add_separator()
+    edit_menu.add_command(label="Clear Table", command=lambda: app.csv_panel.clear_table())
     menubar.add_cascade(label="Edit", menu=edit_menu)
 
     # # ---------- Run menu ----------
     CSV_menu = tk.Menu(menubar, tearoff=0)
     CSV_menu.add_command(label="New..", command=app.create_new_csv)
     CSV_menu.add_command(label="Open..", command=app.open_csv)
-    CSV_menu.add_command(label="Reload..", command=app.reload_csv)
+    CSV_menu.add_command(label="Reload..", command=app.reload_csv, accelerator="F5")
+    watch_var = tk.BooleanVar(app, value=bool(app.settings.get("watch_file")))
+    CSV_menu.add_checkbutton(
+        label="Watch File", variable=watch_var, command=lambda: app.set_watch_file(watch_var.get())
+    )
+    CSV_menu.add_command(label="Cancel Load", command=app.cancel_load)
     CSV_menu.add_command(label="Save As", command=app.save_csv)
+    CSV_menu.add_command(label="Cancel Save / Export", command=app.cancel_save)
+    CSV_menu.add_separator()
+    CSV_menu.add_command(label="Upsert from CSV...", command=app.upsert_from_csv)
+    CSV_menu.add_command(label="Compare With Saved File...", command=app.compare_csv)
+    CSV_menu.add_command(label="Compare With File...", command=lambda: app.compare_csv(pick_file=True))
+    CSV_menu.add_command(label="Next Change", command=lambda: app.csv_panel.next_change(), accelerator="F8")
+    CSV_menu.add_command(label="Previous Change", command=lambda: app.csv_panel.next_change(backwards=True), accelerator="Shift+F8")
+    CSV_menu.add_command(label="Clear Compare Highlights", command=lambda: app.csv_panel.clear_diff())
+    CSV_menu.add_command(label="Cancel Compare", command=app.cancel_compare)
     menubar.add_cascade(label="CSV", menu=CSV_menu)
 
 
@@ -39,8 +59,8 @@ def build_menu_bar(app: "CsvViewerApp"):
     view_menu = tk.Menu(menubar, tearoff=0)
     
     window_menu = tk.Menu(view_menu, tearoff=0)
-    window_menu.add_command(label="Full Screen", accelerator="F11", command=app.csv_panel.clear_table)
-    window_menu.add_command(label="Window", accelerator="F12", command=app.csv_panel.clear_table)
+    window_menu.add_command(label="Full Screen", accelerator="F11", command=lambda: app.csv_panel.clear_table())
+    window_menu.add_command(label="Window", accelerator="F12", command=lambda: app.csv_panel.clear_table())
     view_menu.add_cascade(label="Window", menu=window_menu) 
 
     
@@ -49,6 +69,13 @@ def build_menu_bar(app: "CsvViewerApp"):
     appearance_menu.add_radiobutton( label="Light", command=lambda: app._set_appearance_mode("Light") )
     appearance_menu.add_radiobutton( label="Dark", command=lambda: app._set_appearance_mode("Dark")  )
     view_menu.add_cascade(label="Appearance", menu=appearance_menu)
+
+    view_menu.add_separator()
+    perf_var = tk.BooleanVar(app, value=bool(app.settings.get("perf_trace")))
+    view_menu.add_checkbutton(
+        label="Performance Trace", variable=perf_var, command=lambda: app.set_perf_trace(perf_var.get())
+    )
+    view_menu.add_command(label="Export Performance Trace...", command=app.export_perf_trace)
     menubar.add_cascade(label="View", menu=view_menu)
     
     # ---------- Help menu ----------
@@ -0,0 +1,61 @@
+# src/ui/sheet_picker.py
+from typing import List
+
+import customtkinter as ctk
+
+from services.excel_service import SheetInfo
+
+
+def _describe(sheet: SheetInfo) -> str:
+    if sheet.rows is None:
+        return sheet.name
+    return f"{sheet.name}  —  {sheet.rows:,} rows × {sheet.cols:,} columns"
+
+
+def ask_sheet(app: ctk.CTk, sheets: List[SheetInfo], title: str = "Import from Excel") -> SheetInfo | None:
+    """
+    Modal dialog listing the worksheets of a workbook (with their size).
+    Returns the chosen sheet, or None if the dialog was cancelled.
+    """
+    dialog = ctk.CTkToplevel(app)
+    dialog.title(title)
+    dialog.transient(app)
+    dialog.resizable(False, False)
+    dialog.grid_columnconfigure(0, weight=1)
+
+    label = ctk.CTkLabel(dialog, text="Choose a worksheet to open:")
+    label.grid(row=0, column=0, columnspan=2, padx=15, pady=(15, 5), sticky="w")
+
+    choice = ctk.IntVar(value=0)
+    body = ctk.CTkScrollableFrame(dialog, width=420, height=min(40 * len(sheets), 300))
+    body.grid(row=1, column=0, columnspan=2, padx=15, pady=5, sticky="nsew")
+    for i, sheet in enumerate(sheets):
+        ctk.CTkRadioButton(body, text=_describe(sheet), variable=choice, value=i).grid(
+            row=i, column=0, padx=5, pady=4, sticky="w"
+        )
+
+    result: dict[str, SheetInfo | None] = {"sheet": None}
+
+    def on_ok(_event=None):
+        result["sheet"] = sheets[choice.get()]
+        dialog.destroy()
+
+    def on_cancel(_event=None):
+        dialog.destroy()
+
+    ctk.CTkButton(dialog, text="Open", command=on_ok).grid(
+        row=2, column=0, padx=(15, 5), pady=15, sticky="e"
+    )
+    ctk.CTkButton(dialog, text="Cancel", command=on_cancel).grid(
+        row=2, column=1, padx=(5, 15), pady=15, sticky="w"
+    )
+
+    dialog.bind("<Return>", on_ok)
+    dialog.bind("<Escape>", on_cancel)
+    dialog.protocol("WM_DELETE_WINDOW", on_cancel)
+
+    # CTkToplevel needs to be mapped before it can grab
+    dialog.after(50, dialog.grab_set)
+    dialog.focus_set()
+    app.wait_window(dialog)
+    return result["sheet"]
@@ -0,0 +1,130 @@
+# src/ui/upsert_dialog.py
+from tkinter import filedialog, messagebox
+
+import customtkinter as ctk
+
+from services.bulk_service import index_to_col_name, parse_columns
+from services.upsert_service import DUPLICATE_INPUT, DUPLICATE_MASTER, ON_MATCH, UpsertRules
+
+
+def ask_upsert(app: ctk.CTk, title: str = "Upsert from CSV", initial: tuple | None = None):
+    """
+    Modal dialog for a keyed upsert: the input CSV, the key columns and
+    the conflict rules. `initial` is an earlier (path, rules) to start from.
+    Returns (path, UpsertRules, dry_run), or None if it was cancelled.
+    """
+    path0, rules0 = initial if initial is not None else ("", UpsertRules(()))
+
+    dialog = ctk.CTkToplevel(app)
+    dialog.title(title)
+    dialog.transient(app)
+    dialog.resizable(False, False)
+    dialog.grid_columnconfigure(1, weight=1)
+
+    def columns_text(columns) -> str:
+        return ", ".join(index_to_col_name(c) for c in columns or ())
+
+    # input file
+    ctk.CTkLabel(dialog, text="Input CSV:").grid(row=0, column=0, padx=(15, 5), pady=(15, 5), sticky="w")
+    path_entry = ctk.CTkEntry(dialog, width=320)
+    path_entry.insert(0, path0)
+    path_entry.grid(row=0, column=1, pady=(15, 5), sticky="ew")
+
+    def browse():
+        path = filedialog.askopenfilename(
+            parent=dialog, title="Input CSV", filetypes=[("CSV files", "*.csv *.csv.gz *.csv.bz2 *.csv.xz"), ("All files", "*.*")]
+        )
+        if path:
+            path_entry.delete(0, "end")
+            path_entry.insert(0, path)
+
+    ctk.CTkButton(dialog, text="Browse...", width=80, command=browse).grid(row=0, column=2, padx=(5, 15), pady=(15, 5))
+
+    # keys
+    ctk.CTkLabel(dialog, text="Key column(s):").grid(row=1, column=0, padx=(15, 5), pady=5, sticky="w")
+    key_entry = ctk.CTkEntry(dialog, placeholder_text="Master columns, e.g. A or A, C")
+    if rules0.key_columns:
+        key_entry.insert(0, columns_text(rules0.key_columns))
+    key_entry.grid(row=1, column=1, columnspan=2, padx=(0, 15), pady=5, sticky="ew")
+
+    ctk.CTkLabel(dialog, text="Input key column(s):").grid(row=2, column=0, padx=(15, 5), pady=5, sticky="w")
+    input_key_entry = ctk.CTkEntry(dialog, placeholder_text="Empty: same header name / position")
+    if rules0.input_key_columns:
+        input_key_entry.insert(0, columns_text(rules0.input_key_columns))
+    input_key_entry.grid(row=2, column=1, columnspan=2, padx=(0, 15), pady=5, sticky="ew")
+
+    header = ctk.BooleanVar(value=rules0.header)
+    ctk.CTkCheckBox(dialog, text="First rows are headers (match columns by name)", variable=header).grid(
+        row=3, column=0, columnspan=3, padx=15, pady=5, sticky="w"
+    )
+
+    # rules
+    options = (
+        ("Matching rows:", ON_MATCH, rules0.on_match),
+        ("Duplicate input keys:", DUPLICATE_INPUT, rules0.duplicate_input),
+        ("Duplicate master keys:", DUPLICATE_MASTER, rules0.duplicate_master),
+    )
+    choices = []
+    for i, (label, values, value) in enumerate(options, start=4):
+        ctk.CTkLabel(dialog, text=label).grid(row=i, column=0, padx=(15, 5), pady=5, sticky="w")
+        var = ctk.StringVar(value=value)
+        ctk.CTkOptionMenu(dialog, variable=var, values=list(values)).grid(
+            row=i, column=1, columnspan=2, padx=(0, 15), pady=5, sticky="ew"
+        )
+        choices.append(var)
+    on_match, duplicate_input, duplicate_master = choices
+
+    clear_with_empty = ctk.BooleanVar(value=rules0.clear_with_empty)
+    ctk.CTkCheckBox(dialog, text="Empty input cells clear master cells", variable=clear_with_empty).grid(
+        row=7, column=0, columnspan=3, padx=15, pady=5, sticky="w"
+    )
+    insert_new = ctk.BooleanVar(value=rules0.insert_new)
+    ctk.CTkCheckBox(dialog, text="Append rows with new keys", variable=insert_new).grid(
+        row=8, column=0, columnspan=3, padx=15, pady=5, sticky="w"
+    )
+
+    result: dict = {"value": None}
+
+    def finish(dry_run: bool):
+        path = path_entry.get().strip()
+        try:
+            if not path:
+                raise ValueError("Choose the input CSV file.")
+            key_columns = tuple(parse_columns(key_entry.get()))
+            if not key_columns:
+                raise ValueError("Choose the key column(s) to match rows by.")
+            input_text = input_key_entry.get().strip()
+            input_keys = tuple(parse_columns(input_text)) if input_text else None
+        except ValueError as e:
+            messagebox.showerror(title, str(e), parent=dialog)
+            return
+        rules = UpsertRules(
+            key_columns=key_columns,
+            input_key_columns=input_keys,
+            header=bool(header.get()),
+            on_match=on_match.get(),
+            clear_with_empty=bool(clear_with_empty.get()),
+            insert_new=bool(insert_new.get()),
+            duplicate_input=duplicate_input.get(),
+            duplicate_master=duplicate_master.get(),
+        )
+        result["value"] = (path, rules, dry_run)
+        dialog.destroy()
+
+    def on_cancel(_event=None):
+        dialog.destroy()
+
+    buttons = ctk.CTkFrame(dialog, fg_color="transparent")
+    buttons.grid(row=9, column=0, columnspan=3, padx=15, pady=15, sticky="e")
+    ctk.CTkButton(buttons, text="Dry Run", width=90, command=lambda: finish(True)).grid(row=0, column=0, padx=5)
+    ctk.CTkButton(buttons, text="Apply", width=90, command=lambda: finish(False)).grid(row=0, column=1, padx=5)
+    ctk.CTkButton(buttons, text="Cancel", width=90, command=on_cancel).grid(row=0, column=2, padx=(5, 0))
+
+    dialog.bind("<Escape>", on_cancel)
+    dialog.protocol("WM_DELETE_WINDOW", on_cancel)
+
+    # CTkToplevel needs to be mapped before it can grab
+    dialog.after(50, dialog.grab_set)
+    dialog.focus_set()
+    app.wait_window(dialog)
+    return result["value"]